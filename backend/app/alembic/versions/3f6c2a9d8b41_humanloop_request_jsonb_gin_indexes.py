@@ -0,0 +1,58 @@
+"""humanloop_request_jsonb_gin_indexes
+
+Revision ID: 3f6c2a9d8b41
+Revises: a5337595b55d
+Create Date: 2026-10-19 10:12:45.318274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6c2a9d8b41'
+down_revision = 'a5337595b55d'
+branch_labels = None
+depends_on = None
+
+
+JSON_COLUMNS = ("context", "metadata_", "response")
+INDEX_NAMES = {
+    "context": "ix_humanlooprequest_context_gin",
+    "metadata_": "ix_humanlooprequest_metadata_gin",
+    "response": "ix_humanlooprequest_response_gin",
+}
+
+
+def upgrade():
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'humanlooprequest',
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            existing_type=sa.JSON(),
+            postgresql_using=f'{column}::jsonb',
+        )
+    for column in JSON_COLUMNS:
+        op.create_index(
+            INDEX_NAMES[column],
+            'humanlooprequest',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'jsonb_path_ops'},
+        )
+
+
+def downgrade():
+    for column in JSON_COLUMNS:
+        op.drop_index(INDEX_NAMES[column], table_name='humanlooprequest')
+    for column in JSON_COLUMNS:
+        op.alter_column(
+            'humanlooprequest',
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'{column}::json',
+        )
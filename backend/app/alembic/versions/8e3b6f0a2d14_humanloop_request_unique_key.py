@@ -0,0 +1,69 @@
+"""humanloop_request_unique_key
+
+Revision ID: 8e3b6f0a2d14
+Revises: c4a7d3e9f215
+Create Date: 2026-10-19 21:14:37.602318
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6f0a2d14'
+down_revision = 'c4a7d3e9f215'
+branch_labels = None
+depends_on = None
+
+
+CONSTRAINT_NAME = 'uq_humanlooprequest_owner_platform_conversation_request'
+KEY_COLUMNS = ['owner_id', 'platform', 'conversation_id', 'request_id']
+# 删除的重复请求先复制到这张表，确认无误后可手动删除
+BACKUP_TABLE = 'humanlooprequest_duplicates'
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade():
+    # 并发创建可能留下重复的请求，保留最近更新的一条（管理员的处理结果在这一条上）
+    conn = op.get_bind()
+    duplicate_ids = conn.execute(
+        sa.text(
+            """
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY owner_id, platform, conversation_id, request_id
+                    ORDER BY updated_at DESC, created_at DESC, id
+                ) AS position
+                FROM humanlooprequest
+            ) ranked
+            WHERE ranked.position > 1
+            """
+        )
+    ).scalars().all()
+    if duplicate_ids:
+        logger.warning(
+            f'Moving {len(duplicate_ids)} duplicate humanloop requests to '
+            f'{BACKUP_TABLE} before adding {CONSTRAINT_NAME}: '
+            + ', '.join(str(request_id) for request_id in duplicate_ids)
+        )
+        op.execute(f'CREATE TABLE IF NOT EXISTS {BACKUP_TABLE} (LIKE humanlooprequest)')
+        conn.execute(
+            sa.text(
+                f'INSERT INTO {BACKUP_TABLE} '
+                'SELECT * FROM humanlooprequest WHERE id = ANY(:ids)'
+            ),
+            {'ids': list(duplicate_ids)},
+        )
+        conn.execute(
+            sa.text('DELETE FROM humanlooprequest WHERE id = ANY(:ids)'),
+            {'ids': list(duplicate_ids)},
+        )
+    op.create_unique_constraint(CONSTRAINT_NAME, 'humanlooprequest', KEY_COLUMNS)
+
+
+def downgrade():
+    # 备份表保留，不自动恢复重复的请求
+    op.drop_constraint(CONSTRAINT_NAME, 'humanlooprequest', type_='unique')
@@ -0,0 +1,49 @@
+"""humanloop_request_trigram_search
+
+Revision ID: b5d9e1c7f324
+Revises: 8e3b6f0a2d14
+Create Date: 2026-10-19 23:05:41.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d9e1c7f324'
+down_revision = '8e3b6f0a2d14'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_TEXT_EXPR = (
+    "coalesce(context ->> 'message', '') || ' ' || "
+    "coalesce(context ->> 'question', '') || ' ' || "
+    "coalesce(feedback, '') || ' ' || "
+    "coalesce(responded_by, '')"
+)
+
+SEARCH_VECTOR_EXPR = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(context ->> 'message', '') || ' ' || "
+    "coalesce(context ->> 'question', '') || ' ' || "
+    "coalesce(feedback, '') || ' ' || "
+    "coalesce(responded_by, ''))"
+)
+
+
+def upgrade():
+    # 'simple' 分词无法切分中文，改为 pg_trgm 三元组索引上的子串匹配
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.drop_index('ix_humanlooprequest_search_vector_gin', table_name='humanlooprequest', postgresql_using='gin')
+    op.drop_column('humanlooprequest', 'search_vector')
+    op.add_column('humanlooprequest', sa.Column('search_text', sa.Text(), sa.Computed(SEARCH_TEXT_EXPR, persisted=True), nullable=True))
+    op.create_index('ix_humanlooprequest_search_text_trgm', 'humanlooprequest', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_humanlooprequest_search_text_trgm', table_name='humanlooprequest', postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+    op.drop_column('humanlooprequest', 'search_text')
+    op.add_column('humanlooprequest', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_EXPR, persisted=True), nullable=True))
+    op.create_index('ix_humanlooprequest_search_vector_gin', 'humanlooprequest', ['search_vector'], unique=False, postgresql_using='gin')
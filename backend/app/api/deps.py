@@ -1,9 +1,10 @@
 import logging
 from collections.abc import Generator
+from datetime import datetime, timedelta
 from typing import Annotated, Any
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -13,9 +14,11 @@ from sqlmodel import Session
 from app import crud
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
-from app.core.mongodb import get_mongo_db
-from app.models.models import TokenPayload, User
+from app.core.db import engine, replica_router, submit_background_write
+from app.core.mongodb import get_mongo_db, get_mongo_read_db
+from app.core.rate_limit import check_api_key_rate_limit
+from app.core.user_cache import user_cache
+from app.models.models import APIKey, TokenPayload, User
 
 logger = logging.getLogger(__name__)
 
@@ -25,13 +28,27 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # 提交后保留对象的属性值：写入的值都已知，数据库生成的列通过 RETURNING 取回，
+    # 不需要在提交后重新查询
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """只读查询使用的会话：有延迟在阈值内的副本时连接副本，否则使用主库"""
+    with Session(replica_router.read_engine(), expire_on_commit=False) as session:
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+ReadSessionDep = Annotated[Session, Depends(get_read_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 MongoDep = Annotated[Database[dict[str, Any]], Depends(get_mongo_db)]
+MongoReadDep = Annotated[Database[dict[str, Any]], Depends(get_mongo_read_db)]
+# Agent 写接口可选的幂等键，超时重试时携带同一个值
+IdempotencyKeyHeader = Annotated[
+    str | None, Header(alias="Idempotency-Key", min_length=1, max_length=255)
+]
 
 
 def get_current_user(session: SessionDep, token: TokenDep) -> User:
@@ -45,9 +62,13 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    subject = str(token_data.sub)
+    user = user_cache.get(session, subject)
+    if user is None:
+        user = session.get(User, token_data.sub)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_cache.set(subject, user)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
@@ -73,13 +94,11 @@ def get_current_active_admin(current_user: CurrentUser) -> User:
     return current_user
 
 
-def get_current_user_by_api_key(session: SessionDep, token: TokenDep) -> User:
-    print(token)
+def get_api_key(session: SessionDep, token: TokenDep) -> APIKey:
     # 直接通过API Key查找对应的APIKey记录
     api_key = crud.get_api_key_by_key(session=session, key=token)
-    print(api_key)
     if not api_key:
-        logger.error(f"API Key not found: {token}")
+        logger.error(f"API Key not found: {token[:8]}...")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -87,12 +106,39 @@ def get_current_user_by_api_key(session: SessionDep, token: TokenDep) -> User:
 
     # 检查API Key是否激活
     if not api_key.is_active:
-        logger.error(f"API Key is inactive: {token}")
+        logger.error(f"API Key is inactive: {token[:8]}...")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="API Key is inactive",
         )
+    return api_key
+
+
+async def rate_limit_api_key(
+    api_key: Annotated[APIKey, Depends(get_api_key)],
+) -> APIKey:
+    """按 API Key 做令牌桶限流，超出时返回 429 并通过 Retry-After 告知等待时间"""
+    result = await check_api_key_rate_limit(
+        api_key_id=str(api_key.id),
+        per_minute=api_key.rate_limit_per_minute,
+        burst=api_key.rate_limit_burst,
+    )
+    if result is not None and not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={
+                "Retry-After": str(result.retry_after_seconds),
+                "X-RateLimit-Limit": str(result.limit),
+                "X-RateLimit-Remaining": str(result.remaining),
+            },
+        )
+    return api_key
 
+
+def get_current_user_by_api_key(
+    session: SessionDep, api_key: Annotated[APIKey, Depends(rate_limit_api_key)]
+) -> User:
     # 获取API Key对应的用户
     user = session.get(User, api_key.owner_id)
     if not user:
@@ -100,10 +146,21 @@ def get_current_user_by_api_key(session: SessionDep, token: TokenDep) -> User:
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
 
-    # 更新API Key的最后使用时间
-    crud.update_api_key_last_used(session=session, api_key=api_key)
+    # 后台更新API Key的最后使用时间，不占用请求的数据库往返
+    now = datetime.utcnow()
+    if api_key.last_used_at is None or now - api_key.last_used_at >= timedelta(
+        seconds=settings.API_KEY_LAST_USED_INTERVAL_SECONDS
+    ):
+        api_key_id = api_key.id
+        submit_background_write(
+            lambda session: crud.touch_api_key_last_used(
+                session=session, api_key_id=api_key_id, used_at=now
+            )
+        )
 
     return user
 
 
 CurrentUserByAPIKey = Annotated[User, Depends(get_current_user_by_api_key)]
+# 与 CurrentUserByAPIKey 共用同一次查询和限流检查
+CurrentAPIKey = Annotated[APIKey, Depends(rate_limit_api_key)]
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from fastapi.routing import APIRoute
 
 from app.api.routes import (
     admin_dashboard,
@@ -14,6 +15,11 @@ from app.api.routes import (
 )
 from app.core.config import settings
 
+
+def custom_generate_unique_id(route: APIRoute) -> str:
+    return f"{route.tags[0]}-{route.name}"
+
+
 api_router = APIRouter()
 api_router.include_router(login.router)
 api_router.include_router(users.router)
@@ -0,0 +1,208 @@
+import json
+import logging
+import random
+import time
+from typing import Any
+
+import anyio.to_thread
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.main import custom_generate_unique_id
+from app.core import metrics
+from app.core.config import settings
+from app.core.query_stats import current_query_stats, track_queries
+
+logger = logging.getLogger("app.request")
+db_logger = logging.getLogger("app.db")
+
+BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+def _match_prefix(path: str, prefixes: list[str] | str) -> bool:
+    if isinstance(prefixes, str):
+        prefixes = [prefixes]
+    return any(path.startswith(prefix) for prefix in prefixes)
+
+
+class RequestLoggingMiddleware:
+    """结构化请求日志中间件（纯 ASGI 实现）
+
+    - 按 REQUEST_LOG_SAMPLE_RATE 采样记录成功请求，4xx/5xx 始终记录
+    - 请求体只保留前 REQUEST_LOG_BODY_MAX_BYTES 字节，不额外缓存完整请求体
+    - REQUEST_LOG_EXCLUDE_PATHS 中的路由不记录，REQUEST_LOG_BODY_EXCLUDE_PATHS
+      中的路由（登录、密码等）不记录请求体
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or _match_prefix(
+            scope["path"], settings.REQUEST_LOG_EXCLUDE_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        sampled = random.random() < settings.REQUEST_LOG_SAMPLE_RATE
+        max_body = settings.REQUEST_LOG_BODY_MAX_BYTES
+        capture_body = (
+            sampled
+            and max_body > 0
+            and scope["method"] in BODY_METHODS
+            and not _match_prefix(
+                scope["path"], settings.REQUEST_LOG_BODY_EXCLUDE_PATHS
+            )
+        )
+        body = bytearray()
+        body_size = 0
+        status_code = 500
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if len(body) < max_body:
+                    body.extend(chunk[: max_body - len(body)])
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(
+                scope, receive_wrapper if capture_body else receive, send_wrapper
+            )
+        finally:
+            if sampled or status_code >= 400:
+                record: dict[str, Any] = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "client": scope["client"][0] if scope.get("client") else None,
+                }
+                query_stats = current_query_stats()
+                if query_stats is not None:
+                    record["db_queries"] = query_stats.count
+                    record["db_time_ms"] = query_stats.total_time_ms
+                if capture_body:
+                    record["body"] = body.decode("utf-8", errors="replace")
+                    record["body_bytes"] = body_size
+                    record["body_truncated"] = body_size > len(body)
+                logger.log(
+                    logging.WARNING if status_code >= 500 else logging.INFO,
+                    json.dumps(record, ensure_ascii=False),
+                )
+
+
+class QueryStatsMiddleware:
+    """统计每个请求执行的 SQL 语句数量和数据库耗时
+
+    同一请求内相同语句执行次数达到 DB_REPEATED_QUERY_THRESHOLD 时记录警告，
+    DB_QUERY_STATS_HEADERS 开启时通过响应头返回统计结果，测试中可据此断言查询预算。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if (
+                    message["type"] == "http.response.start"
+                    and settings.DB_QUERY_STATS_HEADERS
+                ):
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append(
+                        (b"server-timing", f"db;dur={stats.total_time_ms}".encode())
+                    )
+                    message["headers"] = headers
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                repeated = stats.repeated(settings.DB_REPEATED_QUERY_THRESHOLD)
+                if repeated:
+                    db_logger.warning(
+                        json.dumps(
+                            {
+                                "event": "repeated_queries",
+                                "method": scope["method"],
+                                "path": scope["path"],
+                                "db_queries": stats.count,
+                                "db_time_ms": stats.total_time_ms,
+                                "repeated": [
+                                    {"statement": statement, "count": count}
+                                    for statement, count in repeated
+                                ],
+                            },
+                            ensure_ascii=False,
+                        )
+                    )
+
+
+class MetricsMiddleware:
+    """按路由记录请求耗时、并发请求数与线程池排队情况
+
+    路由标签使用 custom_generate_unique_id 生成的 unique_id，未匹配的请求
+    统一记为 "unmatched"，避免原始路径带来的标签基数膨胀。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+        self._observe_threadpool()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+            metrics.observe_request(
+                self._route_label(scope.get("route")),
+                scope["method"],
+                status_code,
+                time.perf_counter() - start,
+            )
+            self._observe_threadpool()
+
+    @staticmethod
+    def _route_label(route: Any) -> str:
+        if isinstance(route, APIRoute) and route.tags:
+            return custom_generate_unique_id(route)
+        return getattr(route, "name", None) or "unmatched"
+
+    @staticmethod
+    def _observe_threadpool() -> None:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        statistics = limiter.statistics()
+        metrics.THREADPOOL_BORROWED_THREADS.set(statistics.borrowed_tokens)
+        metrics.THREADPOOL_WAITING_TASKS.set(statistics.tasks_waiting)
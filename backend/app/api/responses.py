@@ -0,0 +1,31 @@
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+class ModelResponse(Response):
+    """直接将 Pydantic 模型序列化为 JSON 字节的响应
+
+    FastAPI 对返回值会先 model_dump、再按 response_model 重新校验并经过
+    jsonable_encoder。对大列表接口，路由在构造好响应模型后直接返回本响应，
+    由 pydantic-core 一次性输出字节，跳过上述重复校验与编码。
+    路由上仍保留 response_model 用于生成 OpenAPI 文档。
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: BaseModel,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(content, status_code=status_code, headers=headers, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return to_json(content, by_alias=True)
+        return bytes(super().render(content))
@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import desc, func, select
 
 from app.api.deps import (
-    MongoDep,
-    SessionDep,
+    MongoReadDep,
+    ReadSessionDep,
     get_current_active_admin,
     get_current_active_superuser,
 )
@@ -36,8 +36,8 @@ class DashboardStats:
     response_model=APIResponseWithData[dict[str, Any]],
 )
 async def get_dashboard_stats(
-    db: MongoDep,
-    session: SessionDep,
+    db: MongoReadDep,
+    session: ReadSessionDep,
 ) -> APIResponseWithData[dict[str, Any]]:
     """获取Dashboard统计数据（超级管理员权限）"""
     try:
@@ -173,8 +173,8 @@ async def get_dashboard_stats(
     response_model=APIResponseWithData[dict[str, Any]],
 )
 async def get_user_dashboard_stats(
-    db: MongoDep,
-    session: SessionDep,
+    db: MongoReadDep,
+    session: ReadSessionDep,
     current_user: User = Depends(get_current_active_admin),
 ) -> APIResponseWithData[dict[str, Any]]:
     """获取当前用户的Dashboard统计数据（普通管理员权限）"""
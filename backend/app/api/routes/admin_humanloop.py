@@ -1,21 +1,54 @@
+import asyncio
+import csv
+import io
+import json
+import logging
 import uuid
+from collections.abc import Iterator
 from datetime import datetime
-from typing import Any
-
-from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Literal
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.types import JSON
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Session, SQLModel
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, ReadSessionDep, SessionDep, get_current_user
+from app.api.responses import ModelResponse
+from app.core.db import engine, replica_router
+from app.core.etag import (
+    cached_version,
+    detail_version_key,
+    has_conditional_headers,
+    is_not_modified,
+    store_version,
+    version_headers,
+    version_stamp,
+)
+from app.core.live_events import live_feed_hub
+from app.core.webhooks import notify_status_change
 from app.models.models import (
     APIResponse,
     APIResponseWithData,
     APIResponseWithList,
     HumanLoopRequestPublic,
     HumanLoopRequestUpdate,
+    User,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/admin/humanloop", tags=["admin-humanloop"])
 
 
@@ -58,10 +91,25 @@ class AdminHumanLoopBatchRequest(SQLModel):
     feedback: str | None = Field(default=None, description="批量操作备注")
 
 
+def parse_json_filter(value: str | None, name: str) -> dict[str, Any] | None:
+    """解析 JSON 包含查询参数，必须是 JSON 对象"""
+    if not value:
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON in '{name}' filter")
+    if not isinstance(parsed, dict):
+        raise HTTPException(
+            status_code=400, detail=f"'{name}' filter must be a JSON object"
+        )
+    return parsed
+
+
 @router.get("/requests", response_model=APIResponseWithList[HumanLoopRequestPublic])
 def get_admin_humanloop_requests(
     *,
-    session: SessionDep,
+    session: ReadSessionDep,
     current_user: CurrentUser,
     loop_type: str | None = Query(
         None, description="循环类型过滤: conversation | approval | information"
@@ -77,12 +125,25 @@ def get_admin_humanloop_requests(
     created_at_end: str | None = Query(
         None, description="创建时间结束过滤 (YYYY-MM-DD)"
     ),
+    context: str | None = Query(
+        None, description='上下文包含过滤 (JSON对象)，例如 {"customer_id": "c_1"}'
+    ),
+    metadata: str | None = Query(None, description="元数据包含过滤 (JSON对象)"),
+    response: str | None = Query(None, description="响应数据包含过滤 (JSON对象)"),
+    q: str | None = Query(
+        None,
+        description="关键词检索：问题内容、反馈和响应人，多个词以空格分隔，结果按相关度排序",
+    ),
     skip: int = Query(0, description="跳过记录数"),
     limit: int = Query(100, description="返回记录数"),
 ) -> Any:
     """
     获取管理后台人机循环请求列表
     """
+    context_contains = parse_json_filter(context, "context")
+    metadata_contains = parse_json_filter(metadata, "metadata")
+    response_contains = parse_json_filter(response, "response")
+
     try:
         # 使用CRUD方法获取数据，只获取当前用户的数据
         requests = crud.get_humanloop_requests_with_filters(
@@ -95,6 +156,10 @@ def get_admin_humanloop_requests(
             skip=skip,
             limit=limit,
             owner_id=current_user.id,
+            context_contains=context_contains,
+            metadata_contains=metadata_contains,
+            response_contains=response_contains,
+            q=q,
         )
 
         # 获取总数
@@ -106,28 +171,156 @@ def get_admin_humanloop_requests(
             owner_id=current_user.id,
             created_at_start=created_at_start,
             created_at_end=created_at_end,
+            context_contains=context_contains,
+            metadata_contains=metadata_contains,
+            response_contains=response_contains,
+            q=q,
         )
 
-        return APIResponseWithList(
-            success=True,
-            data=[HumanLoopRequestPublic.model_validate(req) for req in requests],
-            count=total_count,
-            skip=skip,
-            limit=limit,
+        return ModelResponse(
+            APIResponseWithList(
+                success=True,
+                data=[HumanLoopRequestPublic.model_validate(req) for req in requests],
+                count=total_count,
+                skip=skip,
+                limit=limit,
+            )
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+EXPORT_FIELDS = list(HumanLoopRequestPublic.model_fields)
+EXPORT_JSON_FIELDS = {"context", "metadata_", "response"}
+EXPORT_FLUSH_ROWS = 500
+
+
+def _export_json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _export_value(row: dict[str, Any], field: str) -> Any:
+    value = row.get(field)
+    if field in EXPORT_JSON_FIELDS:
+        return json.dumps(value, ensure_ascii=False) if value is not None else ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def _iter_export_ndjson(rows: Iterator[dict[str, Any]]) -> Iterator[str]:
+    buffer: list[str] = []
+    for row in rows:
+        record = {
+            ("metadata" if key == "metadata_" else key): row.get(key)
+            for key in EXPORT_FIELDS
+        }
+        buffer.append(
+            json.dumps(record, ensure_ascii=False, default=_export_json_default)
+        )
+        if len(buffer) >= EXPORT_FLUSH_ROWS:
+            yield "\n".join(buffer) + "\n"
+            buffer.clear()
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+def _iter_export_csv(rows: Iterator[dict[str, Any]]) -> Iterator[str]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(
+        ["metadata" if field == "metadata_" else field for field in EXPORT_FIELDS]
+    )
+    pending = 0
+    for row in rows:
+        writer.writerow([_export_value(row, field) for field in EXPORT_FIELDS])
+        pending += 1
+        if pending >= EXPORT_FLUSH_ROWS:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            pending = 0
+    yield output.getvalue()
+
+
+@router.get("/requests/export", response_class=StreamingResponse)
+def export_admin_humanloop_requests(
+    *,
+    current_user: CurrentUser,
+    export_format: Literal["ndjson", "csv"] = Query(
+        "ndjson", alias="format", description="导出格式"
+    ),
+    loop_type: str | None = Query(
+        None, description="循环类型过滤: conversation | approval | information"
+    ),
+    status: str | None = Query(
+        None,
+        description="状态过滤: pending | approved | rejected | completed | cancelled",
+    ),
+    platform: str | None = Query(None, description="平台过滤: wechat | feishu | other"),
+    created_at_start: str | None = Query(
+        None, description="创建时间开始过滤 (YYYY-MM-DD)"
+    ),
+    created_at_end: str | None = Query(
+        None, description="创建时间结束过滤 (YYYY-MM-DD)"
+    ),
+    context: str | None = Query(None, description="上下文包含过滤 (JSON对象)"),
+    metadata: str | None = Query(None, description="元数据包含过滤 (JSON对象)"),
+    response: str | None = Query(None, description="响应数据包含过滤 (JSON对象)"),
+    q: str | None = Query(None, description="关键词检索：问题内容、反馈和响应人"),
+) -> Any:
+    """
+    流式导出人机循环请求 (NDJSON / CSV)，支持 gzip 压缩传输
+    """
+    filters: dict[str, Any] = {
+        "loop_type": loop_type,
+        "status": status,
+        "platform": platform,
+        "created_at_start": created_at_start,
+        "created_at_end": created_at_end,
+        "owner_id": current_user.id,
+        "context_contains": parse_json_filter(context, "context"),
+        "metadata_contains": parse_json_filter(metadata, "metadata"),
+        "response_contains": parse_json_filter(response, "response"),
+        "q": q,
+    }
+
+    def iter_content() -> Iterator[str]:
+        # 流式响应在依赖清理之后才开始发送，这里使用独立的只读会话
+        with Session(replica_router.read_engine()) as session:
+            rows = crud.iter_humanloop_requests_with_filters(session=session, **filters)
+            if export_format == "csv":
+                yield from _iter_export_csv(rows)
+            else:
+                yield from _iter_export_ndjson(rows)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"humanloop_requests_{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    return StreamingResponse(
+        iter_content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get(
     "/requests/{request_id}", response_model=APIResponseWithData[HumanLoopRequestPublic]
 )
 def get_admin_humanloop_request(
-    *, session: SessionDep, current_user: CurrentUser, request_id: str
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    request: Request,
+    response: Response,
+    request_id: str,
 ) -> Any:
     """
     获取单个人机循环请求详情
+
+    支持 If-None-Match / If-Modified-Since，请求未变化时返回 304
     """
     try:
         # 通过UUID查找请求
@@ -136,6 +329,14 @@ def get_admin_humanloop_request(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid request ID format")
 
+        version_key = detail_version_key(
+            owner_id=current_user.id, request_id=request_uuid
+        )
+        conditional = has_conditional_headers(request)
+        cached_stamp = cached_version(version_key) if conditional else None
+        if cached_stamp and is_not_modified(request, cached_stamp):
+            return Response(status_code=304, headers=version_headers(cached_stamp))
+
         humanloop_request = crud.get_humanloop_request_by_id(
             session=session, request_id=request_uuid, owner_id=current_user.id
         )
@@ -143,6 +344,14 @@ def get_admin_humanloop_request(
         if not humanloop_request:
             raise HTTPException(status_code=404, detail="Request not found")
 
+        stamp = version_stamp(humanloop_request)
+        if conditional and stamp != cached_stamp:
+            # 版本戳已过期或写入失败，补写后下次条件请求即可命中
+            store_version(humanloop_request)
+        if is_not_modified(request, stamp):
+            return Response(status_code=304, headers=version_headers(stamp))
+        response.headers.update(version_headers(stamp))
+
         return APIResponseWithData(
             success=True, data=HumanLoopRequestPublic.model_validate(humanloop_request)
         )
@@ -209,6 +418,7 @@ def handle_approval_request(
         crud.update_humanloop_request(
             session=session, db_request=humanloop_request, request_in=update_data
         )
+        notify_status_change(session=session, humanloop_request=humanloop_request)
 
         return APIResponse(success=True)
 
@@ -266,6 +476,7 @@ def handle_information_request(
         crud.update_humanloop_request(
             session=session, db_request=humanloop_request, request_in=update_data
         )
+        notify_status_change(session=session, humanloop_request=humanloop_request)
 
         return APIResponse(success=True)
 
@@ -326,6 +537,7 @@ def handle_conversation_request(
         crud.update_humanloop_request(
             session=session, db_request=humanloop_request, request_in=update_data
         )
+        notify_status_change(session=session, humanloop_request=humanloop_request)
 
         return APIResponse(success=True)
 
@@ -394,6 +606,9 @@ def handle_batch_requests(
                     db_request=humanloop_request,
                     request_in=update_data,
                 )
+                notify_status_change(
+                    session=session, humanloop_request=humanloop_request
+                )
 
                 processed_count += 1
 
@@ -466,6 +681,7 @@ def update_request_status(
         crud.update_humanloop_request(
             session=session, db_request=humanloop_request, request_in=update_data
         )
+        notify_status_change(session=session, humanloop_request=humanloop_request)
 
         return APIResponse(success=True)
 
@@ -473,8 +689,90 @@ def update_request_status(
         return APIResponse(success=False, error=str(e))
 
 
+# 连接后等待客户端发送认证消息的时间
+LIVE_FEED_AUTH_TIMEOUT_SECONDS = 10
+
+
+async def _receive_token(websocket: WebSocket) -> str | None:
+    """读取连接后的第一条消息 {"type": "auth", "token": ...}，格式不对或超时返回 None"""
+    try:
+        message = await asyncio.wait_for(
+            websocket.receive_json(), LIVE_FEED_AUTH_TIMEOUT_SECONDS
+        )
+    except (asyncio.TimeoutError, ValueError):
+        return None
+    if not isinstance(message, dict) or message.get("type") != "auth":
+        return None
+    token = message.get("token")
+    return token if isinstance(token, str) else None
+
+
+@router.websocket("/ws")
+async def admin_humanloop_live_feed(websocket: WebSocket) -> None:
+    """
+    实时推送当前用户的人机循环请求变更
+
+    连接后客户端先发送 {"type": "auth", "token": "<access token>"} 完成认证，
+    token 不放在 URL 中，避免出现在访问日志和代理日志里。
+    认证通过后先发送 {"type": "snapshot", "stats": ...}，之后每次请求新建、更新或取消时
+    发送 {"type": "created" | "updated" | "cancelled", "request": ..., "stats_delta": ...}，
+    stats_delta 与 stats 结构相同，直接累加即可；客户端发送 "ping" 时回复 "pong"。
+    """
+
+    def load_user_and_stats(token: str) -> tuple[User, dict[str, Any]]:
+        with Session(engine) as session:
+            user = get_current_user(session, token)
+            stats = crud.get_humanloop_stats(session=session, owner_id=user.id)
+            return user, stats
+
+    await websocket.accept()
+    try:
+        token = await _receive_token(websocket)
+    except WebSocketDisconnect:
+        return
+    if token is None:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Authentication required"
+        )
+        return
+    try:
+        user, stats = await run_in_threadpool(load_user_and_stats, token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    # 先订阅再发送快照，避免漏掉两者之间的事件
+    queue = live_feed_hub.subscribe(user.id)
+    try:
+        await websocket.send_json({"type": "snapshot", "stats": stats})
+
+        async def forward_events() -> None:
+            while (message := await queue.get()) is not None:
+                await websocket.send_text(message)
+            # 客户端跟不上推送速度，断开后由客户端重新连接并获取快照
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+        async def receive_pings() -> None:
+            while True:
+                if await websocket.receive_text() == "ping":
+                    await websocket.send_text("pong")
+
+        tasks = [
+            asyncio.create_task(forward_events()),
+            asyncio.create_task(receive_pings()),
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect | None):
+                logger.warning(f"Live feed connection closed: {task.exception()}")
+    finally:
+        live_feed_hub.unsubscribe(user.id, queue)
+
+
 @router.get("/stats", response_model=APIResponseWithData[dict[str, Any]])
-def get_humanloop_stats(*, session: SessionDep, current_user: CurrentUser) -> Any:
+def get_humanloop_stats(*, session: ReadSessionDep, current_user: CurrentUser) -> Any:
     """
     获取人机循环统计信息
     """
@@ -1,6 +1,16 @@
+import importlib.util
+import io
+import json
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any, Literal
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pymongo import ASCENDING
 
-from app.api.deps import MongoDep, get_current_active_superuser
+from app.api.deps import MongoReadDep, get_current_active_superuser
+from app.api.responses import ModelResponse
 from app.models.models import (
     APIResponseWithList,
 )
@@ -8,6 +18,35 @@ from app.models.mongodb_models import TaskModel
 
 router = APIRouter(prefix="/humanloop/admin/tasks", tags=["amdin_tasks"])
 
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FLUSH_ROWS = 5000
+
+# 展开导出时每行的字段（一个请求一行）
+FLAT_REQUEST_FIELDS = [
+    "request_id",
+    "status",
+    "loop_type",
+    "response",
+    "feedback",
+    "responded_by",
+    "responded_at",
+    "error",
+]
+FLAT_TASK_FIELDS = [
+    "task_id",
+    "user_id",
+    "timestamp",
+    "created_at",
+    "updated_at",
+    "source",
+    "client_ip",
+    "user_agent",
+    "conversation_id",
+    "provider_id",
+    *FLAT_REQUEST_FIELDS,
+]
+FLAT_TASK_DATETIME_FIELDS = {"timestamp", "created_at", "updated_at", "responded_at"}
+
 
 @router.get(
     "/",
@@ -15,12 +54,12 @@ router = APIRouter(prefix="/humanloop/admin/tasks", tags=["amdin_tasks"])
     response_model=APIResponseWithList[TaskModel],
 )
 async def get_tasks(
-    db: MongoDep,
+    db: MongoReadDep,
     user_id: str | None = None,
     task_id: str | None = None,
     limit: int = Query(default=100, ge=1, le=1000),
     skip: int = Query(default=0, ge=0),
-) -> APIResponseWithList[TaskModel]:
+) -> Any:
     """获取任务列表，支持过滤和分页（管理员权限）"""
     try:
         # 构建查询条件
@@ -39,8 +78,198 @@ async def get_tasks(
             doc["_id"] = str(doc["_id"])
             tasks.append(doc)
 
-        return APIResponseWithList(
-            success=True, data=tasks, count=len(tasks), skip=skip, limit=limit
+        return ModelResponse(
+            APIResponseWithList(
+                success=True, data=tasks, count=len(tasks), skip=skip, limit=limit
+            )
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
+
+
+def _parse_date(value: str | None, name: str) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid date format for '{name}' (YYYY-MM-DD)"
+        )
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def flatten_task(task: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """将任务文档展开为每个请求一行的记录"""
+    metadata = task.get("metadata") or {}
+    base = {
+        "task_id": task.get("task_id"),
+        "user_id": task.get("user_id"),
+        "timestamp": task.get("timestamp"),
+        "created_at": task.get("created_at"),
+        "updated_at": task.get("updated_at"),
+        "source": metadata.get("source"),
+        "client_ip": metadata.get("client_ip"),
+        "user_agent": metadata.get("user_agent"),
+    }
+    for conv in task.get("conversations") or []:
+        for req in conv.get("requests") or []:
+            row = dict(base)
+            row["conversation_id"] = conv.get("conversation_id")
+            row["provider_id"] = conv.get("provider_id")
+            for field in FLAT_REQUEST_FIELDS:
+                value = req.get(field)
+                # response/feedback 可能是对象，统一转为 JSON 字符串保证列类型一致
+                if isinstance(value, dict | list):
+                    value = json.dumps(value, ensure_ascii=False, default=_json_default)
+                row[field] = value
+            yield row
+
+
+def _iter_ndjson(records: Iterable[dict[str, Any]]) -> Iterator[str]:
+    buffer: list[str] = []
+    for record in records:
+        buffer.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+        if len(buffer) >= EXPORT_FLUSH_ROWS:
+            yield "\n".join(buffer) + "\n"
+            buffer.clear()
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """收集 ParquetWriter 写出的字节，按行组分块取出"""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_parquet(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+
+    schema = pa.schema(
+        [
+            (
+                field,
+                pa.timestamp("us")
+                if field in FLAT_TASK_DATETIME_FIELDS
+                else pa.string(),
+            )
+            for field in FLAT_TASK_FIELDS
+        ]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    rows: list[dict[str, Any]] = []
+    for record in records:
+        rows.append(record)
+        if len(rows) >= EXPORT_FLUSH_ROWS:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            rows.clear()
+            yield sink.drain()
+    if rows:
+        writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    writer.close()
+    yield sink.drain()
+
+
+@router.get(
+    "/export",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_class=StreamingResponse,
+)
+async def export_tasks(
+    db: MongoReadDep,
+    export_format: Literal["ndjson", "parquet"] = Query(
+        "ndjson", alias="format", description="导出格式"
+    ),
+    flatten: bool = Query(
+        False, description="是否展开为每个请求一行（parquet 格式必须展开）"
+    ),
+    user_id: str | None = None,
+    created_at_start: str | None = Query(
+        None, description="创建时间开始过滤 (YYYY-MM-DD)"
+    ),
+    created_at_end: str | None = Query(
+        None, description="创建时间结束过滤 (YYYY-MM-DD)"
+    ),
+) -> Any:
+    """流式导出任务数据（管理员权限），分批读取游标，内存占用恒定"""
+    if export_format == "parquet":
+        if not flatten:
+            raise HTTPException(
+                status_code=400, detail="Parquet export requires flatten=true"
+            )
+        if importlib.util.find_spec("pyarrow") is None:
+            raise HTTPException(
+                status_code=501, detail="Parquet export requires pyarrow"
+            )
+
+    query: dict[str, Any] = {}
+    if user_id:
+        query["user_id"] = user_id
+    start_date = _parse_date(created_at_start, "created_at_start")
+    end_date = _parse_date(created_at_end, "created_at_end")
+    if start_date or end_date:
+        query["created_at"] = {}
+        if start_date:
+            query["created_at"]["$gte"] = start_date
+        if end_date:
+            query["created_at"]["$lte"] = end_date.replace(
+                hour=23, minute=59, second=59
+            )
+
+    def iter_tasks() -> Iterator[dict[str, Any]]:
+        # 按 _id 排序可直接走主键索引，避免大结果集在内存中排序
+        cursor = db.tasks.find(query, batch_size=EXPORT_BATCH_SIZE).sort(
+            "_id", ASCENDING
+        )
+        try:
+            for doc in cursor:
+                doc["_id"] = str(doc["_id"])
+                if flatten:
+                    yield from flatten_task(doc)
+                else:
+                    yield doc
+        finally:
+            cursor.close()
+
+    filename = f"tasks_{datetime.utcnow():%Y%m%d%H%M%S}"
+    if export_format == "parquet":
+        return StreamingResponse(
+            _iter_parquet(iter_tasks()),
+            media_type="application/vnd.apache.parquet",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.parquet"'
+            },
+        )
+    return StreamingResponse(
+        _iter_ndjson(iter_tasks()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson"'},
+    )
@@ -88,6 +88,15 @@ def update_api_key(
                 success=False, error="无权限操作此API Key", data=None
             )
 
+        # 限流配置只允许超级管理员修改
+        rate_limit_fields = {"rate_limit_per_minute", "rate_limit_burst"}
+        if not current_user.is_superuser and rate_limit_fields & set(
+            api_key_in.model_fields_set
+        ):
+            return APIResponseWithData(
+                success=False, error="仅超级管理员可以修改限流配置", data=None
+            )
+
         # 更新API Key
         updated_api_key = crud.update_api_key(
             session=session, db_api_key=api_key, api_key_in=api_key_in
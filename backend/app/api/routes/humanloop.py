@@ -1,32 +1,74 @@
 from typing import Any
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
 
 from app import crud
-from app.api.deps import CurrentUserByAPIKey, SessionDep
+from app.api.deps import (
+    CurrentAPIKey,
+    CurrentUserByAPIKey,
+    IdempotencyKeyHeader,
+    SessionDep,
+)
+from app.core.etag import is_not_modified, version_headers, version_stamp
+from app.core.idempotency import run_idempotent
+from app.core.status_cache import cache_request, cached_status, status_key
 from app.models.models import (
+    APIKey,
     APIResponse,
+    APIResponseWithData,
+    HumanLoopBulkCreateItem,
+    HumanLoopBulkCreateRequest,
+    HumanLoopBulkCreateResult,
     HumanLoopCancelConversationRequest,
     HumanLoopCancelRequest,
     HumanLoopContinueRequest,
     HumanLoopRequestCreate,
     HumanLoopRequestUpdate,
     HumanLoopStatusResponse,
+    User,
 )
 
 router = APIRouter(prefix="/humanloop", tags=["humanloop"])
 
 
 @router.post("/request", response_model=APIResponse)
-def create_humanloop_request(
+async def create_humanloop_request(
     *,
     session: SessionDep,
     current_user: CurrentUserByAPIKey,
+    api_key: CurrentAPIKey,
     request_in: HumanLoopRequestCreate,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> Any:
     """
     创建人机循环请求
+
+    携带 Idempotency-Key 时，相同键的重试直接返回第一次的结果
     """
+    return await run_idempotent(
+        lambda: run_in_threadpool(
+            _create_humanloop_request,
+            session=session,
+            current_user=current_user,
+            api_key=api_key,
+            request_in=request_in,
+        ),
+        key=idempotency_key,
+        scope="humanloop.request",
+        owner_id=current_user.id,
+        payload=request_in,
+    )
+
+
+def _create_humanloop_request(
+    *,
+    session: Session,
+    current_user: User,
+    api_key: APIKey,
+    request_in: HumanLoopRequestCreate,
+) -> APIResponse:
     try:
         # 检查是否已存在相同的请求
         existing_request = crud.get_humanloop_request(
@@ -42,7 +84,10 @@ def create_humanloop_request(
 
         # 创建新的人机循环请求
         crud.create_humanloop_request(
-            session=session, request_in=request_in, owner_id=current_user.id
+            session=session,
+            request_in=request_in,
+            owner_id=current_user.id,
+            api_key_id=api_key.id,
         )
 
         return APIResponse(success=True)
@@ -51,19 +96,125 @@ def create_humanloop_request(
         return APIResponse(success=False, error=str(e))
 
 
+@router.post(
+    "/request/bulk", response_model=APIResponseWithData[HumanLoopBulkCreateResult]
+)
+async def create_humanloop_requests_bulk(
+    *,
+    session: SessionDep,
+    current_user: CurrentUserByAPIKey,
+    api_key: CurrentAPIKey,
+    bulk_in: HumanLoopBulkCreateRequest,
+    idempotency_key: IdempotencyKeyHeader = None,
+) -> Any:
+    """
+    批量创建人机循环请求
+
+    已存在的请求不做修改，在逐项结果中标记为 exists；
+    携带 Idempotency-Key 时，相同键的重试直接返回第一次的结果
+    """
+    return await run_idempotent(
+        lambda: run_in_threadpool(
+            _create_humanloop_requests_bulk,
+            session=session,
+            current_user=current_user,
+            api_key=api_key,
+            bulk_in=bulk_in,
+        ),
+        key=idempotency_key,
+        scope="humanloop.request.bulk",
+        owner_id=current_user.id,
+        payload=bulk_in,
+    )
+
+
+def _create_humanloop_requests_bulk(
+    *,
+    session: Session,
+    current_user: User,
+    api_key: APIKey,
+    bulk_in: HumanLoopBulkCreateRequest,
+) -> APIResponseWithData[HumanLoopBulkCreateResult] | APIResponseWithData[Any]:
+    try:
+        created = crud.bulk_create_humanloop_requests(
+            session=session,
+            requests_in=bulk_in.requests,
+            owner_id=current_user.id,
+            api_key_id=api_key.id,
+        )
+        created_ids = {
+            (request.platform, request.conversation_id, request.request_id): request.id
+            for request in created
+        }
+
+        items = []
+        for request_in in bulk_in.requests:
+            # 同一批次中重复的请求只有第一条会被创建
+            request_uuid = created_ids.pop(
+                (
+                    request_in.platform,
+                    request_in.conversation_id,
+                    request_in.request_id,
+                ),
+                None,
+            )
+            items.append(
+                HumanLoopBulkCreateItem(
+                    conversation_id=request_in.conversation_id,
+                    request_id=request_in.request_id,
+                    platform=request_in.platform,
+                    status="created" if request_uuid else "exists",
+                    id=request_uuid,
+                )
+            )
+
+        return APIResponseWithData(
+            success=True,
+            data=HumanLoopBulkCreateResult(
+                created=len(created),
+                existing=len(items) - len(created),
+                items=items,
+            ),
+        )
+
+    except Exception as e:
+        return APIResponseWithData[Any](success=False, error=str(e), data=None)
+
+
 @router.get("/status", response_model=HumanLoopStatusResponse)
 def get_humanloop_status(
     *,
     session: SessionDep,
     current_user: CurrentUserByAPIKey,
+    request: Request,
+    response: Response,
     conversation_id: str = Query(..., description="对话ID"),
     request_id: str = Query(..., description="请求ID"),
     platform: str = Query(..., description="平台"),
 ) -> Any:
     """
     查询请求状态
+
+    优先读取 Redis 中的状态记录，未命中时查询数据库并回填；
+    支持 If-None-Match / If-Modified-Since，状态未变化时返回 304
     """
     try:
+        # 先读 Redis 中的状态记录，命中时不查询数据库
+        cached = cached_status(
+            status_key(
+                owner_id=current_user.id,
+                platform=platform,
+                conversation_id=conversation_id,
+                request_id=request_id,
+            )
+        )
+        if cached:
+            stamp, status_response = cached
+            if is_not_modified(request, stamp):
+                return Response(status_code=304, headers=version_headers(stamp))
+            response.headers.update(version_headers(stamp))
+            return status_response
+
         # 查找请求
         humanloop_request = crud.get_humanloop_request(
             session=session,
@@ -76,6 +227,13 @@ def get_humanloop_status(
         if not humanloop_request:
             raise HTTPException(status_code=404, detail="Request not found")
 
+        # 记录已过期或写入失败，补写后后续轮询即可命中
+        cache_request(humanloop_request)
+        stamp = version_stamp(humanloop_request)
+        if is_not_modified(request, stamp):
+            return Response(status_code=304, headers=version_headers(stamp))
+        response.headers.update(version_headers(stamp))
+
         return HumanLoopStatusResponse(
             success=True,
             status=humanloop_request.status,
@@ -168,15 +326,38 @@ def cancel_humanloop_conversation(
 
 
 @router.post("/continue", response_model=APIResponse)
-def continue_humanloop_request(
+async def continue_humanloop_request(
     *,
     session: SessionDep,
     current_user: CurrentUserByAPIKey,
     continue_request: HumanLoopContinueRequest,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> Any:
     """
     继续对话请求
+
+    携带 Idempotency-Key 时，相同键的重试直接返回第一次的结果
     """
+    return await run_idempotent(
+        lambda: run_in_threadpool(
+            _continue_humanloop_request,
+            session=session,
+            current_user=current_user,
+            continue_request=continue_request,
+        ),
+        key=idempotency_key,
+        scope="humanloop.continue",
+        owner_id=current_user.id,
+        payload=continue_request,
+    )
+
+
+def _continue_humanloop_request(
+    *,
+    session: Session,
+    current_user: User,
+    continue_request: HumanLoopContinueRequest,
+) -> APIResponse:
     try:
         # 查找现有请求
         existing_request = crud.get_humanloop_request(
@@ -2,6 +2,7 @@ from datetime import timedelta
 from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
@@ -9,7 +10,8 @@ from app import crud
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.email_queue import dispatch_email
+from app.core.password_pool import get_password_hash_async, verify_password_async
 from app.models.models import (
     APIResponseWithData,
     Message,
@@ -20,7 +22,6 @@ from app.models.models import (
 from app.utils import (
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
     verify_password_reset_token,
 )
 
@@ -28,18 +29,20 @@ router = APIRouter(tags=["login"])
 
 
 @router.post("/login/access-token", response_model=APIResponseWithData[Token])
-def login_access_token(
+async def login_access_token(
     session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
     try:
-        print(form_data)
-        user = crud.authenticate(
-            session=session, email=form_data.username, password=form_data.password
+        # 查询在线程池中执行，bcrypt 校验在密码进程池中执行
+        user = await run_in_threadpool(
+            crud.get_user_by_email, session=session, email=form_data.username
         )
-        if not user:
+        if not user or not await verify_password_async(
+            form_data.password, user.hashed_password
+        ):
             return APIResponseWithData(
                 success=False, error="Incorrect email or password", data=None
             )
@@ -88,10 +91,12 @@ def recover_password(email: str, session: SessionDep) -> Any:
         email_data = generate_reset_password_email(
             email_to=user.email, email=email, token=password_reset_token
         )
-        send_email(
+        # 邮件中包含重置令牌，不进入 Redis 队列
+        dispatch_email(
             email_to=user.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
+            contains_secret=True,
         )
         return APIResponseWithData(
             success=True, data=Message(message="Password recovery email sent")
@@ -101,7 +106,7 @@ def recover_password(email: str, session: SessionDep) -> Any:
 
 
 @router.post("/reset-password/", response_model=APIResponseWithData[Message])
-def reset_password(session: SessionDep, body: NewPassword) -> Any:
+async def reset_password(session: SessionDep, body: NewPassword) -> Any:
     """
     Reset password
     """
@@ -109,7 +114,9 @@ def reset_password(session: SessionDep, body: NewPassword) -> Any:
         email = verify_password_reset_token(token=body.token)
         if not email:
             return APIResponseWithData(success=False, error="Invalid token", data=None)
-        user = crud.get_user_by_email(session=session, email=email)
+        user = await run_in_threadpool(
+            crud.get_user_by_email, session=session, email=email
+        )
         if not user:
             return APIResponseWithData(
                 success=False,
@@ -119,10 +126,13 @@ def reset_password(session: SessionDep, body: NewPassword) -> Any:
         elif not user.is_active:
             return APIResponseWithData(success=False, error="Inactive user", data=None)
 
-        hashed_password = get_password_hash(password=body.new_password)
-        user.hashed_password = hashed_password
-        session.add(user)
-        session.commit()
+        hashed_password = await get_password_hash_async(body.new_password)
+        await run_in_threadpool(
+            crud.update_user_password,
+            session=session,
+            db_user=user,
+            hashed_password=hashed_password,
+        )
 
         return APIResponseWithData(
             success=True, data=Message(message="Password updated successfully")
@@ -1,10 +1,11 @@
 from typing import Any
 
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from app.api.deps import SessionDep
-from app.core.security import get_password_hash
+from app.core.password_pool import get_password_hash_async
 from app.models.models import APIResponseWithData, User, UserPublic
 
 router = APIRouter(tags=["private"], prefix="/private")
@@ -18,7 +19,7 @@ class PrivateUserCreate(BaseModel):
 
 
 @router.post("/users/", response_model=APIResponseWithData[UserPublic])
-def create_user(user_in: PrivateUserCreate, session: SessionDep) -> Any:
+async def create_user(user_in: PrivateUserCreate, session: SessionDep) -> Any:
     """
     Create a new user.
     """
@@ -26,10 +27,13 @@ def create_user(user_in: PrivateUserCreate, session: SessionDep) -> Any:
     user = User(
         email=user_in.email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
     )
 
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-    return APIResponseWithData(data=user)
+    def save() -> User:
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        return user
+
+    return APIResponseWithData(data=await run_in_threadpool(save))
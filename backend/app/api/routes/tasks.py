@@ -2,9 +2,17 @@ from datetime import datetime
 from typing import Any
 
 from fastapi import APIRouter, Query
+from pymongo.database import Database
 
-from app.api.deps import CurrentUser, CurrentUserByAPIKey, MongoDep
-from app.models.models import APIResponseWithData, APIResponseWithList
+from app.api.deps import (
+    CurrentUser,
+    CurrentUserByAPIKey,
+    IdempotencyKeyHeader,
+    MongoDep,
+)
+from app.api.responses import ModelResponse
+from app.core.idempotency import run_idempotent
+from app.models.models import APIResponseWithData, APIResponseWithList, User
 from app.models.mongodb_models import TaskModel, TaskUpdateModel
 
 router = APIRouter(prefix="/humanloop/tasks", tags=["tasks"])
@@ -14,9 +22,28 @@ router = APIRouter(prefix="/humanloop/tasks", tags=["tasks"])
     "/sync", response_model=APIResponseWithData[TaskUpdateModel], status_code=201
 )
 async def sync_task_data(
-    task: TaskModel, db: MongoDep, current_user: CurrentUserByAPIKey
+    task: TaskModel,
+    db: MongoDep,
+    current_user: CurrentUserByAPIKey,
+    idempotency_key: IdempotencyKeyHeader = None,
+) -> Any:
+    """接收从客户端同步的任务数据，创建新任务或全量更新已存在的任务
+
+    携带 Idempotency-Key 时，相同键的重试直接返回第一次的结果
+    """
+    return await run_idempotent(
+        lambda: _sync_task_data(task=task, db=db, current_user=current_user),
+        key=idempotency_key,
+        scope="tasks.sync",
+        owner_id=current_user.id,
+        payload=task,
+        status_code=201,
+    )
+
+
+async def _sync_task_data(
+    *, task: TaskModel, db: Database[dict[str, Any]], current_user: User
 ) -> APIResponseWithData[TaskUpdateModel] | APIResponseWithData[Any]:
-    """接收从客户端同步的任务数据，创建新任务或全量更新已存在的任务"""
     try:
         # 转换为字典并准备插入数据库
         task_dict = task.model_dump()
@@ -81,7 +108,7 @@ async def get_my_tasks(
     task_id: str | None = None,
     limit: int = Query(default=100, ge=1, le=1000),
     skip: int = Query(default=0, ge=0),
-) -> APIResponseWithList[TaskModel]:
+) -> Any:
     """获取当前用户的任务列表"""
     try:
         # 构建查询条件 - 只查询当前用户的任务
@@ -98,17 +125,21 @@ async def get_my_tasks(
             doc["_id"] = str(doc["_id"])
             tasks.append(doc)
 
-        return APIResponseWithList(
-            success=True, data=tasks, count=len(tasks), skip=skip, limit=limit
+        return ModelResponse(
+            APIResponseWithList(
+                success=True, data=tasks, count=len(tasks), skip=skip, limit=limit
+            )
         )
     except Exception as e:
-        return APIResponseWithList(
-            success=False,
-            error=f"获取用户任务列表失败: {str(e)}",
-            data=[],
-            count=0,
-            skip=skip,
-            limit=limit,
+        return ModelResponse(
+            APIResponseWithList(
+                success=False,
+                error=f"获取用户任务列表失败: {str(e)}",
+                data=[],
+                count=0,
+                skip=skip,
+                limit=limit,
+            )
         )
 
 
@@ -2,6 +2,7 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import func, select
 
 from app import crud
@@ -11,8 +12,10 @@ from app.api.deps import (
     get_current_active_superuser,
 )
 from app.core.config import settings
+from app.core.email_queue import dispatch_email_async
+from app.core.password_pool import get_password_hash_async, verify_password_async
 from app.core.redis import generate_verification_code, redis_client
-from app.core.security import get_password_hash, verify_password
+from app.core.user_cache import invalidate_user
 from app.models.models import (
     APIResponseWithData,
     APIResponseWithList,
@@ -31,7 +34,6 @@ from app.models.models import (
 from app.utils import (
     generate_new_account_email,
     generate_verification_code_email,
-    send_email,
 )
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -63,26 +65,36 @@ def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
     dependencies=[Depends(get_current_active_superuser)],
     response_model=APIResponseWithData[UserPublic],
 )
-def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
+async def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     """
     Create new UserUpdate.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=user_in.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
 
-    user = crud.create_user(session=session, user_create=user_in)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_in_threadpool(
+        crud.create_user,
+        session=session,
+        user_create=user_in,
+        hashed_password=hashed_password,
+    )
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        # 邮件中包含明文密码，不进入 Redis 队列
+        await dispatch_email_async(
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
+            contains_secret=True,
         )
     return APIResponseWithData(data=user)
 
@@ -106,26 +118,32 @@ def update_user_me(
     session.add(current_user)
     session.commit()
     session.refresh(current_user)
+    invalidate_user(current_user.id)
     return APIResponseWithData(data=current_user)
 
 
 @router.patch("/me/password", response_model=APIResponseWithData[Message])
-def update_password_me(
+async def update_password_me(
     *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await verify_password_async(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
-    current_user.hashed_password = hashed_password
-    session.add(current_user)
-    session.commit()
+    hashed_password = await get_password_hash_async(body.new_password)
+    await run_in_threadpool(
+        crud.update_user_password,
+        session=session,
+        db_user=current_user,
+        hashed_password=hashed_password,
+    )
     return APIResponseWithData(data=Message(message="Password updated successfully"))
 
 
@@ -146,20 +164,24 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
+    user_id = current_user.id
     session.delete(current_user)
     session.commit()
+    invalidate_user(user_id)
     return APIResponseWithData(data=Message(message="User deleted successfully"))
 
 
 @router.post("/send-verification-code", response_model=APIResponseWithData[Message])
-def send_verification_code(
+async def send_verification_code(
     session: SessionDep, request: EmailVerificationRequest
 ) -> Any:
     """
     Send email verification code.
     """
     # 检查邮箱是否已存在
-    user = crud.get_user_by_email(session=session, email=request.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=request.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
@@ -167,7 +189,7 @@ def send_verification_code(
         )
 
     # 检查发送频率限制
-    if not redis_client.check_rate_limit(request.email):
+    if not await redis_client.check_rate_limit(request.email):
         raise HTTPException(
             status_code=429,
             detail="请等待1分钟后再次发送验证码",
@@ -177,7 +199,7 @@ def send_verification_code(
     verification_code = generate_verification_code()
 
     # 存储验证码到Redis
-    if not redis_client.set_verification_code(request.email, verification_code):
+    if not await redis_client.set_verification_code(request.email, verification_code):
         raise HTTPException(
             status_code=500,
             detail="验证码存储失败，请稍后重试",
@@ -188,21 +210,23 @@ def send_verification_code(
         email_data = generate_verification_code_email(
             email_to=request.email, verification_code=verification_code
         )
-        send_email(
+        # 邮件中包含验证码，不进入 Redis 队列
+        await dispatch_email_async(
             email_to=request.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
+            contains_secret=True,
         )
 
     return APIResponseWithData(data=Message(message="验证码已发送到您的邮箱"))
 
 
 @router.post("/verify-code", response_model=APIResponseWithData[Message])
-def verify_email_code(request: EmailVerificationCode) -> Any:
+async def verify_email_code(request: EmailVerificationCode) -> Any:
     """
     Verify email verification code.
     """
-    stored_code = redis_client.get_verification_code(request.email)
+    stored_code = await redis_client.get_verification_code(request.email)
     if not stored_code:
         raise HTTPException(
             status_code=400,
@@ -219,28 +243,40 @@ def verify_email_code(request: EmailVerificationCode) -> Any:
 
 
 @router.post("/signup", response_model=APIResponseWithData[UserPublic])
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+async def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=user_in.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system",
         )
     user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
+    hashed_password = await get_password_hash_async(user_create.password)
+    user = await run_in_threadpool(
+        crud.create_user,
+        session=session,
+        user_create=user_create,
+        hashed_password=hashed_password,
+    )
     return APIResponseWithData(data=user)
 
 
 @router.post("/signup-with-code", response_model=APIResponseWithData[UserPublic])
-def register_user_with_code(session: SessionDep, user_in: UserRegisterWithCode) -> Any:
+async def register_user_with_code(
+    session: SessionDep, user_in: UserRegisterWithCode
+) -> Any:
     """
     Create new user with email verification code.
     """
     # 检查邮箱是否已存在
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=user_in.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
@@ -248,7 +284,7 @@ def register_user_with_code(session: SessionDep, user_in: UserRegisterWithCode)
         )
 
     # 验证验证码
-    stored_code = redis_client.get_verification_code(user_in.email)
+    stored_code = await redis_client.get_verification_code(user_in.email)
     if not stored_code:
         raise HTTPException(
             status_code=400,
@@ -265,10 +301,16 @@ def register_user_with_code(session: SessionDep, user_in: UserRegisterWithCode)
     user_create = UserCreate(
         email=user_in.email, password=user_in.password, full_name=user_in.full_name
     )
-    user = crud.create_user(session=session, user_create=user_create)
+    hashed_password = await get_password_hash_async(user_create.password)
+    user = await run_in_threadpool(
+        crud.create_user,
+        session=session,
+        user_create=user_create,
+        hashed_password=hashed_password,
+    )
 
     # 删除已使用的验证码
-    redis_client.delete_verification_code(user_in.email)
+    await redis_client.delete_verification_code(user_in.email)
 
     return APIResponseWithData(data=user)
 
@@ -340,4 +382,5 @@ def delete_user(
 
     session.delete(user)
     session.commit()
+    invalidate_user(user_id)
     return APIResponseWithData(data=Message(message="User deleted successfully"))
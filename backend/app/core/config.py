@@ -6,6 +6,7 @@ from pydantic import (
     AnyUrl,
     BeforeValidator,
     EmailStr,
+    Field,
     HttpUrl,
     PostgresDsn,
     computed_field,
@@ -35,6 +36,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # get_current_user 的进程内用户缓存时长，0 表示关闭
+    USER_CACHE_TTL_SECONDS: int = 30
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -51,11 +54,62 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+
+    # Prometheus 指标，多 worker 部署需设置环境变量 PROMETHEUS_MULTIPROC_DIR
+    METRICS_ENABLED: bool = True
+    # /metrics 抓取令牌，请求需携带 Authorization: Bearer <token>；
+    # 未设置时仅 local 环境开放
+    METRICS_TOKEN: str | None = None
+
+    # OpenTelemetry 链路追踪，设置 OTLP (HTTP) 地址后启用，如 http://otel-collector:4318
+    OTEL_EXPORTER_OTLP_ENDPOINT: str | None = None
+    OTEL_SERVICE_NAME: str = "gohumanloophub-backend"
+    # 根 span 的采样率 (0.0 - 1.0)，子 span 跟随父 span 的采样结果
+    OTEL_TRACES_SAMPLER_RATIO: float = Field(default=1.0, ge=0.0, le=1.0)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def tracing_enabled(self) -> bool:
+        return bool(self.OTEL_EXPORTER_OTLP_ENDPOINT)
+
+    # Logging settings
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    # 成功请求的日志采样率 (0.0 - 1.0)，4xx/5xx 请求始终记录
+    REQUEST_LOG_SAMPLE_RATE: float = Field(default=1.0, ge=0.0, le=1.0)
+    # 请求体日志的最大字节数，0 表示不记录请求体
+    REQUEST_LOG_BODY_MAX_BYTES: int = 2048
+    # 不记录日志的路由前缀
+    REQUEST_LOG_EXCLUDE_PATHS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = ["/api/v1/utils/health-check"]
+    # 不记录请求体的路由前缀（包含密码等敏感信息）
+    REQUEST_LOG_BODY_EXCLUDE_PATHS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = [
+        "/api/v1/login",
+        "/api/v1/reset-password",
+        "/api/v1/users",
+        "/api/v1/private",
+    ]
+
+    # SQL 语句统计：超过阈值的语句记录慢查询日志，同一请求内相同语句执行
+    # 达到 DB_REPEATED_QUERY_THRESHOLD 次时记录 N+1 警告
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_REPEATED_QUERY_THRESHOLD: int = 5
+    # 在响应头中返回 X-DB-Query-Count / Server-Timing（测试和本地排查使用）
+    DB_QUERY_STATS_HEADERS: bool = False
+
     POSTGRES_SERVER: str
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
+    # 只读副本 DSN，多个用逗号分隔；为空时所有查询都走主库。
+    # 管理后台列表、统计和仪表盘使用副本，复制延迟超过 POSTGRES_REPLICA_MAX_LAG_SECONDS
+    # 或连接失败的副本会被跳过，全部不可用时回退到主库
+    POSTGRES_REPLICA_DSNS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    POSTGRES_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    POSTGRES_REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5.0
 
     # MongoDB settings
     MONGODB_SERVER: str = "localhost"
@@ -69,6 +123,27 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str = ""
     REDIS_DB: int = 0
+    # 连接池大小与超时；空闲超过 REDIS_HEALTH_CHECK_INTERVAL 秒的连接使用前先 PING
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # /humanloop/status 状态缓存和详情接口版本戳的有效期；每次状态变化都会覆盖写入，
+    # 过期只是为了限制写入失败时旧记录的存活时间
+    HUMANLOOP_STATUS_CACHE_TTL_SECONDS: int = 600
+
+    # API Key 令牌桶限流：每分钟补充 PER_MINUTE 个令牌，桶容量 BURST；
+    # APIKey.rate_limit_per_minute / rate_limit_burst 可按 Key 覆盖
+    API_KEY_RATE_LIMIT_ENABLED: bool = True
+    API_KEY_RATE_LIMIT_PER_MINUTE: int = 120
+    API_KEY_RATE_LIMIT_BURST: int = 30
+    # API Key 最后使用时间的记录精度：距上次记录不足该秒数时不再写入
+    API_KEY_LAST_USED_INTERVAL_SECONDS: int = 60
+
+    # Idempotency-Key：成功结果保存时长、执行中占用键的最长时间、并发同键请求的最长等待时间
+    IDEMPOTENCY_TTL_SECONDS: int = 60 * 60 * 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -82,6 +157,21 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[str]:
+        # 副本与主库统一使用 psycopg 驱动
+        dsns = (
+            self.POSTGRES_REPLICA_DSNS
+            if isinstance(self.POSTGRES_REPLICA_DSNS, list)
+            else [self.POSTGRES_REPLICA_DSNS]
+        )
+        return [
+            "postgresql+psycopg://" + dsn.strip().split("://", 1)[-1]
+            for dsn in dsns
+            if dsn.strip()
+        ]
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def MONGODB_URI(self) -> str:
@@ -106,6 +196,33 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
+    # 每个 API 进程中用于 bcrypt 计算的进程数，0 表示在线程池中执行
+    PASSWORD_HASH_WORKERS: int = 2
+
+    # 邮件经 Redis 队列由 app/email_worker.py 异步发送，关闭时在请求线程内直接发送
+    EMAIL_QUEUE_ENABLED: bool = True
+    EMAIL_WORKER_CONCURRENCY: int = 4
+    EMAIL_MAX_ATTEMPTS: int = 5
+    # 重试间隔：EMAIL_RETRY_BACKOFF_SECONDS * 2^(重试次数-1)
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 5.0
+    # 死信队列只保留最近的任务，并在最后一次写入后过期
+    EMAIL_DEAD_LETTER_MAX_JOBS: int = 1000
+    EMAIL_DEAD_LETTER_TTL_SECONDS: int = 7 * 24 * 3600
+    EMAIL_WORKER_METRICS_PORT: int = 9101
+
+    # 人机循环状态回调，由 app/webhook_worker.py 投递
+    # 回调地址必须解析到公网 IP（拒绝回环、内网、链路本地和保留地址）；
+    # 设置 WEBHOOK_ALLOWED_HOSTS 后只投递到列表中的主机，这些主机允许使用内网地址
+    WEBHOOK_ALLOWED_HOSTS: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    WEBHOOK_MAX_ATTEMPTS: int = 8
+    # 重试间隔：WEBHOOK_RETRY_BACKOFF_SECONDS * 2^(重试次数-1)，最长 1 小时
+    WEBHOOK_RETRY_BACKOFF_SECONDS: float = 2.0
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_WORKER_CONCURRENCY: int = 64
+    # 同一目标主机的最大并发请求数（也是该主机连接池的大小）
+    WEBHOOK_PER_DESTINATION_CONCURRENCY: int = 4
+    WEBHOOK_WORKER_METRICS_PORT: int = 9102
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def emails_enabled(self) -> bool:
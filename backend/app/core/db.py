@@ -1,10 +1,148 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import Engine, text
 from sqlmodel import Session, create_engine, select
 
 from app import crud
 from app.core.config import settings
+from app.core.metrics import DB_READ_SESSIONS, DB_REPLICA_LAG, instrument_engine
+from app.core.query_stats import instrument_engine_query_stats
+from app.core.tracing import instrument_engine_tracing
 from app.models.models import User, UserCreate
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str, **kwargs: object) -> Engine:
+    db_engine = create_engine(url, **kwargs)
+    instrument_engine(db_engine)
+    instrument_engine_tracing(db_engine)
+    instrument_engine_query_stats(db_engine)
+    return db_engine
+
+
+engine = _create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+replica_engines = [
+    _create_engine(url, pool_pre_ping=True, connect_args={"connect_timeout": 3})
+    for url in settings.SQLALCHEMY_REPLICA_URIS
+]
+
+# 已回放到最新 WAL 时延迟为 0；否则为最后回放事务距今的时间
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+class ReplicaRouter:
+    """为只读查询选择引擎：轮询延迟在阈值内的副本，全部不可用时回退到主库
+
+    每个副本的延迟检查结果缓存 check_interval 秒，检查期间其他请求使用上次的结果。
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: list[Engine],
+        *,
+        max_lag: float,
+        check_interval: float,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._healthy = [False] * len(replicas)
+        self._checked_at = [float("-inf")] * len(replicas)
+        self._locks = [threading.Lock() for _ in replicas]
+        self._next = 0
+
+    def lag_seconds(self, replica: Engine) -> float:
+        with replica.connect() as conn:
+            return float(conn.execute(REPLICA_LAG_QUERY).scalar_one())
+
+    def is_healthy(self, index: int) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at[index] < self.check_interval:
+            return self._healthy[index]
+        if not self._locks[index].acquire(blocking=False):
+            return self._healthy[index]
+        try:
+            lag = self.lag_seconds(self.replicas[index])
+            DB_REPLICA_LAG.labels(str(index)).set(lag)
+            self._healthy[index] = lag <= self.max_lag
+            if not self._healthy[index]:
+                logger.warning(f"Read replica {index} is lagging by {lag:.1f}s")
+        except Exception as e:
+            logger.warning(f"Read replica {index} lag check failed: {e}")
+            self._healthy[index] = False
+        finally:
+            self._checked_at[index] = now
+            self._locks[index].release()
+        return self._healthy[index]
+
+    def read_engine(self) -> Engine:
+        count = len(self.replicas)
+        start = self._next
+        self._next = (start + 1) % count if count else 0
+        for offset in range(count):
+            index = (start + offset) % count
+            if self.is_healthy(index):
+                DB_READ_SESSIONS.labels("replica").inc()
+                return self.replicas[index]
+        DB_READ_SESSIONS.labels("primary").inc()
+        return self.primary
+
+
+replica_router = ReplicaRouter(
+    engine,
+    replica_engines,
+    max_lag=settings.POSTGRES_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.POSTGRES_REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+)
+
+
+# 不需要等待结果的写入（如 API Key 最后使用时间）在后台线程的独立会话中执行；
+# 线程池在第一次提交时创建，关闭后置空，再次提交时重新创建
+_background_writes: ThreadPoolExecutor | None = None
+_background_writes_lock = threading.Lock()
+
+
+def _get_background_writes() -> ThreadPoolExecutor:
+    global _background_writes
+    with _background_writes_lock:
+        if _background_writes is None:
+            _background_writes = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="db-background-write"
+            )
+        return _background_writes
+
+
+def _run_background_write(write: Callable[[Session], object]) -> None:
+    try:
+        with Session(engine, expire_on_commit=False) as session:
+            write(session)
+    except Exception as e:
+        logger.warning(f"Background database write failed: {e}")
+
+
+def submit_background_write(write: Callable[[Session], object]) -> None:
+    """提交写操作后立即返回，不等待执行结果；失败只记录日志"""
+    _get_background_writes().submit(_run_background_write, write)
+
+
+def shutdown_background_writes() -> None:
+    """应用退出时等待已提交的写操作完成"""
+    global _background_writes
+    with _background_writes_lock:
+        executor, _background_writes = _background_writes, None
+    if executor is not None:
+        executor.shutdown(wait=True)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,160 @@
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any
+
+import redis
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import EMAIL_JOBS, EMAIL_QUEUE_DEPTH
+from app.core.redis import redis_client, sync_redis_client
+
+logger = logging.getLogger(__name__)
+
+# 待发送队列（LPUSH 入队，worker 从右端取出）
+QUEUE_KEY = "email:queue"
+# 发送中的任务，worker 崩溃后可重新入队
+PROCESSING_KEY = "email:processing"
+# 等待重试的任务，score 为下次尝试的时间戳
+RETRY_KEY = "email:retry"
+# 超过最大重试次数的任务，保留最近 EMAIL_DEAD_LETTER_MAX_JOBS 个
+DEAD_KEY = "email:dead"
+
+# 将到期的重试任务原子地移回待发送队列，多个 worker 同时执行也不会重复入队
+PROMOTE_DUE_SCRIPT = """
+local jobs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(jobs) do
+    redis.call('ZREM', KEYS[1], job)
+    redis.call('LPUSH', KEYS[2], job)
+end
+return #jobs
+"""
+
+
+def _redis() -> redis.Redis:
+    return sync_redis_client
+
+
+def _new_job(*, email_to: str, subject: str, html_content: str) -> tuple[str, str]:
+    """返回 (任务 ID, 序列化后的任务)"""
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "email_to": email_to,
+        "subject": subject,
+        "html_content": html_content,
+        "attempts": 0,
+        "enqueued_at": datetime.utcnow().isoformat(),
+    }
+    return job_id, json.dumps(job, ensure_ascii=False)
+
+
+def enqueue_email(*, email_to: str, subject: str, html_content: str) -> str:
+    """将邮件加入发送队列，立即返回任务 ID，由 email worker 异步发送"""
+    job_id, payload = _new_job(
+        email_to=email_to, subject=subject, html_content=html_content
+    )
+    _redis().lpush(QUEUE_KEY, payload)
+    EMAIL_JOBS.labels("enqueued").inc()
+    return job_id
+
+
+def dispatch_email(
+    *, email_to: str, subject: str, html_content: str, contains_secret: bool = False
+) -> None:
+    """EMAIL_QUEUE_ENABLED 时入队异步发送，否则在当前线程直接发送
+
+    contains_secret 的邮件（如含明文密码、重置令牌或验证码）始终直接发送，任务内容不写入 Redis，
+    避免在发送中列表和死信队列中留存
+    """
+    if settings.EMAIL_QUEUE_ENABLED and not contains_secret:
+        enqueue_email(email_to=email_to, subject=subject, html_content=html_content)
+        return
+
+    from app.utils import send_email
+
+    send_email(email_to=email_to, subject=subject, html_content=html_content)
+
+
+async def dispatch_email_async(
+    *, email_to: str, subject: str, html_content: str, contains_secret: bool = False
+) -> None:
+    """dispatch_email 的异步版本，供事件循环中运行的路由使用"""
+    if settings.EMAIL_QUEUE_ENABLED and not contains_secret:
+        _, payload = _new_job(
+            email_to=email_to, subject=subject, html_content=html_content
+        )
+        await redis_client.redis_client.lpush(QUEUE_KEY, payload)  # type: ignore[misc]
+        EMAIL_JOBS.labels("enqueued").inc()
+        return
+
+    from app.utils import send_email
+
+    await run_in_threadpool(
+        send_email, email_to=email_to, subject=subject, html_content=html_content
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """指数退避：base * 2^(attempts-1)，最长 10 分钟"""
+    return float(min(settings.EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), 600))
+
+
+class EmailQueue:
+    """email worker 使用的队列操作"""
+
+    def __init__(self, client: redis.Redis | None = None) -> None:
+        self.client = client or _redis()
+        self._promote_due = self.client.register_script(PROMOTE_DUE_SCRIPT)
+
+    def pop(self, timeout: int = 1) -> str | None:
+        """阻塞取出一个任务并移入发送中列表"""
+        raw = self.client.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+        return str(raw) if raw is not None else None
+
+    def ack(self, raw: str) -> None:
+        self.client.lrem(PROCESSING_KEY, 1, raw)
+
+    def fail(self, raw: str, job: dict[str, Any], error: str) -> None:
+        """记录失败：未超过最大次数时按退避时间放入重试集合，否则进入死信队列"""
+        job["attempts"] = int(job.get("attempts", 0)) + 1
+        job["last_error"] = error
+        payload = json.dumps(job, ensure_ascii=False)
+        pipe = self.client.pipeline()
+        if job["attempts"] >= settings.EMAIL_MAX_ATTEMPTS:
+            pipe.lpush(DEAD_KEY, payload)
+            pipe.ltrim(DEAD_KEY, 0, settings.EMAIL_DEAD_LETTER_MAX_JOBS - 1)
+            pipe.expire(DEAD_KEY, settings.EMAIL_DEAD_LETTER_TTL_SECONDS)
+            EMAIL_JOBS.labels("failed").inc()
+        else:
+            pipe.zadd(RETRY_KEY, {payload: time.time() + retry_delay(job["attempts"])})
+            EMAIL_JOBS.labels("retried").inc()
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        pipe.execute()
+
+    def promote_due(self, batch: int = 100) -> int:
+        return int(
+            self._promote_due(keys=[RETRY_KEY, QUEUE_KEY], args=[time.time(), batch])
+        )
+
+    def requeue_processing(self) -> int:
+        """worker 启动时将上次未完成的任务放回待发送队列"""
+        count = 0
+        while self.client.lmove(PROCESSING_KEY, QUEUE_KEY, "RIGHT", "LEFT"):
+            count += 1
+        return count
+
+    def update_depth_metrics(self) -> None:
+        pipe = self.client.pipeline()
+        pipe.llen(QUEUE_KEY)
+        pipe.zcard(RETRY_KEY)
+        pipe.llen(PROCESSING_KEY)
+        pipe.llen(DEAD_KEY)
+        pending, retry, processing, dead = pipe.execute()
+        EMAIL_QUEUE_DEPTH.labels("pending").set(pending)
+        EMAIL_QUEUE_DEPTH.labels("retry").set(retry)
+        EMAIL_QUEUE_DEPTH.labels("processing").set(processing)
+        EMAIL_QUEUE_DEPTH.labels("dead").set(dead)
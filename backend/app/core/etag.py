@@ -0,0 +1,138 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.redis import sync_redis_client
+from app.models.models import HumanLoopRequest
+
+logger = logging.getLogger(__name__)
+
+# 版本戳 "{id.hex}:{updated_at 微秒}" 保存在 Redis 中，条件请求命中时无需查询 Postgres；
+# /humanloop/status 的版本戳随状态记录保存在 app.core.status_cache 中。
+# 提交后写入失败时旧版本戳会让详情接口误返回 304，有效期与状态缓存相同
+# (HUMANLOOP_STATUS_CACHE_TTL_SECONDS)，过期后回退到查询数据库
+VERSION_KEY_PREFIX = "humanloop:version:"
+
+# 按版本条件写入：只在键不存在或已保存的版本更旧时写入。查询后回填的是查询时读到的数据，
+# 期间请求可能已被更新并写入了更新的记录，直接覆盖会把旧版本写回缓存。
+# 值为版本戳 "{id.hex}:{updated_at 微秒}"，或 version 字段在最前的 JSON 状态记录，
+# 新旧版本都从值中解析；每个键依次对应 ARGV 中的 (值, 有效期)
+STORE_IF_NEWER_SCRIPT = """
+local function version(value)
+    local stamp = string.match(value, '^{"version":"%x+:(%d+)"')
+        or string.match(value, '^%x+:(%d+)$')
+    return tonumber(stamp)
+end
+local written = 0
+for i, key in ipairs(KEYS) do
+    local value = ARGV[2 * i - 1]
+    local current = redis.call('GET', key)
+    local stored = current and version(current)
+    if not stored or stored < version(value) then
+        redis.call('SET', key, value, 'EX', ARGV[2 * i])
+        written = written + 1
+    end
+end
+return written
+"""
+
+_store_if_newer = sync_redis_client.register_script(STORE_IF_NEWER_SCRIPT)
+
+
+def detail_version_key(*, owner_id: uuid.UUID, request_id: uuid.UUID) -> str:
+    """/admin/humanloop/requests/{id} 按主键查询"""
+    return f"{VERSION_KEY_PREFIX}{owner_id}:{request_id}"
+
+
+def _timestamp_us(value: datetime) -> int:
+    # updated_at 为不带时区的 UTC 时间
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+
+
+def version_stamp(humanloop_request: HumanLoopRequest) -> str:
+    return f"{humanloop_request.id.hex}:{_timestamp_us(humanloop_request.updated_at)}"
+
+
+def version_headers(stamp: str) -> dict[str, str]:
+    request_hex, timestamp_us = stamp.split(":")
+    return {
+        # 响应可能被 gzip 压缩，使用弱 ETag
+        "ETag": f'W/"{request_hex}-{timestamp_us}"',
+        "Last-Modified": formatdate(int(timestamp_us) / 1_000_000, usegmt=True),
+        # 允许客户端缓存，但每次使用前都要重新验证
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def has_conditional_headers(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, stamp: str) -> bool:
+    """按 RFC 9110 判断是否返回 304：有 If-None-Match 时忽略 If-Modified-Since"""
+    headers = version_headers(stamp)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers["ETag"].removeprefix("W/")
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    last_modified = int(stamp.split(":")[1]) // 1_000_000
+    return last_modified <= int(since.timestamp())
+
+
+def cached_version(key: str) -> str | None:
+    """读取版本戳，Redis 不可用时返回 None，由调用方回退到查询数据库"""
+    try:
+        value = sync_redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Failed to read request version: {e}")
+        return None
+    return str(value) if value else None
+
+
+def version_entry(humanloop_request: HumanLoopRequest) -> tuple[str, str]:
+    """详情接口的版本戳键及其值，在对象提交过期之前调用"""
+    return (
+        detail_version_key(
+            owner_id=humanloop_request.owner_id, request_id=humanloop_request.id
+        ),
+        version_stamp(humanloop_request),
+    )
+
+
+def store_if_newer(entries: list[tuple[str, str, int]]) -> int:
+    """按版本条件写入 (键, 值, 有效期)，一次往返，返回实际写入的键数"""
+    args: list[str | int] = []
+    for _key, value, ttl in entries:
+        args.extend([value, ttl])
+    return int(
+        _store_if_newer(
+            keys=[key for key, _value, _ttl in entries],
+            args=args,
+            client=sync_redis_client,
+        )
+    )
+
+
+def store_version(humanloop_request: HumanLoopRequest) -> str:
+    """补写详情接口的版本戳，不覆盖更新的版本戳；失败只记录日志"""
+    key, stamp = version_entry(humanloop_request)
+    try:
+        store_if_newer([(key, stamp, settings.HUMANLOOP_STATUS_CACHE_TTL_SECONDS)])
+    except Exception as e:
+        logger.warning(f"Failed to store request version: {e}")
+    return stamp
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from redis.commands.core import AsyncScript
+
+from app.core.config import settings
+from app.core.metrics import IDEMPOTENCY_REQUESTS
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "idempotency:"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# 等待进行中的同键请求时的轮询间隔
+POLL_INTERVAL_SECONDS = 0.05
+
+# 只删除自己占用的键：执行超时后键可能已被其他请求重新占用
+RELEASE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['token'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_release = AsyncScript(redis_client.redis_client, RELEASE_SCRIPT)
+
+
+def idempotency_key(*, owner_id: uuid.UUID, scope: str, key: str) -> str:
+    return f"{KEY_PREFIX}{owner_id}:{scope}:{key}"
+
+
+def fingerprint(payload: BaseModel) -> str:
+    """请求体摘要，同一个键携带不同请求体时拒绝
+
+    只包含客户端传入的字段：服务端默认值（如 TaskModel.created_at 的当前时间）
+    每次解析都不同，计入摘要会让相同请求体的重试被当作冲突
+    """
+    return hashlib.sha256(
+        payload.model_dump_json(exclude_unset=True).encode()
+    ).hexdigest()
+
+
+def replay_response(record: dict[str, Any]) -> Response:
+    return Response(
+        content=record["body"],
+        status_code=record["status_code"],
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+class IdempotentCall:
+    """一次带 Idempotency-Key 的调用
+
+    第一个请求用 SET NX 占用键并执行，成功结果保存 IDEMPOTENCY_TTL_SECONDS 秒；
+    重试直接返回保存的结果，并发的同键请求轮询等待第一个请求完成。
+    执行失败（success=False 或抛出异常）时删除键，重试会重新执行。
+    """
+
+    def __init__(
+        self, *, key: str, request_fingerprint: str, status_code: int = 200
+    ) -> None:
+        self.key = key
+        self.fingerprint = request_fingerprint
+        self.status_code = status_code
+        self.token = uuid.uuid4().hex
+
+    async def claim(self) -> bool:
+        record = {"state": "pending", "token": self.token, "fp": self.fingerprint}
+        return bool(
+            await redis_client.redis_client.set(
+                self.key,
+                json.dumps(record),
+                nx=True,
+                ex=settings.IDEMPOTENCY_LOCK_SECONDS,
+            )
+        )
+
+    async def load(self) -> dict[str, Any] | None:
+        value = await redis_client.redis_client.get(self.key)
+        if not value:
+            return None
+        record: dict[str, Any] = json.loads(value)
+        if record["fp"] != self.fingerprint:
+            IDEMPOTENCY_REQUESTS.labels("conflict").inc()
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request body",
+            )
+        return record
+
+    async def complete(self, result: Any) -> None:
+        record = {
+            "state": "done",
+            "token": self.token,
+            "fp": self.fingerprint,
+            "status_code": self.status_code,
+            "body": json.dumps(jsonable_encoder(result)),
+        }
+        await redis_client.redis_client.set(
+            self.key, json.dumps(record), ex=settings.IDEMPOTENCY_TTL_SECONDS
+        )
+
+    async def release(self) -> None:
+        await _release(
+            keys=[self.key], args=[self.token], client=redis_client.redis_client
+        )
+
+    async def wait_for_result(self) -> Response | None:
+        """返回已保存的结果；键被释放时返回 None，由调用方重新占用"""
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        waited = False
+        while True:
+            record = await self.load()
+            if record is None:
+                return None
+            if record["state"] == "done":
+                IDEMPOTENCY_REQUESTS.labels("waited" if waited else "replayed").inc()
+                return replay_response(record)
+            if time.monotonic() >= deadline:
+                IDEMPOTENCY_REQUESTS.labels("conflict").inc()
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            waited = True
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+
+async def run_idempotent(
+    handler: Callable[[], Awaitable[Any]],
+    *,
+    key: str | None,
+    scope: str,
+    owner_id: uuid.UUID,
+    payload: BaseModel,
+    status_code: int = 200,
+) -> Any:
+    """按 Idempotency-Key 执行 handler；未携带键或 Redis 不可用时直接执行"""
+    if not key:
+        return await handler()
+
+    call = IdempotentCall(
+        key=idempotency_key(owner_id=owner_id, scope=scope, key=key),
+        request_fingerprint=fingerprint(payload),
+        status_code=status_code,
+    )
+    try:
+        # 重试是主要场景，先读取已保存的结果，命中时只需一次往返
+        while True:
+            replay = await call.wait_for_result()
+            if replay is not None:
+                return replay
+            if await call.claim():
+                break
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.warning(f"Idempotency store unavailable, executing without it: {e}")
+        return await handler()
+
+    IDEMPOTENCY_REQUESTS.labels("executed").inc()
+    try:
+        result = await handler()
+    except BaseException:
+        await _safe(call.release())
+        raise
+    if getattr(result, "success", False):
+        await _safe(call.complete(result))
+    else:
+        await _safe(call.release())
+    return result
+
+
+async def _safe(operation: Awaitable[Any]) -> None:
+    try:
+        await operation
+    except Exception as e:
+        logger.warning(f"Failed to update idempotency record: {e}")
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Any
+
+from app.core.metrics import LIVE_FEED_CONNECTIONS
+from app.core.redis import redis_client, sync_redis_client
+from app.models.models import HumanLoopRequest, HumanLoopRequestPublic
+
+logger = logging.getLogger(__name__)
+
+# 每个用户一个频道，各 worker 通过模式订阅接收后分发给本进程的连接
+CHANNEL_PREFIX = "humanloop:events:"
+# 每个连接最多缓存的未发送事件数，超过说明客户端太慢，断开后由客户端重连
+MAX_PENDING_EVENTS = 256
+
+
+def stats_delta(
+    humanloop_request: HumanLoopRequest, previous_status: str | None
+) -> dict[str, Any]:
+    """与 crud.get_humanloop_stats 结构一致的增量，客户端直接累加"""
+    if previous_status is None:
+        return {
+            "by_status": {humanloop_request.status: 1},
+            "by_type": {humanloop_request.loop_type: 1},
+            "by_platform": {humanloop_request.platform: 1},
+            "total": 1,
+        }
+    if previous_status == humanloop_request.status:
+        return {}
+    return {"by_status": {previous_status: -1, humanloop_request.status: 1}}
+
+
+def request_event(
+    event: str, humanloop_request: HumanLoopRequest, previous_status: str | None = None
+) -> tuple[str, str]:
+    """生成 (频道, 消息)，event 为 created / updated / cancelled"""
+    payload = {
+        "type": event,
+        "request": HumanLoopRequestPublic.model_validate(humanloop_request).model_dump(
+            mode="json", by_alias=True
+        ),
+        "stats_delta": stats_delta(humanloop_request, previous_status),
+    }
+    return f"{CHANNEL_PREFIX}{humanloop_request.owner_id}", json.dumps(payload)
+
+
+def publish_events(events: list[tuple[str, str]]) -> None:
+    """在事务提交后发布事件，一次往返；失败只记录日志，不影响写入"""
+    if not events:
+        return
+    try:
+        pipe = sync_redis_client.pipeline(transaction=False)
+        for channel, message in events:
+            pipe.publish(channel, message)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to publish humanloop events: {e}")
+
+
+class LiveFeedHub:
+    """本进程内的 WebSocket 订阅者，按 owner_id 分组"""
+
+    def __init__(self) -> None:
+        self.subscribers: defaultdict[str, set[asyncio.Queue[str | None]]] = (
+            defaultdict(set)
+        )
+
+    def subscribe(self, owner_id: uuid.UUID) -> asyncio.Queue[str | None]:
+        queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self.subscribers[str(owner_id)].add(queue)
+        LIVE_FEED_CONNECTIONS.inc()
+        return queue
+
+    def unsubscribe(
+        self, owner_id: uuid.UUID, queue: asyncio.Queue[str | None]
+    ) -> None:
+        queues = self.subscribers.get(str(owner_id))
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[str(owner_id)]
+        LIVE_FEED_CONNECTIONS.dec()
+
+    def dispatch(self, owner_id: str, data: str) -> None:
+        for queue in list(self.subscribers.get(owner_id, ())):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # None 通知连接关闭；先腾出一个位置保证能放进去
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def listen(self) -> None:
+        """订阅所有用户的事件频道，随应用生命周期运行，断线后重连"""
+        while True:
+            try:
+                pubsub = redis_client.redis_client.pubsub()
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        owner_id = str(message["channel"])[len(CHANNEL_PREFIX) :]
+                        self.dispatch(owner_id, str(message["data"]))
+                finally:
+                    await pubsub.aclose()  # type: ignore[no-untyped-call]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live feed listener disconnected: {e}")
+                await asyncio.sleep(1)
+
+
+live_feed_hub = LiveFeedHub()
@@ -0,0 +1,285 @@
+import os
+import secrets
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pymongo import monitoring
+from sqlalchemy import Engine, event
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+# uvicorn 多 worker 部署时，各进程把指标写入 PROMETHEUS_MULTIPROC_DIR，
+# 由 /metrics 通过 MultiProcessCollector 聚合
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_BORROWED_THREADS = Gauge(
+    "threadpool_borrowed_threads",
+    "Worker threads in use by sync endpoints and dependencies",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_WAITING_TASKS = Gauge(
+    "threadpool_waiting_tasks",
+    "Tasks queued waiting for a worker thread",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured SQLAlchemy connection pool size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "SQLAlchemy connections currently checked out",
+    multiprocess_mode="livesum",
+)
+DB_READ_SESSIONS = Counter(
+    "db_read_sessions_total",
+    "Read-only database sessions by target (replica, primary)",
+    ["target"],
+)
+DB_REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of each read replica at its last check",
+    ["replica"],
+    multiprocess_mode="livemax",
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency",
+    ["command", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency",
+    ["command", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+API_KEY_RATE_LIMITED = Counter(
+    "api_key_rate_limited_total",
+    "Requests rejected by the per API key token bucket",
+)
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key by result "
+    "(executed, replayed, waited, conflict)",
+    ["result"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash / verify latency including time queued for the process pool",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing jobs waiting for a free process",
+    multiprocess_mode="livesum",
+)
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total",
+    "JWT user cache lookups by result (hit, miss)",
+    ["result"],
+)
+USER_CACHE_INVALIDATIONS = Counter(
+    "user_cache_invalidations_total",
+    "User cache invalidations published after a user row changed",
+)
+HUMANLOOP_STATUS_CACHE_LOOKUPS = Counter(
+    "humanloop_status_cache_lookups_total",
+    "/humanloop/status Redis cache lookups by result (hit, miss, error)",
+    ["result"],
+)
+WEBHOOK_DELIVERIES = Counter(
+    "webhook_deliveries_total",
+    "Webhook deliveries by outcome (enqueued, rejected, delivered, retried, failed)",
+    ["status"],
+)
+WEBHOOK_DELIVERY_DURATION = Histogram(
+    "webhook_delivery_duration_seconds",
+    "Outbound webhook POST latency",
+    buckets=LATENCY_BUCKETS,
+)
+LIVE_FEED_CONNECTIONS = Gauge(
+    "live_feed_connections",
+    "Open admin console WebSocket connections",
+    multiprocess_mode="livesum",
+)
+EMAIL_JOBS = Counter(
+    "email_jobs_total",
+    "Email jobs by outcome (enqueued, sent, retried, failed)",
+    ["status"],
+)
+EMAIL_SEND_DURATION = Histogram(
+    "email_send_duration_seconds",
+    "SMTP send latency per email",
+    buckets=LATENCY_BUCKETS,
+)
+EMAIL_QUEUE_DEPTH = Gauge(
+    "email_queue_depth",
+    "Email jobs waiting in each Redis queue",
+    ["queue"],
+    multiprocess_mode="livemax",
+)
+
+
+def observe_request(route: str, method: str, status: int, duration: float) -> None:
+    HTTP_REQUEST_DURATION.labels(route, method, str(status)).observe(duration)
+
+
+def observe_redis_command(command: str, status: str, duration: float) -> None:
+    REDIS_COMMAND_DURATION.labels(command, status).observe(duration)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """通过连接池事件统计连接使用情况"""
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        DB_POOL_SIZE.set(pool_size())
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(*_args: Any) -> None:
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(*_args: Any) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """记录 MongoDB 命令耗时"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "ok").observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_DURATION.labels(event.command_name, "error").observe(
+            event.duration_micros / 1_000_000
+        )
+
+
+class HumanLoopStatusCollector(Collector):
+    """抓取时统计各状态的人机循环请求数量（结果缓存，避免每次抓取都全表计数）"""
+
+    def __init__(self, ttl_seconds: float = 30.0) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._cached: dict[str, int] = {}
+        self._cached_at = 0.0
+
+    def _counts(self) -> dict[str, int]:
+        if time.monotonic() - self._cached_at < self.ttl_seconds:
+            return self._cached
+
+        from sqlmodel import Session, func, select
+
+        from app.core.db import engine
+        from app.models.models import HumanLoopRequest
+
+        with Session(engine) as session:
+            rows = session.exec(
+                select(HumanLoopRequest.status, func.count()).group_by(
+                    HumanLoopRequest.status
+                )
+            ).all()
+        self._cached = dict(rows)
+        self._cached_at = time.monotonic()
+        return self._cached
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        family = GaugeMetricFamily(
+            "humanloop_requests", "Human loop requests by status", labels=["status"]
+        )
+        try:
+            counts = self._counts()
+        except Exception:
+            counts = self._cached
+        for status, count in counts.items():
+            family.add_metric([status], count)
+        yield family
+
+
+# 业务指标只在抓取的进程中计算一次，不参与多进程聚合
+_business_registry = CollectorRegistry()
+_business_registry.register(HumanLoopStatusCollector())
+
+
+def collector_registry() -> CollectorRegistry:
+    """多进程模式下聚合各进程写入的指标，否则使用默认 registry"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        return registry
+    return REGISTRY
+
+
+def is_scrape_authorized(request: Request) -> bool:
+    """校验抓取令牌；未配置令牌时只允许 local 环境访问"""
+    if not settings.METRICS_TOKEN:
+        return settings.ENVIRONMENT == "local"
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and secrets.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    )
+
+
+def metrics_endpoint(request: Request) -> Response:
+    """Prometheus 抓取接口"""
+    if not is_scrape_authorized(request):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    content = generate_latest(collector_registry()) + generate_latest(
+        _business_registry
+    )
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """worker 退出时清理其 live 指标"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
@@ -1,15 +1,26 @@
 from typing import Any
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReadPreference, monitoring
 from pymongo.database import Database
 
 from app.core.config import settings
+from app.core.metrics import MongoCommandMetrics
+from app.core.tracing import MongoCommandTracing
 
 # 创建MongoDB客户端连接
-mongo_client: MongoClient[dict[str, Any]] = MongoClient(settings.MONGODB_URI)
+_event_listeners: list[monitoring.CommandListener] = [MongoCommandMetrics()]
+if settings.tracing_enabled:
+    _event_listeners.append(MongoCommandTracing())
+mongo_client: MongoClient[dict[str, Any]] = MongoClient(
+    settings.MONGODB_URI, event_listeners=_event_listeners
+)
 
 # 获取数据库实例
 mongo_db: Database[dict[str, Any]] = mongo_client[settings.MONGODB_DB]
+# 管理后台的列表、导出和仪表盘优先读取从节点，单机部署时等同于读主节点
+mongo_read_db: Database[dict[str, Any]] = mongo_db.with_options(
+    read_preference=ReadPreference.SECONDARY_PREFERRED
+)
 
 
 def get_mongo_db() -> Database[dict[str, Any]]:
@@ -17,6 +28,11 @@ def get_mongo_db() -> Database[dict[str, Any]]:
     return mongo_db
 
 
+def get_mongo_read_db() -> Database[dict[str, Any]]:
+    """获取优先读取从节点的MongoDB数据库实例的依赖函数"""
+    return mongo_read_db
+
+
 def init_mongodb() -> None:
     """初始化MongoDB连接"""
     try:
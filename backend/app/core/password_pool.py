@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_QUEUE_DEPTH
+
+T = TypeVar("T")
+
+# bcrypt 是 CPU 密集操作，放在独立进程中执行，登录高峰只会在这里排队，
+# 不会占满 AnyIO 线程池、拖慢状态轮询等其他请求
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # 使用 spawn：fork 带有事件循环和连接池的进程不安全
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def start_password_pool() -> None:
+    """应用启动时预先创建进程，避免第一次登录等待进程启动"""
+    if settings.PASSWORD_HASH_WORKERS > 0:
+        executor = _get_executor()
+        for _ in range(settings.PASSWORD_HASH_WORKERS):
+            executor.submit(int)
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _set_queue_depth() -> None:
+    # 正在执行的任务数不超过进程数，其余在进程池队列中等待
+    PASSWORD_HASH_QUEUE_DEPTH.set(max(0, _in_flight - settings.PASSWORD_HASH_WORKERS))
+
+
+async def _run(operation: str, func: Callable[..., T], *args: Any) -> T:
+    global _in_flight
+    start = time.perf_counter()
+    _in_flight += 1
+    _set_queue_depth()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(func, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _in_flight -= 1
+        _set_queue_depth()
+        PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - start)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在密码进程池中校验密码"""
+    return await _run(
+        "verify", security.verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在密码进程池中计算密码哈希"""
+    return await _run("hash", security.get_password_hash, password)
@@ -0,0 +1,115 @@
+import json
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db")
+
+
+@dataclass
+class QueryStats:
+    """单个请求（或测试代码块）内执行的 SQL 语句统计"""
+
+    count: int = 0
+    total_time: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    @property
+    def total_time_ms(self) -> float:
+        return round(self.total_time * 1000, 2)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """返回执行次数达到阈值的相同语句（通常意味着循环内逐行查询，即 N+1）"""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """统计代码块内执行的 SQL 语句
+
+    统计对象保存在 ContextVar 中，线程池中执行的同步依赖和路由函数会复制当前上下文，
+    因此同一请求内的语句都会计入同一个统计对象。
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """只保留绑定参数的类型，避免把参数值（可能包含敏感信息）写入日志"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        if parameters and isinstance(parameters[0], dict | list | tuple):
+            # executemany：记录行数和第一行的参数类型
+            return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def instrument_engine_query_stats(engine: Engine) -> None:
+    """统计每条语句的耗时，并记录超过 DB_SLOW_QUERY_MS 的慢查询"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        _conn: Any,
+        _cursor: Any,
+        _statement: str,
+        _parameters: Any,
+        context: Any,
+        _executemany: bool,
+    ) -> None:
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        _conn: Any,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        duration = time.perf_counter() - context._query_start
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_time += duration
+            stats.statements[statement] += 1
+
+        if duration * 1000 >= settings.DB_SLOW_QUERY_MS:
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "slow_query",
+                        "duration_ms": round(duration * 1000, 2),
+                        "statement": statement,
+                        "parameters": parameter_shape(parameters),
+                        "executemany": executemany,
+                    },
+                    ensure_ascii=False,
+                )
+            )
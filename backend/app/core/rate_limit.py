@@ -0,0 +1,98 @@
+import logging
+import math
+from dataclasses import dataclass
+
+from redis.commands.core import AsyncScript
+
+from app.core.config import settings
+from app.core.metrics import API_KEY_RATE_LIMITED
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 令牌桶：按距上次请求的时间补充令牌，足够时扣减，不足时返回需等待的秒数。
+# 读取、补充、扣减在一个脚本内完成，多进程并发请求也不会超发；
+# 使用 Redis 服务器时间，避免各实例时钟不一致。
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+_token_bucket = AsyncScript(redis_client.redis_client, TOKEN_BUCKET_SCRIPT)
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+
+    @property
+    def retry_after_seconds(self) -> int:
+        """Retry-After 头只接受整数秒，向上取整"""
+        return max(1, math.ceil(self.retry_after))
+
+
+async def acquire_token(
+    key: str, *, per_minute: int, burst: int, cost: int = 1
+) -> RateLimitResult:
+    """从 key 对应的令牌桶中取出 cost 个令牌，一次 EVALSHA 往返"""
+    allowed, tokens, retry_after = await _token_bucket(
+        keys=[f"rate_limit:{key}"],
+        args=[burst, per_minute / 60, cost],
+        # 传入当前客户端，loadtest 等场景替换 redis_client.redis_client 后仍然生效
+        client=redis_client.redis_client,
+    )
+    return RateLimitResult(
+        allowed=bool(int(allowed)),
+        limit=burst,
+        remaining=int(float(tokens)),
+        retry_after=float(retry_after),
+    )
+
+
+async def check_api_key_rate_limit(
+    *, api_key_id: str, per_minute: int | None, burst: int | None
+) -> RateLimitResult | None:
+    """检查 API Key 的请求频率，未启用或 Redis 不可用时返回 None（放行）"""
+    if not settings.API_KEY_RATE_LIMIT_ENABLED:
+        return None
+    try:
+        result = await acquire_token(
+            f"api_key:{api_key_id}",
+            per_minute=per_minute or settings.API_KEY_RATE_LIMIT_PER_MINUTE,
+            burst=burst or settings.API_KEY_RATE_LIMIT_BURST,
+        )
+    except Exception as e:
+        # 限流依赖 Redis，Redis 故障时不应让所有 Agent 请求失败
+        logger.warning(f"API key rate limit check failed: {e}")
+        return None
+    if not result.allowed:
+        API_KEY_RATE_LIMITED.inc()
+    return result
@@ -1,57 +1,137 @@
 import random
 import string
+import time
+from typing import Any
 
 import redis
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
 
 from app.core.config import settings
+from app.core.metrics import observe_redis_command
+from app.core.tracing import traced
+
+
+def _connection_kwargs() -> dict[str, Any]:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "password": settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
+        "db": settings.REDIS_DB,
+        "decode_responses": True,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        # 连接空闲超过该时间后，使用前先 PING 检查，避免拿到已被服务端断开的连接
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
+class InstrumentedRedis(redis.Redis):
+    """记录每条命令耗时的 Redis 客户端"""
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return super().execute_command(*args, **options)  # type: ignore[no-untyped-call]
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            observe_redis_command(
+                str(args[0]).lower(), status, time.perf_counter() - start
+            )
+
+
+class InstrumentedAsyncRedis(aioredis.Redis):
+    """记录每条命令耗时的异步 Redis 客户端"""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await super().execute_command(*args, **options)  # type: ignore[no-untyped-call]
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            observe_redis_command(
+                str(args[0]).lower(), status, time.perf_counter() - start
+            )
 
 
 class RedisClient:
+    """异步 Redis 客户端，供事件循环中运行的路由使用"""
+
     def __init__(self) -> None:
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
-            db=settings.REDIS_DB,
-            decode_responses=True,
-        )
-
-    def set_verification_code(
+        self.pool = aioredis.ConnectionPool(**_connection_kwargs())
+        self.redis_client = InstrumentedAsyncRedis(connection_pool=self.pool)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        """批量发送命令，一次往返完成；transaction=True 时包裹在 MULTI/EXEC 中
+
+        用法::
+
+            async with redis_client.pipeline() as pipe:
+                pipe.get(key_a).get(key_b)
+                value_a, value_b = await pipe.execute()
+        """
+        return self.redis_client.pipeline(transaction=transaction)
+
+    async def ping(self) -> bool:
+        """健康检查"""
+        try:
+            return bool(await self.redis_client.ping())
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        """断开连接池中的连接（应用关闭时调用，连接与事件循环绑定）"""
+        await self.pool.disconnect()
+
+    @traced()
+    async def set_verification_code(
         self, email: str, code: str, expire_seconds: int = 300
     ) -> bool:
         """存储验证码，默认5分钟过期"""
         try:
             key = f"email_verification:{email}"
-            result = self.redis_client.setex(key, expire_seconds, code)
+            result = await self.redis_client.setex(key, expire_seconds, code)
             return bool(result)
         except Exception:
             return False
 
-    def get_verification_code(self, email: str) -> str | None:
+    @traced()
+    async def get_verification_code(self, email: str) -> str | None:
         """获取验证码"""
         try:
             key = f"email_verification:{email}"
-            result = self.redis_client.get(key)
+            result = await self.redis_client.get(key)
             return str(result) if result else None
         except Exception:
             return None
 
-    def delete_verification_code(self, email: str) -> bool:
+    @traced()
+    async def delete_verification_code(self, email: str) -> bool:
         """删除验证码"""
         try:
             key = f"email_verification:{email}"
-            return bool(self.redis_client.delete(key))
+            return bool(await self.redis_client.delete(key))
         except Exception:
             return False
 
-    def check_rate_limit(self, email: str, limit_seconds: int = 60) -> bool:
-        """检查发送频率限制，默认1分钟内只能发送一次"""
+    @traced()
+    async def check_rate_limit(self, email: str, limit_seconds: int = 60) -> bool:
+        """检查发送频率限制，默认1分钟内只能发送一次
+
+        SET NX EX 一次往返完成检查和设置，并发请求中只有一个能成功
+        """
         try:
             key = f"email_rate_limit:{email}"
-            if self.redis_client.exists(key):
-                return False
-            self.redis_client.setex(key, limit_seconds, "1")
-            return True
+            return bool(
+                await self.redis_client.set(key, "1", nx=True, ex=limit_seconds)
+            )
         except Exception:
             return False
 
@@ -63,3 +143,8 @@ def generate_verification_code() -> str:
 
 # 全局Redis客户端实例
 redis_client = RedisClient()
+
+# 同步客户端，供线程池中的同步代码和 email worker 等独立进程使用
+sync_redis_client = InstrumentedRedis(
+    connection_pool=redis.ConnectionPool(**_connection_kwargs())
+)
@@ -0,0 +1,97 @@
+import json
+import logging
+import uuid
+
+from app.core.config import settings
+from app.core.etag import store_if_newer, version_entry, version_stamp
+from app.core.metrics import HUMANLOOP_STATUS_CACHE_LOOKUPS
+from app.core.redis import sync_redis_client
+from app.models.models import HumanLoopRequest, HumanLoopStatusResponse
+
+logger = logging.getLogger(__name__)
+
+# (owner, platform, conversation_id, request_id) -> 状态记录，
+# crud 中每次创建、更新和取消请求后写入更新的版本，/humanloop/status 优先读取
+STATUS_KEY_PREFIX = "humanloop:status:"
+
+
+def status_key(
+    *, owner_id: uuid.UUID, platform: str, conversation_id: str, request_id: str
+) -> str:
+    return f"{STATUS_KEY_PREFIX}{owner_id}:{platform}:{conversation_id}:{request_id}"
+
+
+def status_record(humanloop_request: HumanLoopRequest) -> str:
+    """状态接口需要的字段加上版本戳，304 和完整响应都可以直接由它生成"""
+    status = HumanLoopStatusResponse(
+        success=True,
+        status=humanloop_request.status,
+        response=humanloop_request.response,
+        feedback=humanloop_request.feedback,
+        responded_by=humanloop_request.responded_by,
+        responded_at=humanloop_request.responded_at,
+    )
+    return json.dumps(
+        {
+            "version": version_stamp(humanloop_request),
+            "status": status.model_dump(mode="json", exclude={"success"}),
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def cached_status(key: str) -> tuple[str, HumanLoopStatusResponse] | None:
+    """读取 (版本戳, 状态)，未命中或 Redis 不可用时返回 None，由调用方查询数据库"""
+    try:
+        value = sync_redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Failed to read cached request status: {e}")
+        HUMANLOOP_STATUS_CACHE_LOOKUPS.labels("error").inc()
+        return None
+    if not value:
+        HUMANLOOP_STATUS_CACHE_LOOKUPS.labels("miss").inc()
+        return None
+    HUMANLOOP_STATUS_CACHE_LOOKUPS.labels("hit").inc()
+    record = json.loads(str(value))
+    return record["version"], HumanLoopStatusResponse.model_validate(record["status"])
+
+
+def cache_entries(humanloop_request: HumanLoopRequest) -> list[tuple[str, str, int]]:
+    """请求的状态记录和详情版本戳 (键, 值, 有效期)，在对象提交过期之前调用"""
+    detail_key, stamp = version_entry(humanloop_request)
+    ttl = settings.HUMANLOOP_STATUS_CACHE_TTL_SECONDS
+    return [
+        (
+            status_key(
+                owner_id=humanloop_request.owner_id,
+                platform=humanloop_request.platform,
+                conversation_id=humanloop_request.conversation_id,
+                request_id=humanloop_request.request_id,
+            ),
+            status_record(humanloop_request),
+            ttl,
+        ),
+        (detail_key, stamp, ttl),
+    ]
+
+
+def store_entries(entries: list[tuple[str, str, int]]) -> None:
+    """提交后写入缓存，一次往返；失败只记录日志，读取时回退到数据库
+
+    并发更新的提交顺序和写入顺序可能不同，按版本条件写入，旧的记录不会覆盖新的记录。
+    """
+    if not entries:
+        return
+    try:
+        store_if_newer(entries)
+    except Exception as e:
+        logger.warning(f"Failed to cache request status: {e}")
+
+
+def cache_request(humanloop_request: HumanLoopRequest) -> None:
+    """查询数据库后回填缓存，不覆盖更新的记录；失败只记录日志"""
+    try:
+        store_if_newer(cache_entries(humanloop_request))
+    except Exception as e:
+        logger.warning(f"Failed to cache request status: {e}")
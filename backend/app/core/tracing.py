@@ -0,0 +1,239 @@
+import functools
+import inspect
+from collections.abc import Callable, Generator
+from typing import Any, TypeVar
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+tracer = trace.get_tracer("app")
+
+_provider: Any = None
+
+
+def setup_tracing() -> None:
+    """初始化 TracerProvider，按 OTEL_TRACES_SAMPLER_RATIO 采样并通过 OTLP 导出
+
+    需要在每个 worker 进程内调用（BatchSpanProcessor 的后台线程不能跨 fork 共享）。
+    """
+    global _provider
+    if not settings.tracing_enabled or _provider is not None:
+        return
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    assert settings.OTEL_EXPORTER_OTLP_ENDPOINT
+    provider = TracerProvider(
+        resource=Resource.create(
+            {
+                SERVICE_NAME: settings.OTEL_SERVICE_NAME,
+                "deployment.environment": settings.ENVIRONMENT,
+            }
+        ),
+        sampler=ParentBased(TraceIdRatioBased(settings.OTEL_TRACES_SAMPLER_RATIO)),
+    )
+    endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/")
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint}/v1/traces"))
+    )
+    trace.set_tracer_provider(provider)
+    _provider = provider
+
+
+def shutdown_tracing() -> None:
+    """导出剩余的 span 并关闭 TracerProvider"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """为函数创建 span 的装饰器，未启用追踪时直接返回原函数，不引入额外开销"""
+
+    def decorator(func: F) -> F:
+        if not settings.tracing_enabled:
+            return func
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(
+                *args: Any, **kwargs: Any
+            ) -> Generator[Any, None, Any]:
+                # span 覆盖整个迭代过程，每次恢复执行时重新设为当前 span，
+                # 生成器可能在不同线程中被逐步消费（如流式响应）
+                span = tracer.start_span(span_name)
+                generator = func(*args, **kwargs)
+                try:
+                    while True:
+                        with trace.use_span(span, end_on_exit=False):
+                            try:
+                                item = next(generator)
+                            except StopIteration as stop:
+                                return stop.value
+                        yield item
+                finally:
+                    generator.close()
+                    span.end()
+
+            return generator_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def instrument_engine_tracing(engine: Engine) -> None:
+    """为每条 SQL 语句创建 span"""
+    if not settings.tracing_enabled:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        _conn: Any,
+        _cursor: Any,
+        statement: str,
+        _parameters: Any,
+        context: Any,
+        _executemany: bool,
+    ) -> None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        span = tracer.start_span(
+            f"postgresql.{operation.lower()}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.operation": operation,
+                "db.statement": statement,
+            },
+        )
+        context._otel_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        _conn: Any,
+        _cursor: Any,
+        _statement: str,
+        _parameters: Any,
+        context: Any,
+        _executemany: bool,
+    ) -> None:
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            span.end()
+            context._otel_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context: Any) -> None:
+        context = exception_context.execution_context
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            context._otel_span = None
+
+
+class MongoCommandTracing(monitoring.CommandListener):
+    """为 MongoDB 命令创建 span（监听器与发起命令的调用在同一线程中同步执行）"""
+
+    def __init__(self) -> None:
+        self._spans: dict[tuple[Any, int], trace.Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        attributes = {
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+        }
+        if isinstance(collection, str):
+            attributes["db.mongodb.collection"] = collection
+        self._spans[(event.connection_id, event.request_id)] = tracer.start_span(
+            f"mongodb.{event.command_name}", kind=SpanKind.CLIENT, attributes=attributes
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.set_status(Status(StatusCode.ERROR, str(event.failure)))
+            span.end()
+
+
+class TracingMiddleware:
+    """为每个 HTTP 请求创建服务端根 span，并从请求头中提取上游的 trace 上下文"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        parent = propagate.extract(carrier)
+        method = scope["method"]
+        token = otel_context.attach(parent)
+        try:
+            with tracer.start_as_current_span(
+                method,
+                kind=SpanKind.SERVER,
+                attributes={"http.method": method, "http.target": scope["path"]},
+            ) as span:
+
+                async def send_wrapper(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        span.set_attribute("http.status_code", message["status"])
+                        if message["status"] >= 500:
+                            span.set_status(Status(StatusCode.ERROR))
+                    await send(message)
+
+                try:
+                    await self.app(scope, receive, send_wrapper)
+                finally:
+                    route = scope.get("route")
+                    route_path = getattr(route, "path", None)
+                    if route_path:
+                        span.update_name(f"{method} {route_path}")
+                        span.set_attribute("http.route", route_path)
+        finally:
+            otel_context.detach(token)
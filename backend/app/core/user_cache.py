@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.metrics import USER_CACHE_INVALIDATIONS, USER_CACHE_LOOKUPS
+from app.core.redis import redis_client, sync_redis_client
+from app.models.models import User
+
+logger = logging.getLogger(__name__)
+
+# 用户变更后向该频道发布用户 ID，所有 worker 收到后清除本地缓存
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+MAX_ENTRIES = 10_000
+
+
+class UserCache:
+    """进程内 JWT 用户缓存：subject -> (过期时间, 用户字段)
+
+    只缓存字段值而不是 ORM 对象，每次命中都在当前 session 中重建实例，
+    避免多个请求共享同一个对象。
+    """
+
+    def __init__(self) -> None:
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, subject: str) -> User | None:
+        if settings.USER_CACHE_TTL_SECONDS <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[subject]
+                entry = None
+        if entry is None:
+            USER_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        USER_CACHE_LOOKUPS.labels("hit").inc()
+        user = User.model_validate(entry[1])
+        # 标记为已持久化的对象后合并进 session，不会触发 SELECT；
+        # 路由中修改后 commit 仍然生成 UPDATE
+        make_transient_to_detached(user)
+        return session.merge(user, load=False)
+
+    def set(self, subject: str, user: User) -> None:
+        if settings.USER_CACHE_TTL_SECONDS <= 0:
+            return
+        expires_at = time.monotonic() + settings.USER_CACHE_TTL_SECONDS
+        with self._lock:
+            self._entries[subject] = (expires_at, user.model_dump())
+            self._entries.move_to_end(subject)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def evict(self, subject: str) -> None:
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(user_id: uuid.UUID | str) -> None:
+    """清除本进程缓存，并通知其他 worker 清除"""
+    subject = str(user_id)
+    user_cache.evict(subject)
+    USER_CACHE_INVALIDATIONS.inc()
+    try:
+        sync_redis_client.publish(INVALIDATION_CHANNEL, subject)
+    except Exception as e:
+        # 发布失败时其他 worker 的缓存最多在 TTL 后过期
+        logger.warning(f"Failed to publish user cache invalidation: {e}")
+
+
+async def listen_for_invalidations() -> None:
+    """订阅失效通知，随应用生命周期运行；断线后清空缓存并重连"""
+    while True:
+        try:
+            pubsub = redis_client.redis_client.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            try:
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        user_cache.evict(str(message["data"]))
+            finally:
+                await pubsub.aclose()  # type: ignore[no-untyped-call]
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"User cache invalidation listener disconnected: {e}")
+            # 断线期间可能错过通知
+            user_cache.clear()
+            await asyncio.sleep(1)
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import time
+import uuid
+from typing import Any
+from urllib.parse import urlsplit
+
+from redis.asyncio import Redis as AsyncRedis
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.email_queue import PROMOTE_DUE_SCRIPT
+from app.core.metrics import WEBHOOK_DELIVERIES
+from app.core.redis import sync_redis_client
+from app.models.models import APIKey, HumanLoopRequest, HumanLoopWebhookPayload
+
+logger = logging.getLogger(__name__)
+
+# 与邮件队列相同的结构：待投递队列、投递中列表、重试集合和死信队列
+QUEUE_KEY = "webhook:queue"
+PROCESSING_KEY = "webhook:processing"
+RETRY_KEY = "webhook:retry"
+DEAD_KEY = "webhook:dead"
+
+# 管理员将请求处理为这些状态时推送给 Agent
+NOTIFY_STATUSES = {
+    "inprogress",
+    "approved",
+    "rejected",
+    "completed",
+    "cancelled",
+    "error",
+    "expired",
+}
+
+SIGNATURE_HEADER = "X-HumanLoop-Signature"
+TIMESTAMP_HEADER = "X-HumanLoop-Timestamp"
+DELIVERY_HEADER = "X-HumanLoop-Delivery"
+
+
+def sign_payload(secret: str, timestamp: str, body: str) -> str:
+    """HMAC-SHA256(secret, "{timestamp}.{body}")，Agent 用自己的 API Key 校验"""
+    digest = hmac.new(
+        secret.encode(), f"{timestamp}.{body}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"sha256={digest}"
+
+
+def resolve_callback_url(
+    humanloop_request: HumanLoopRequest, api_key: APIKey
+) -> str | None:
+    """请求 metadata 中的 callback_url 优先，其次是 API Key 上配置的地址"""
+    metadata = humanloop_request.metadata_ or {}
+    callback_url = metadata.get("callback_url")
+    if isinstance(callback_url, str) and callback_url.startswith(
+        ("http://", "https://")
+    ):
+        return callback_url
+    return api_key.webhook_url
+
+
+def _allowed_hosts() -> set[str]:
+    hosts = settings.WEBHOOK_ALLOWED_HOSTS
+    if isinstance(hosts, str):
+        hosts = [hosts]
+    return {host.strip().lower() for host in hosts if host.strip()}
+
+
+def callback_url_error(url: str) -> str | None:
+    """校验回调地址的格式和 WEBHOOK_ALLOWED_HOSTS 白名单，返回拒绝原因
+
+    不解析 DNS，可以在请求路径中调用；地址是否指向公网由 worker 在投递前校验。
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        return "callback URL must be an absolute http(s) URL"
+    allowed = _allowed_hosts()
+    if allowed and host not in allowed:
+        return f"host {host} is not in WEBHOOK_ALLOWED_HOSTS"
+    return None
+
+
+def _blocked_address(addresses: list[str]) -> str | None:
+    for address in addresses:
+        # IPv6 链路本地地址可能带有 %scope
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if not ip.is_global or ip.is_multicast:
+            return address
+    return None
+
+
+async def resolve_callback_address(url: str) -> tuple[str | None, str | None]:
+    """解析并校验回调地址，防止 SSRF：返回 (投递时连接的地址, 拒绝原因)
+
+    解析主机的全部地址，任一地址不是公网地址（回环、内网、链路本地、保留等）都拒绝，
+    白名单中的主机不做此限制。worker 直接连接返回的地址，发送请求时不再重新解析，
+    避免校验后 DNS 记录被改为内网地址（DNS rebinding）。
+    """
+    error = callback_url_error(url)
+    if error:
+        return None, error
+    host = (urlsplit(url).hostname or "").lower()
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, None, proto=socket.IPPROTO_TCP
+        )
+    except OSError as e:
+        return None, f"host {host} did not resolve: {e}"
+    addresses = [str(info[4][0]) for info in infos]
+    if not addresses:
+        return None, f"host {host} did not resolve"
+    if not _allowed_hosts():
+        blocked = _blocked_address(addresses)
+        if blocked:
+            return None, f"host {host} resolves to non-public address {blocked}"
+    return addresses[0].split("%", 1)[0], None
+
+
+def build_delivery(
+    humanloop_request: HumanLoopRequest, api_key: APIKey, url: str
+) -> dict[str, Any]:
+    """生成投递任务，签名在入队时计算，Redis 中不保存 API Key"""
+    body = HumanLoopWebhookPayload(
+        success=True,
+        status=humanloop_request.status,
+        response=humanloop_request.response,
+        feedback=humanloop_request.feedback,
+        responded_by=humanloop_request.responded_by,
+        responded_at=humanloop_request.responded_at,
+        task_id=humanloop_request.task_id,
+        conversation_id=humanloop_request.conversation_id,
+        request_id=humanloop_request.request_id,
+        platform=humanloop_request.platform,
+    ).model_dump_json()
+    delivery_id = uuid.uuid4().hex
+    timestamp = str(int(time.time()))
+    return {
+        "id": delivery_id,
+        "url": url,
+        "body": body,
+        "headers": {
+            "Content-Type": "application/json",
+            DELIVERY_HEADER: delivery_id,
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: sign_payload(api_key.key, timestamp, body),
+        },
+        "attempts": 0,
+    }
+
+
+def notify_status_change(
+    *, session: Session, humanloop_request: HumanLoopRequest
+) -> bool:
+    """状态变更后将回调加入投递队列，未配置回调或入队失败时返回 False
+
+    入队失败不影响管理员的处理结果，Agent 仍然可以轮询获取状态。
+    """
+    if humanloop_request.status not in NOTIFY_STATUSES:
+        return False
+    if humanloop_request.api_key_id is None:
+        return False
+    api_key = session.get(APIKey, humanloop_request.api_key_id)
+    if api_key is None or not api_key.is_active:
+        return False
+    url = resolve_callback_url(humanloop_request, api_key)
+    if not url:
+        return False
+    error = callback_url_error(url)
+    if error:
+        logger.warning(f"Rejected webhook for {humanloop_request.id}: {error}")
+        WEBHOOK_DELIVERIES.labels("rejected").inc()
+        return False
+
+    delivery = build_delivery(humanloop_request, api_key, url)
+    try:
+        sync_redis_client.lpush(QUEUE_KEY, json.dumps(delivery, ensure_ascii=False))
+    except Exception as e:
+        logger.warning(f"Failed to enqueue webhook for {humanloop_request.id}: {e}")
+        return False
+    WEBHOOK_DELIVERIES.labels("enqueued").inc()
+    return True
+
+
+def retry_delay(attempts: int) -> float:
+    """指数退避：base * 2^(attempts-1)，最长 1 小时"""
+    return float(
+        min(settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), 3600)
+    )
+
+
+class WebhookQueue:
+    """webhook worker 使用的队列操作（异步客户端）"""
+
+    def __init__(self, client: AsyncRedis) -> None:
+        self.client = client
+        self._promote_due = self.client.register_script(PROMOTE_DUE_SCRIPT)
+
+    async def pop(self, timeout: int = 1) -> str | None:
+        """阻塞取出一个任务并移入投递中列表"""
+        raw = await self.client.blmove(
+            QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT"
+        )
+        return str(raw) if raw is not None else None
+
+    async def ack(self, raw: str) -> None:
+        await self.client.lrem(PROCESSING_KEY, 1, raw)  # type: ignore[misc]
+
+    async def fail(
+        self, raw: str, delivery: dict[str, Any], error: str, *, retry: bool = True
+    ) -> None:
+        """记录失败：可重试且未超过最大次数时放入重试集合，否则进入死信队列"""
+        delivery["attempts"] = int(delivery.get("attempts", 0)) + 1
+        delivery["last_error"] = error
+        payload = json.dumps(delivery, ensure_ascii=False)
+        pipe = self.client.pipeline()
+        if not retry or delivery["attempts"] >= settings.WEBHOOK_MAX_ATTEMPTS:
+            pipe.lpush(DEAD_KEY, payload)
+            WEBHOOK_DELIVERIES.labels("failed").inc()
+        else:
+            pipe.zadd(
+                RETRY_KEY, {payload: time.time() + retry_delay(delivery["attempts"])}
+            )
+            WEBHOOK_DELIVERIES.labels("retried").inc()
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        await pipe.execute()
+
+    async def defer(self, raw: str, delay: float) -> None:
+        """稍后再投递，不计入重试次数"""
+        pipe = self.client.pipeline()
+        pipe.zadd(RETRY_KEY, {raw: time.time() + delay})
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        await pipe.execute()
+
+    async def bury(self, raw: str, error: str) -> None:
+        """无法解析的任务原样放入死信队列"""
+        payload = json.dumps({"raw": raw, "last_error": error}, ensure_ascii=False)
+        pipe = self.client.pipeline()
+        pipe.lpush(DEAD_KEY, payload)
+        pipe.lrem(PROCESSING_KEY, 1, raw)
+        await pipe.execute()
+        WEBHOOK_DELIVERIES.labels("failed").inc()
+
+    async def promote_due(self, batch: int = 100) -> int:
+        return int(
+            await self._promote_due(
+                keys=[RETRY_KEY, QUEUE_KEY], args=[time.time(), batch]
+            )
+        )
+
+    async def requeue_processing(self) -> int:
+        """worker 启动时将上次未完成的任务放回待投递队列"""
+        count = 0
+        while await self.client.lmove(PROCESSING_KEY, QUEUE_KEY, "RIGHT", "LEFT"):
+            count += 1
+        return count
@@ -1,12 +1,19 @@
 import secrets
 import uuid
+from collections.abc import Iterator
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import and_
-from sqlmodel import Session, desc, select
+from sqlalchemy import and_, update
+from sqlalchemy import select as sa_select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, desc, func, select
 
+from app.core.live_events import publish_events, request_event
 from app.core.security import get_password_hash, verify_password
+from app.core.status_cache import cache_entries, store_entries
+from app.core.tracing import traced
+from app.core.user_cache import invalidate_user
 from app.models.models import (
     APIKey,
     APIKeyCreate,
@@ -20,16 +27,24 @@ from app.models.models import (
 )
 
 
-def create_user(*, session: Session, user_create: UserCreate) -> User:
+@traced()
+def create_user(
+    *, session: Session, user_create: UserCreate, hashed_password: str | None = None
+) -> User:
+    """hashed_password 为已在密码进程池中计算好的哈希，未提供时同步计算"""
     db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+        user_create,
+        update={
+            "hashed_password": hashed_password
+            or get_password_hash(user_create.password)
+        },
     )
     session.add(db_obj)
     session.commit()
-    session.refresh(db_obj)
     return db_obj
 
 
+@traced()
 def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     user_data = user_in.model_dump(exclude_unset=True)
     extra_data = {}
@@ -40,16 +55,29 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
-    session.refresh(db_user)
+    invalidate_user(db_user.id)
     return db_user
 
 
+@traced()
+def update_user_password(
+    *, session: Session, db_user: User, hashed_password: str
+) -> None:
+    user_id = db_user.id
+    db_user.hashed_password = hashed_password
+    session.add(db_user)
+    session.commit()
+    invalidate_user(user_id)
+
+
+@traced()
 def get_user_by_email(*, session: Session, email: str) -> User | None:
     statement = select(User).where(User.email == email)
     session_user = session.exec(statement).first()
     return session_user
 
 
+@traced()
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
@@ -64,6 +92,7 @@ def generate_api_key() -> str:
     return secrets.token_urlsafe(32)
 
 
+@traced()
 def create_api_key(
     *, session: Session, api_key_in: APIKeyCreate, owner_id: uuid.UUID
 ) -> APIKey:
@@ -73,23 +102,27 @@ def create_api_key(
     )
     session.add(db_api_key)
     session.commit()
-    session.refresh(db_api_key)
     return db_api_key
 
 
+@traced()
 def get_api_key_by_key(*, session: Session, key: str) -> APIKey | None:
     statement = select(APIKey).where(APIKey.key == key, APIKey.is_active)
     return session.exec(statement).first()
 
 
-def update_api_key_last_used(*, session: Session, api_key: APIKey) -> APIKey:
-    api_key.last_used_at = datetime.utcnow()
-    session.add(api_key)
+@traced()
+def touch_api_key_last_used(
+    *, session: Session, api_key_id: uuid.UUID, used_at: datetime
+) -> None:
+    """只执行一条 UPDATE，不加载对象，供后台写入使用"""
+    session.execute(
+        update(APIKey).where(col(APIKey.id) == api_key_id).values(last_used_at=used_at)
+    )
     session.commit()
-    session.refresh(api_key)
-    return api_key
 
 
+@traced()
 def get_user_api_keys(*, session: Session, owner_id: uuid.UUID) -> list[APIKey]:
     statement = (
         select(APIKey)
@@ -99,6 +132,7 @@ def get_user_api_keys(*, session: Session, owner_id: uuid.UUID) -> list[APIKey]:
     return list(session.exec(statement).all())
 
 
+@traced()
 def update_api_key(
     *, session: Session, db_api_key: APIKey, api_key_in: APIKeyUpdate
 ) -> APIKey:
@@ -106,10 +140,10 @@ def update_api_key(
     db_api_key.sqlmodel_update(api_key_data)
     session.add(db_api_key)
     session.commit()
-    session.refresh(db_api_key)
     return db_api_key
 
 
+@traced()
 def delete_api_key(*, session: Session, api_key: APIKey) -> bool:
     session.delete(api_key)
     session.commit()
@@ -117,19 +151,80 @@ def delete_api_key(*, session: Session, api_key: APIKey) -> bool:
 
 
 # Human Loop CRUD operations
+@traced()
 def create_humanloop_request(
-    *, session: Session, request_in: HumanLoopRequestCreate, owner_id: uuid.UUID
+    *,
+    session: Session,
+    request_in: HumanLoopRequestCreate,
+    owner_id: uuid.UUID,
+    api_key_id: uuid.UUID | None = None,
 ) -> HumanLoopRequest:
     """创建人机循环请求"""
-    db_request = HumanLoopRequest.model_validate(
-        request_in, update={"owner_id": owner_id}
+    db_request = _new_humanloop_request(
+        request_in, owner_id=owner_id, api_key_id=api_key_id
     )
     session.add(db_request)
+    # 字段值都在客户端生成，提交前生成缓存记录和事件，提交后不再重新查询
+    cached = cache_entries(db_request)
+    event = request_event("created", db_request)
     session.commit()
-    session.refresh(db_request)
+    store_entries(cached)
+    publish_events([event])
     return db_request
 
 
+def _new_humanloop_request(
+    request_in: HumanLoopRequestCreate,
+    *,
+    owner_id: uuid.UUID,
+    api_key_id: uuid.UUID | None,
+) -> HumanLoopRequest:
+    # 按别名取值：对象上的 metadata 属性是 SQLModel 的 MetaData
+    return HumanLoopRequest.model_validate(
+        {
+            **request_in.model_dump(by_alias=True),
+            "owner_id": owner_id,
+            "api_key_id": api_key_id,
+        }
+    )
+
+
+@traced()
+def bulk_create_humanloop_requests(
+    *,
+    session: Session,
+    requests_in: list[HumanLoopRequestCreate],
+    owner_id: uuid.UUID,
+    api_key_id: uuid.UUID | None = None,
+) -> list[HumanLoopRequest]:
+    """批量创建人机循环请求，已存在的请求跳过，返回新建的请求
+
+    一条多行 INSERT ... ON CONFLICT DO NOTHING RETURNING 完成，不逐条查询是否存在
+    """
+    rows = [
+        _new_humanloop_request(
+            request_in, owner_id=owner_id, api_key_id=api_key_id
+        ).model_dump(exclude={"search_text"})
+        for request_in in requests_in
+    ]
+    statement = (
+        pg_insert(HumanLoopRequest)
+        .on_conflict_do_nothing(
+            index_elements=["owner_id", "platform", "conversation_id", "request_id"]
+        )
+        .returning(HumanLoopRequest)
+    )
+    created = list(session.scalars(statement, rows))
+    # 提交后对象会过期，在提交前生成缓存记录和事件
+    cached = [entry for request in created for entry in cache_entries(request)]
+    events = [request_event("created", request) for request in created]
+    session.commit()
+    store_entries(cached)
+    publish_events(events)
+    return created
+
+
+@traced()
 def get_humanloop_request(
     *,
     session: Session,
@@ -148,6 +243,7 @@ def get_humanloop_request(
     return session.exec(statement).first()
 
 
+@traced()
 def get_humanloop_requests_by_conversation(
     *, session: Session, conversation_id: str, platform: str, owner_id: uuid.UUID
 ) -> list[HumanLoopRequest]:
@@ -160,6 +256,7 @@ def get_humanloop_requests_by_conversation(
     return list(session.exec(statement).all())
 
 
+@traced()
 def get_pending_humanloop_requests_by_conversation(
     *, session: Session, conversation_id: str, platform: str, owner_id: uuid.UUID
 ) -> list[HumanLoopRequest]:
@@ -173,6 +270,7 @@ def get_pending_humanloop_requests_by_conversation(
     return list(session.exec(statement).all())
 
 
+@traced()
 def update_humanloop_request(
     *,
     session: Session,
@@ -182,26 +280,37 @@ def update_humanloop_request(
     """更新人机循环请求"""
     request_data = request_in.model_dump(exclude_unset=True)
     if request_data:
+        previous_status = db_request.status
         request_data["updated_at"] = datetime.utcnow()
         db_request.sqlmodel_update(request_data)
         session.add(db_request)
+        event = "cancelled" if db_request.status == "cancelled" else "updated"
+        cached = cache_entries(db_request)
+        events = [request_event(event, db_request, previous_status)]
         session.commit()
-        session.refresh(db_request)
+        store_entries(cached)
+        publish_events(events)
     return db_request
 
 
+@traced()
 def cancel_humanloop_request(
     *, session: Session, db_request: HumanLoopRequest
 ) -> HumanLoopRequest:
     """取消人机循环请求"""
+    previous_status = db_request.status
     db_request.status = "cancelled"
     db_request.updated_at = datetime.utcnow()
     session.add(db_request)
+    cached = cache_entries(db_request)
+    events = [request_event("cancelled", db_request, previous_status)]
     session.commit()
-    session.refresh(db_request)
+    store_entries(cached)
+    publish_events(events)
     return db_request
 
 
+@traced()
 def cancel_conversation_requests(
     *, session: Session, conversation_id: str, platform: str, owner_id: uuid.UUID
 ) -> int:
@@ -214,19 +323,28 @@ def cancel_conversation_requests(
     )
 
     count = 0
+    events = []
+    cached = []
     for request in pending_requests:
+        previous_status = request.status
         request.status = "cancelled"
         request.updated_at = datetime.utcnow()
         session.add(request)
+        # 提交后对象会过期，在提交前生成事件和缓存记录，避免逐行重新查询
+        events.append(request_event("cancelled", request, previous_status))
+        cached.extend(cache_entries(request))
         count += 1
 
     if count > 0:
         session.commit()
+        store_entries(cached)
+        publish_events(events)
 
     return count
 
 
 # Admin Human Loop CRUD operations for management backend
+@traced()
 def get_humanloop_request_by_id(
     *, session: Session, request_id: uuid.UUID, owner_id: uuid.UUID | None = None
 ) -> HumanLoopRequest | None:
@@ -237,25 +355,20 @@ def get_humanloop_request_by_id(
     return session.exec(statement).first()
 
 
-def get_humanloop_requests_with_filters(
+def _humanloop_filter_conditions(
     *,
-    session: Session,
     loop_type: str | None = None,
     status: str | None = None,
     platform: str | None = None,
     created_at_start: str | None = None,
     created_at_end: str | None = None,
-    skip: int = 0,
-    limit: int = 100,
     owner_id: uuid.UUID | None = None,
-) -> list[HumanLoopRequest]:
-    """根据过滤条件获取人机循环请求列表（管理后台使用）"""
-    from datetime import datetime as dt
-
-    from sqlmodel import desc
-
-    statement = select(HumanLoopRequest)
-
+    context_contains: dict[str, Any] | None = None,
+    metadata_contains: dict[str, Any] | None = None,
+    response_contains: dict[str, Any] | None = None,
+    q: str | None = None,
+) -> list[Any]:
+    """构建人机循环请求的过滤条件（列表查询与计数共用）"""
     conditions: list[Any] = []
     if owner_id:
         conditions.append(HumanLoopRequest.owner_id == owner_id)
@@ -269,29 +382,138 @@ def get_humanloop_requests_with_filters(
     # 添加时间范围筛选
     if created_at_start:
         try:
-            start_date = dt.strptime(created_at_start, "%Y-%m-%d")
+            start_date = datetime.strptime(created_at_start, "%Y-%m-%d")
             conditions.append(HumanLoopRequest.created_at >= start_date)
         except ValueError:
             pass  # 忽略无效的日期格式
 
     if created_at_end:
         try:
-            end_date = dt.strptime(created_at_end, "%Y-%m-%d")
+            end_date = datetime.strptime(created_at_end, "%Y-%m-%d")
             # 设置为当天的23:59:59
             end_date = end_date.replace(hour=23, minute=59, second=59)
             conditions.append(HumanLoopRequest.created_at <= end_date)
         except ValueError:
             pass  # 忽略无效的日期格式
 
+    # JSONB 包含查询 (@>)，可命中 jsonb_path_ops GIN 索引
+    if context_contains:
+        conditions.append(col(HumanLoopRequest.context).contains(context_contains))
+    if metadata_contains:
+        conditions.append(col(HumanLoopRequest.metadata_).contains(metadata_contains))
+    if response_contains:
+        conditions.append(col(HumanLoopRequest.response).contains(response_contains))
+
+    # 关键词检索，每个词都需出现，命中 search_text 上的 pg_trgm GIN 索引
+    if q:
+        conditions.extend(
+            col(HumanLoopRequest.search_text).ilike(
+                f"%{_escape_like(term)}%", escape="\\"
+            )
+            for term in q.split()
+        )
+
+    return conditions
+
+
+def _escape_like(term: str) -> str:
+    """转义 LIKE 通配符，检索词按字面匹配"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@traced()
+def get_humanloop_requests_with_filters(
+    *,
+    session: Session,
+    loop_type: str | None = None,
+    status: str | None = None,
+    platform: str | None = None,
+    created_at_start: str | None = None,
+    created_at_end: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: uuid.UUID | None = None,
+    context_contains: dict[str, Any] | None = None,
+    metadata_contains: dict[str, Any] | None = None,
+    response_contains: dict[str, Any] | None = None,
+    q: str | None = None,
+) -> list[HumanLoopRequest]:
+    """根据过滤条件获取人机循环请求列表（管理后台使用）"""
+    statement = select(HumanLoopRequest)
+
+    conditions = _humanloop_filter_conditions(
+        loop_type=loop_type,
+        status=status,
+        platform=platform,
+        created_at_start=created_at_start,
+        created_at_end=created_at_end,
+        owner_id=owner_id,
+        context_contains=context_contains,
+        metadata_contains=metadata_contains,
+        response_contains=response_contains,
+        q=q,
+    )
     if conditions:
         statement = statement.where(and_(*conditions))
 
-    # 按创建时间倒序排列
+    # 有检索词时按相关度排序，其次按创建时间倒序排列
+    if q:
+        rank = func.word_similarity(q, HumanLoopRequest.search_text)
+        statement = statement.order_by(desc(rank))
     statement = statement.order_by(desc(HumanLoopRequest.created_at))
     statement = statement.offset(skip).limit(limit)
     return list(session.exec(statement).all())
 
 
+@traced()
+def iter_humanloop_requests_with_filters(
+    *,
+    session: Session,
+    loop_type: str | None = None,
+    status: str | None = None,
+    platform: str | None = None,
+    created_at_start: str | None = None,
+    created_at_end: str | None = None,
+    owner_id: uuid.UUID | None = None,
+    context_contains: dict[str, Any] | None = None,
+    metadata_contains: dict[str, Any] | None = None,
+    response_contains: dict[str, Any] | None = None,
+    q: str | None = None,
+    batch_size: int = 1000,
+) -> Iterator[dict[str, Any]]:
+    """按过滤条件流式遍历人机循环请求（数据导出使用）
+
+    使用服务端游标(yield_per)分批拉取，逐行返回列字典，内存占用与总行数无关。
+    """
+    columns = [
+        column
+        for column in HumanLoopRequest.__table__.columns  # type: ignore[attr-defined]
+        if column.name != "search_text"
+    ]
+    statement = sa_select(*columns)
+
+    conditions = _humanloop_filter_conditions(
+        loop_type=loop_type,
+        status=status,
+        platform=platform,
+        created_at_start=created_at_start,
+        created_at_end=created_at_end,
+        owner_id=owner_id,
+        context_contains=context_contains,
+        metadata_contains=metadata_contains,
+        response_contains=response_contains,
+        q=q,
+    )
+    if conditions:
+        statement = statement.where(and_(*conditions))
+
+    statement = statement.order_by(desc(HumanLoopRequest.created_at))
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for row in result.mappings():
+        yield dict(row)
+
+
+@traced()
 def count_humanloop_requests_with_filters(
     *,
     session: Session,
@@ -301,47 +523,33 @@ def count_humanloop_requests_with_filters(
     created_at_start: str | None = None,
     created_at_end: str | None = None,
     owner_id: uuid.UUID | None = None,
+    context_contains: dict[str, Any] | None = None,
+    metadata_contains: dict[str, Any] | None = None,
+    response_contains: dict[str, Any] | None = None,
+    q: str | None = None,
 ) -> int:
     """统计符合过滤条件的人机循环请求数量（管理后台使用）"""
-    from datetime import datetime as dt
-
-    from sqlmodel import func
-
     statement = select(func.count()).select_from(HumanLoopRequest)
 
-    conditions: list[Any] = []
-    if owner_id:
-        conditions.append(HumanLoopRequest.owner_id == owner_id)
-    if loop_type:
-        conditions.append(HumanLoopRequest.loop_type == loop_type)
-    if status:
-        conditions.append(HumanLoopRequest.status == status)
-    if platform:
-        conditions.append(HumanLoopRequest.platform == platform)
-
-    # 添加时间范围筛选
-    if created_at_start:
-        try:
-            start_date = dt.strptime(created_at_start, "%Y-%m-%d")
-            conditions.append(HumanLoopRequest.created_at >= start_date)
-        except ValueError:
-            pass  # 忽略无效的日期格式
-
-    if created_at_end:
-        try:
-            end_date = dt.strptime(created_at_end, "%Y-%m-%d")
-            # 设置为当天的23:59:59
-            end_date = end_date.replace(hour=23, minute=59, second=59)
-            conditions.append(HumanLoopRequest.created_at <= end_date)
-        except ValueError:
-            pass  # 忽略无效的日期格式
-
+    conditions = _humanloop_filter_conditions(
+        loop_type=loop_type,
+        status=status,
+        platform=platform,
+        created_at_start=created_at_start,
+        created_at_end=created_at_end,
+        owner_id=owner_id,
+        context_contains=context_contains,
+        metadata_contains=metadata_contains,
+        response_contains=response_contains,
+        q=q,
+    )
     if conditions:
         statement = statement.where(and_(*conditions))
 
-    return len(list(session.exec(statement).all()))
+    return session.exec(statement).one()
 
 
+@traced()
 def get_humanloop_stats(
     *, session: Session, owner_id: uuid.UUID | None = None
 ) -> dict[str, dict[str, int] | int]:
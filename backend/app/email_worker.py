@@ -0,0 +1,126 @@
+"""邮件发送 worker
+
+从 Redis 队列中取出 API 入队的邮件并发送：
+
+- EMAIL_WORKER_CONCURRENCY 个线程并行发送，每个线程保持一条 SMTP 长连接
+- 发送失败按指数退避重试，超过 EMAIL_MAX_ATTEMPTS 次进入死信队列
+- 在 EMAIL_WORKER_METRICS_PORT 端口提供 Prometheus 指标
+
+运行：python app/email_worker.py
+"""
+
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any
+
+from emails.backend import SMTPBackend  # type: ignore
+from prometheus_client import start_http_server
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.email_queue import EmailQueue
+from app.core.log import setup_logging
+from app.utils import preload_email_templates, send_email, smtp_options
+
+logger = logging.getLogger(__name__)
+
+
+class EmailSender(threading.Thread):
+    """发送线程，独占一条 SMTP 连接，断开后由 SMTPBackend 自动重连"""
+
+    def __init__(self, index: int, queue: EmailQueue, stop: threading.Event) -> None:
+        super().__init__(name=f"email-sender-{index}", daemon=True)
+        self.queue = queue
+        self.stop = stop
+        self.backend: Any = SMTPBackend(**smtp_options())
+
+    def run(self) -> None:
+        try:
+            while not self.stop.is_set():
+                raw = self.queue.pop(timeout=1)
+                if raw is not None:
+                    self.process(raw)
+        finally:
+            self.backend.close()
+
+    def process(self, raw: str) -> None:
+        job = json.loads(raw)
+        start = time.perf_counter()
+        try:
+            response = send_email(
+                email_to=job["email_to"],
+                subject=job["subject"],
+                html_content=job["html_content"],
+                smtp=self.backend,
+            )
+            error = None if response and response.success else repr(response)
+        except Exception as e:
+            error = str(e)
+        metrics.EMAIL_SEND_DURATION.observe(time.perf_counter() - start)
+
+        if error is None:
+            self.queue.ack(raw)
+            metrics.EMAIL_JOBS.labels("sent").inc()
+            return
+
+        logger.warning(
+            f"Email job {job['id']} to {job['email_to']} failed "
+            f"(attempt {int(job.get('attempts', 0)) + 1}): {error}"
+        )
+        # 出错后丢弃当前连接，下一封邮件重新建立
+        self.backend.close()
+        self.queue.fail(raw, job, error)
+
+
+def main() -> None:
+    setup_logging()
+    if not settings.emails_enabled:
+        logger.error("SMTP_HOST / EMAILS_FROM_EMAIL not configured, exiting")
+        sys.exit(1)
+
+    preload_email_templates()
+    start_http_server(
+        settings.EMAIL_WORKER_METRICS_PORT, registry=metrics.collector_registry()
+    )
+
+    queue = EmailQueue()
+    requeued = queue.requeue_processing()
+    if requeued:
+        logger.info(f"Requeued {requeued} unfinished email jobs")
+
+    stop = threading.Event()
+
+    def handle_signal(_signum: int, _frame: FrameType | None) -> None:
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    senders = [
+        EmailSender(index, queue, stop)
+        for index in range(settings.EMAIL_WORKER_CONCURRENCY)
+    ]
+    for sender in senders:
+        sender.start()
+    logger.info(f"Email worker started with {len(senders)} senders")
+
+    while not stop.is_set():
+        try:
+            queue.promote_due()
+            queue.update_depth_metrics()
+        except Exception as e:
+            logger.error(f"Email queue maintenance failed: {e}")
+        stop.wait(1.0)
+
+    for sender in senders:
+        sender.join()
+    logger.info("Email worker stopped")
+
+
+if __name__ == "__main__":
+    main()
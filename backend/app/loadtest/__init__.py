@@ -0,0 +1,4 @@
+"""Agent 接口与管理后台接口的压测工具
+
+用法见 ``python -m app.loadtest --help`` 以及 docs/loadtest.md。
+"""
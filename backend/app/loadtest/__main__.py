@@ -0,0 +1,249 @@
+"""压测入口
+
+两种运行方式：
+
+- 对接已启动的服务（如 docker-compose）::
+
+    python -m app.loadtest --base-url http://localhost:8000
+
+  压测数据直接写入 .env 中配置的 PostgreSQL / MongoDB。
+
+- 进程内运行（不经过网络），MongoDB / Redis 使用 mongomock / fakeredis 代替::
+
+    python -m app.loadtest --seed-requests 100000 --output baseline.json
+
+  PostgreSQL 仍使用 .env 中的配置（JSONB、生成列等特性无法用 SQLite 代替），
+  建议指向一个临时的 Postgres 容器，缺失的表会自动创建。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import AbstractAsyncContextManager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from sqlmodel import Session, SQLModel
+
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.loadtest.runner import compare_reports, run_scenario
+from app.loadtest.scenarios import SCENARIOS, LoadState
+from app.loadtest.seed import ensure_load_user, seed_humanloop_requests, seed_tasks
+
+logger = logging.getLogger("app.loadtest")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.loadtest", description="GoHumanLoopHub 接口压测"
+    )
+    parser.add_argument(
+        "--base-url", help="被测服务地址，不指定时在进程内运行并使用本地替身"
+    )
+    parser.add_argument("--requests", type=int, default=500, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个场景的预热请求数")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"逗号分隔的场景列表，可选: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--seed-requests", type=int, default=10_000, help="预先写入的人机循环请求数"
+    )
+    parser.add_argument(
+        "--seed-tasks", type=int, default=1_000, help="预先写入的 MongoDB 任务数"
+    )
+    parser.add_argument("--output", type=Path, help="将结果写入 JSON 文件")
+    parser.add_argument("--compare", type=Path, help="与之前的 JSON 结果对比")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=20.0,
+        help="p95 延迟退化超过该百分比时以非零状态退出",
+    )
+    return parser.parse_args(argv)
+
+
+def build_in_process_app() -> tuple[FastAPI, Any]:
+    """加载应用并将 MongoDB / Redis 替换为 mongomock / fakeredis"""
+    try:
+        import fakeredis
+        import mongomock  # type: ignore
+    except ImportError:
+        sys.exit("In-process mode requires mongomock and fakeredis (uv sync --dev)")
+
+    from app.core import mongodb
+    from app.core import redis as redis_module
+    from app.main import app
+
+    mongo_client = mongomock.MongoClient()
+    mongo = mongo_client[settings.MONGODB_DB]
+    # lifespan 中的 init_mongodb 会 ping mongo_client
+    mongodb.mongo_client = mongo_client
+    app.dependency_overrides[mongodb.get_mongo_db] = lambda: mongo
+    app.dependency_overrides[mongodb.get_mongo_read_db] = lambda: mongo
+
+    # 同步和异步客户端共用一个 FakeServer，发布/订阅等跨客户端的操作才能互通
+    server = fakeredis.FakeServer()
+    redis_module.redis_client.redis_client = fakeredis.FakeAsyncRedis(  # type: ignore[assignment]
+        server=server, decode_responses=True
+    )
+    # status_cache、etag、live_events 等模块在导入时绑定了同步客户端，逐个替换
+    original = redis_module.sync_redis_client
+    sync_redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and (
+            getattr(module, "sync_redis_client", None) is original
+        ):
+            module.sync_redis_client = sync_redis  # type: ignore[attr-defined]
+    return app, mongo
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def login(
+    client: httpx.AsyncClient, *, email: str, password: str
+) -> dict[str, str]:
+    response = await client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    )
+    response.raise_for_status()
+    token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    started_at = datetime.utcnow()
+    run_id = f"lt{int(time.time())}"
+    if args.base_url:
+        from app.core.mongodb import mongo_db
+
+        mongo: Any = mongo_db
+        lifespan: AbstractAsyncContextManager[Any] = nullcontext()
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        app, mongo = build_in_process_app()
+        # ASGITransport 不会触发 lifespan，启动/关闭逻辑需要手动运行
+        lifespan = app.router.lifespan_context(app)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=60,
+        )
+
+    logger.info("Seeding %s humanloop requests", args.seed_requests)
+    with Session(engine) as session:
+        if not args.base_url:
+            SQLModel.metadata.create_all(engine)
+            init_db(session)
+        user, password, api_key = ensure_load_user(session)
+        request_keys = seed_humanloop_requests(
+            session, owner_id=user.id, count=args.seed_requests, run_id=run_id
+        )
+    logger.info("Seeding %s tasks", args.seed_tasks)
+    task_ids = seed_tasks(
+        mongo, user_id=str(user.id), count=args.seed_tasks, run_id=run_id
+    )
+
+    endpoints: dict[str, Any] = {}
+    async with lifespan, client:
+        state = LoadState(
+            run_id=run_id,
+            user_id=str(user.id),
+            api_headers={"Authorization": f"Bearer {api_key}"},
+            user_headers=await login(client, email=user.email, password=password),
+            admin_headers=await login(
+                client,
+                email=settings.FIRST_SUPERUSER,
+                password=settings.FIRST_SUPERUSER_PASSWORD,
+            ),
+            request_keys=request_keys,
+            task_ids=task_ids,
+            rng=random.Random(0),
+        )
+        for name in names:
+            logger.info("Running %s", name)
+            result = await run_scenario(
+                client,
+                state,
+                name,
+                SCENARIOS[name],
+                requests=args.requests,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+            )
+            endpoints[name] = result.summary()
+            logger.info("%s: %s", name, json.dumps(endpoints[name]))
+
+    return {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "mode": "http" if args.base_url else "in-process",
+            "base_url": args.base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": {
+                "humanloop_requests": args.seed_requests,
+                "tasks": args.seed_tasks,
+            },
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    # 压测期间关闭逐请求日志，避免日志输出影响结果
+    for name in ("app.request", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n")
+    print(output)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        lines, regressed = compare_reports(
+            baseline, report, max_regression=args.max_regression
+        )
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
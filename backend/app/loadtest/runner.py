@@ -0,0 +1,112 @@
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from app.loadtest.scenarios import LoadState, ScenarioFunc, is_failure
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    failures: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> dict[str, Any]:
+        completed = len(self.latencies)
+        result: dict[str, Any] = {
+            "requests": completed + self.errors,
+            "errors": self.errors,
+            "failures": self.failures,
+            "throughput_rps": round(completed / self.elapsed, 2)
+            if self.elapsed
+            else 0.0,
+        }
+        if completed:
+            latencies_ms = sorted(latency * 1000 for latency in self.latencies)
+            # n=100 的分位点，下标 49/94/98 即 p50/p95/p99
+            cuts = (
+                statistics.quantiles(latencies_ms, n=100, method="inclusive")
+                if completed > 1
+                else [latencies_ms[0]] * 99
+            )
+            result["latency_ms"] = {
+                "mean": round(statistics.fmean(latencies_ms), 2),
+                "p50": round(cuts[49], 2),
+                "p95": round(cuts[94], 2),
+                "p99": round(cuts[98], 2),
+                "max": round(latencies_ms[-1], 2),
+            }
+        return result
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    state: LoadState,
+    name: str,
+    scenario: ScenarioFunc,
+    *,
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+) -> ScenarioResult:
+    """以固定并发执行场景，共发送 requests 个请求（预热请求不计入结果）"""
+    for _ in range(warmup):
+        await scenario(client, state)
+
+    result = ScenarioResult(name=name)
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, state)
+            except httpx.HTTPError:
+                result.errors += 1
+                continue
+            result.latencies.append(time.perf_counter() - start)
+            if is_failure(response):
+                result.failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def compare_reports(
+    baseline: dict[str, Any], current: dict[str, Any], *, max_regression: float
+) -> tuple[list[str], bool]:
+    """对比两份报告，返回输出行以及是否存在超过阈值的 p95 退化"""
+    lines = [
+        f"{'endpoint':<12} {'metric':<16} {'baseline':>10} {'current':>10} {'change':>9}"
+    ]
+    regressed = False
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or "latency_ms" not in before or "latency_ms" not in now:
+            lines.append(f"{name:<12} (no baseline)")
+            continue
+        metrics = [
+            (f"{key}_ms", before["latency_ms"][key], now["latency_ms"][key])
+            for key in ("p50", "p95", "p99")
+        ]
+        metrics.append(
+            ("throughput_rps", before["throughput_rps"], now["throughput_rps"])
+        )
+        for metric, old, new in metrics:
+            change = (new - old) / old * 100 if old else 0.0
+            lines.append(
+                f"{name:<12} {metric:<16} {old:>10.2f} {new:>10.2f} {change:>+8.1f}%"
+            )
+            if metric == "p95_ms" and change > max_regression:
+                regressed = True
+    return lines, regressed
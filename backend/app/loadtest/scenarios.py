@@ -0,0 +1,164 @@
+import itertools
+import random
+from collections.abc import Awaitable, Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from app.core.config import settings
+from app.loadtest.seed import LOOP_TYPES, PLATFORMS, build_task, random_text
+
+API = settings.API_V1_STR
+
+
+@dataclass
+class LoadState:
+    """压测过程中各场景共享的数据"""
+
+    run_id: str
+    user_id: str
+    api_headers: dict[str, str]
+    # 压测用户的登录令牌：管理后台列表只返回当前用户的数据
+    user_headers: dict[str, str]
+    # 超级管理员令牌：仪表盘统计需要超级管理员权限，统计范围是全部用户
+    admin_headers: dict[str, str]
+    request_keys: list[tuple[str, str, str]]
+    task_ids: list[str]
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+    # create 场景新建的 pending 请求，供 cancel 场景取消
+    created_keys: list[tuple[str, str, str]] = field(default_factory=list)
+    counter: Iterator[int] = field(default_factory=itertools.count)
+
+    def next_id(self) -> int:
+        return next(self.counter)
+
+    def random_request_key(self) -> tuple[str, str, str]:
+        return self.rng.choice(self.request_keys)
+
+
+ScenarioFunc = Callable[[httpx.AsyncClient, LoadState], Awaitable[httpx.Response]]
+
+
+async def create_request(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    n = state.next_id()
+    conversation_id = f"{state.run_id}-new{n}"
+    platform = state.rng.choice(PLATFORMS)
+    response = await client.post(
+        f"{API}/humanloop/request",
+        headers=state.api_headers,
+        json={
+            "task_id": f"task-{conversation_id}",
+            "conversation_id": conversation_id,
+            "request_id": "req0",
+            "loop_type": state.rng.choice(LOOP_TYPES),
+            "platform": platform,
+            "context": {
+                "message": random_text(state.rng, 12),
+                "question": random_text(state.rng, 6),
+            },
+            "metadata": {"source": "loadtest"},
+        },
+    )
+    state.created_keys.append((conversation_id, "req0", platform))
+    return response
+
+
+async def get_status(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    conversation_id, request_id, platform = state.random_request_key()
+    return await client.get(
+        f"{API}/humanloop/status",
+        headers=state.api_headers,
+        params={
+            "conversation_id": conversation_id,
+            "request_id": request_id,
+            "platform": platform,
+        },
+    )
+
+
+async def continue_request(
+    client: httpx.AsyncClient, state: LoadState
+) -> httpx.Response:
+    conversation_id, request_id, platform = state.random_request_key()
+    return await client.post(
+        f"{API}/humanloop/continue",
+        headers=state.api_headers,
+        json={
+            "task_id": f"task-{conversation_id}",
+            "conversation_id": conversation_id,
+            "request_id": request_id,
+            "platform": platform,
+            "context": {"message": random_text(state.rng, 12)},
+            "metadata": {"source": "loadtest", "continued": True},
+        },
+    )
+
+
+async def cancel_request(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    # 优先取消 create 场景新建的 pending 请求，用完后退化为随机请求
+    if state.created_keys:
+        conversation_id, request_id, platform = state.created_keys.pop()
+    else:
+        conversation_id, request_id, platform = state.random_request_key()
+    return await client.post(
+        f"{API}/humanloop/cancel",
+        headers=state.api_headers,
+        json={
+            "conversation_id": conversation_id,
+            "request_id": request_id,
+            "platform": platform,
+        },
+    )
+
+
+async def sync_task(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    # 一半新建任务、一半全量更新已有任务
+    if state.task_ids and state.rng.random() < 0.5:
+        task_id = state.rng.choice(state.task_ids)
+    else:
+        task_id = f"{state.run_id}-sync{state.next_id()}"
+    return await client.post(
+        f"{API}/humanloop/tasks/sync",
+        headers=state.api_headers,
+        json=build_task(state.rng, task_id=task_id, user_id=state.user_id),
+    )
+
+
+async def admin_list(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    return await client.get(
+        f"{API}/admin/humanloop/requests",
+        headers=state.user_headers,
+        params={"skip": state.rng.randint(0, 20) * 50, "limit": 50},
+    )
+
+
+async def dashboard_stats(
+    client: httpx.AsyncClient, state: LoadState
+) -> httpx.Response:
+    return await client.get(
+        f"{API}/humanloop/admin/dashboard/stats", headers=state.admin_headers
+    )
+
+
+# 按执行顺序排列：cancel 依赖 create 新建的请求
+SCENARIOS: dict[str, ScenarioFunc] = {
+    "create": create_request,
+    "status": get_status,
+    "continue": continue_request,
+    "cancel": cancel_request,
+    "tasks_sync": sync_task,
+    "admin_list": admin_list,
+    "dashboard": dashboard_stats,
+}
+
+
+def is_failure(response: httpx.Response) -> bool:
+    """HTTP 错误或业务层返回 success=false 均视为失败"""
+    if response.status_code >= 400:
+        return True
+    try:
+        body: Any = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and body.get("success") is False
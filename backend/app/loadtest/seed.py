@@ -0,0 +1,243 @@
+import random
+import secrets
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from pymongo.database import Database
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app import crud
+from app.core.security import get_password_hash
+from app.models.models import (
+    APIKeyCreate,
+    APIKeyUpdate,
+    HumanLoopRequest,
+    User,
+    UserCreate,
+)
+
+LOAD_USER_EMAIL = "loadtest@example.com"
+LOAD_RATE_LIMIT = 1_000_000
+
+LOOP_TYPES = ["conversation", "approval", "information"]
+PLATFORMS = ["wechat", "feishu", "other"]
+# 按线上大致比例分布：大部分请求已处理完成
+STATUS_WEIGHTS = {
+    "pending": 15,
+    "inprogress": 5,
+    "completed": 40,
+    "approved": 20,
+    "rejected": 10,
+    "cancelled": 5,
+    "error": 3,
+    "expired": 2,
+}
+WORDS = [
+    "订单",
+    "退款",
+    "审批",
+    "合同",
+    "发票",
+    "报销",
+    "客户",
+    "部署",
+    "数据库",
+    "权限",
+    "invoice",
+    "refund",
+    "deploy",
+    "approval",
+    "customer",
+]
+
+# 状态查询等场景从已写入的数据中抽样，只保留有限数量的主键
+MAX_SAMPLE_KEYS = 20_000
+
+
+def ensure_load_user(session: Session) -> tuple[User, str, str]:
+    """创建（或复用）压测用户，返回用户、本次的登录密码和新生成的 API Key
+
+    每次运行都重置密码，管理后台场景以该用户登录，查询到的是压测写入的数据
+    """
+    password = secrets.token_urlsafe(16)
+    user = crud.get_user_by_email(session=session, email=LOAD_USER_EMAIL)
+    if not user:
+        user = crud.create_user(
+            session=session,
+            user_create=UserCreate(
+                email=LOAD_USER_EMAIL, password=password, full_name="Load Test"
+            ),
+        )
+    else:
+        crud.update_user_password(
+            session=session,
+            db_user=user,
+            hashed_password=get_password_hash(password),
+        )
+    api_key = crud.create_api_key(
+        session=session,
+        api_key_in=APIKeyCreate(name="loadtest", description="created by loadtest"),
+        owner_id=user.id,
+    )
+    # 压测 Key 的限流阈值调到足够高：令牌桶脚本仍然执行，但不会返回 429
+    api_key = crud.update_api_key(
+        session=session,
+        db_api_key=api_key,
+        api_key_in=APIKeyUpdate(
+            rate_limit_per_minute=LOAD_RATE_LIMIT, rate_limit_burst=LOAD_RATE_LIMIT
+        ),
+    )
+    return user, password, api_key.key
+
+
+def random_text(rng: random.Random, words: int = 8) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def build_humanloop_row(
+    rng: random.Random,
+    *,
+    owner_id: uuid.UUID,
+    conversation_id: str,
+    request_id: str,
+    now: datetime,
+) -> dict[str, Any]:
+    status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+    created_at = now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600))
+    responded = status not in ("pending", "inprogress", "expired")
+    return {
+        "id": uuid.uuid4(),
+        "task_id": f"task-{conversation_id}",
+        "conversation_id": conversation_id,
+        "request_id": request_id,
+        "loop_type": rng.choice(LOOP_TYPES),
+        "platform": rng.choice(PLATFORMS),
+        "status": status,
+        "context": {
+            "message": random_text(rng, 12),
+            "question": random_text(rng, 6),
+            "priority": rng.choice(["low", "normal", "high"]),
+        },
+        "metadata_": {"source": "loadtest", "region": rng.choice(["cn", "us", "eu"])},
+        "response": {"decision": status, "comment": random_text(rng, 4)}
+        if responded
+        else None,
+        "feedback": random_text(rng, 5) if responded else None,
+        "responded_by": f"reviewer{rng.randint(1, 50)}" if responded else None,
+        "responded_at": created_at + timedelta(minutes=rng.randint(1, 600))
+        if responded
+        else None,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "owner_id": owner_id,
+    }
+
+
+def seed_humanloop_requests(
+    session: Session,
+    *,
+    owner_id: uuid.UUID,
+    count: int,
+    run_id: str,
+    batch_size: int = 5000,
+    seed: int = 0,
+) -> list[tuple[str, str, str]]:
+    """批量写入人机循环请求，返回 (conversation_id, request_id, platform) 样本"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    sample: list[tuple[str, str, str]] = []
+    batch: list[dict[str, Any]] = []
+    for i in range(count):
+        # 每个对话 3 个请求
+        conversation_id = f"{run_id}-conv{i // 3}"
+        row = build_humanloop_row(
+            rng,
+            owner_id=owner_id,
+            conversation_id=conversation_id,
+            request_id=f"req{i}",
+            now=now,
+        )
+        batch.append(row)
+        if len(sample) < MAX_SAMPLE_KEYS:
+            sample.append((row["conversation_id"], row["request_id"], row["platform"]))
+        if len(batch) >= batch_size:
+            session.execute(insert(HumanLoopRequest), batch)
+            session.commit()
+            batch.clear()
+    if batch:
+        session.execute(insert(HumanLoopRequest), batch)
+        session.commit()
+    return sample
+
+
+def build_task(
+    rng: random.Random,
+    *,
+    task_id: str,
+    user_id: str,
+    conversations: int = 3,
+    requests_per_conversation: int = 5,
+) -> dict[str, Any]:
+    """生成与客户端同步格式一致的任务数据（时间字段为 ISO 字符串）"""
+    now = datetime.utcnow()
+    return {
+        "task_id": task_id,
+        "user_id": user_id,
+        "timestamp": now.isoformat(),
+        "created_at": now.isoformat(),
+        "updated_at": now.isoformat(),
+        "metadata": {
+            "source": "loadtest",
+            "client_ip": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "user_agent": "gohumanloop-loadtest",
+        },
+        "conversations": [
+            {
+                "conversation_id": f"{task_id}-conv{c}",
+                "provider_id": rng.choice(PLATFORMS),
+                "requests": [
+                    {
+                        "request_id": f"req{r}",
+                        "status": rng.choice(list(STATUS_WEIGHTS)),
+                        "loop_type": rng.choice(LOOP_TYPES),
+                        "response": {"comment": random_text(rng, 6)},
+                        "feedback": random_text(rng, 4),
+                        "responded_by": f"reviewer{rng.randint(1, 50)}",
+                        "responded_at": now.isoformat(),
+                    }
+                    for r in range(requests_per_conversation)
+                ],
+            }
+            for c in range(conversations)
+        ],
+    }
+
+
+def seed_tasks(
+    db: Database[dict[str, Any]],
+    *,
+    user_id: str,
+    count: int,
+    run_id: str,
+    batch_size: int = 1000,
+    seed: int = 0,
+) -> list[str]:
+    """批量写入 MongoDB 任务，返回 task_id 样本"""
+    rng = random.Random(seed)
+    sample: list[str] = []
+    batch: list[dict[str, Any]] = []
+    for i in range(count):
+        task = build_task(rng, task_id=f"{run_id}-task{i}", user_id=user_id)
+        for field in ("timestamp", "created_at", "updated_at"):
+            task[field] = datetime.fromisoformat(task[field])
+        batch.append(task)
+        if len(sample) < MAX_SAMPLE_KEYS:
+            sample.append(task["task_id"])
+        if len(batch) >= batch_size:
+            db.tasks.insert_many(batch)
+            batch.clear()
+    if batch:
+        db.tasks.insert_many(batch)
+    return sample
@@ -1,21 +1,35 @@
+import asyncio
 import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import Any
 
 import sentry_sdk
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from fastapi.routing import APIRoute
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
-from app.api.main import api_router
+from app.api.main import api_router, custom_generate_unique_id
+from app.api.middleware import (
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+    RequestLoggingMiddleware,
+)
+from app.core import metrics
 from app.core.config import settings
+from app.core.db import shutdown_background_writes
+from app.core.live_events import live_feed_hub
+from app.core.log import setup_logging
 from app.core.mongodb import init_mongodb
-
-# 配置日志
-logging.basicConfig(level=logging.INFO)
+from app.core.password_pool import shutdown_password_pool, start_password_pool
+from app.core.redis import redis_client
+from app.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from app.core.user_cache import listen_for_invalidations
+from app.utils import preload_email_templates
+
+# 配置日志（经队列异步输出，不阻塞请求处理）
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -23,11 +37,19 @@ logger = logging.getLogger(__name__)
 async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
     # 在应用启动时初始化 MongoDB
     init_mongodb()
+    preload_email_templates()
+    setup_tracing()
+    start_password_pool()
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
+    live_feed_listener = asyncio.create_task(live_feed_hub.listen())
     yield
-
-
-def custom_generate_unique_id(route: APIRoute) -> str:
-    return f"{route.tags[0]}-{route.name}"
+    live_feed_listener.cancel()
+    invalidation_listener.cancel()
+    shutdown_password_pool()
+    shutdown_background_writes()
+    shutdown_tracing()
+    await redis_client.close()
+    metrics.mark_process_dead()
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
@@ -37,6 +59,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -48,8 +71,11 @@ async def validation_exception_handler(
 ) -> JSONResponse:
     # 记录详细的验证错误信息
     logger.error(f"Validation error for {request.method} {request.url}:")
+    body = await request.body()
+    max_body = settings.REQUEST_LOG_BODY_MAX_BYTES
     logger.error(
-        f"Request body: {(await request.body()).decode('utf-8', errors='replace')}"
+        f"Request body ({len(body)} bytes): "
+        f"{body[:max_body].decode('utf-8', errors='replace')}"
     )
     logger.error(f"Validation errors: {exc.errors()}")
 
@@ -74,21 +100,22 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+# 结构化请求日志（采样、请求体截断、按路由关闭）
+app.add_middleware(RequestLoggingMiddleware)
 
+# 统计每个请求的 SQL 语句数和耗时，检测循环内逐行查询（需位于请求日志中间件外层）
+app.add_middleware(QueryStatsMiddleware)
 
-# 添加请求日志中间件
-@app.middleware("http")
-async def log_requests(request: Request, call_next: Any) -> Any:
-    # 记录请求信息
-    logger.info(f"Request: {request.method} {request.url}")
-    if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
-        logger.info(f"Request body: {body.decode('utf-8') if body else 'Empty'}")
+# Prometheus 指标
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics.metrics_endpoint, include_in_schema=False)
 
-    response = await call_next(request)
+# OpenTelemetry 链路追踪，span 覆盖路由处理与响应序列化
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
 
-    # 记录响应状态
-    logger.info(f"Response status: {response.status_code}")
+# 压缩较大的响应（包括流式导出），客户端需发送 Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-    return response
+app.include_router(api_router, prefix=settings.API_V1_STR)
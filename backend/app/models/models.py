@@ -1,8 +1,10 @@
 import uuid
 from datetime import datetime
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Literal, TypeVar
 
-from pydantic import EmailStr
+from pydantic import EmailStr, model_validator
+from sqlalchemy import Column, Computed, Index, Text, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -131,6 +133,12 @@ class APIKeyBase(SQLModel):
         default=None, max_length=500, description="API Key描述"
     )
     is_active: bool = Field(default=True, description="是否激活")
+    webhook_url: str | None = Field(
+        default=None,
+        max_length=2048,
+        schema_extra={"pattern": r"^https?://"},
+        description="状态变更回调地址，设置后无需轮询 /humanloop/status",
+    )
 
 
 class APIKeyCreate(APIKeyBase):
@@ -141,6 +149,12 @@ class APIKeyUpdate(SQLModel):
     name: str | None = Field(default=None, max_length=255)
     description: str | None = Field(default=None, max_length=500)
     is_active: bool | None = Field(default=None)
+    webhook_url: str | None = Field(
+        default=None, max_length=2048, schema_extra={"pattern": r"^https?://"}
+    )
+    # 限流配置仅超级管理员可修改
+    rate_limit_per_minute: int | None = Field(default=None, ge=1)
+    rate_limit_burst: int | None = Field(default=None, ge=1)
 
 
 class APIKey(APIKeyBase, table=True):
@@ -151,6 +165,12 @@ class APIKey(APIKeyBase, table=True):
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_used_at: datetime | None = Field(default=None)
+    rate_limit_per_minute: int | None = Field(
+        default=None, description="每分钟请求数，为空时使用全局配置"
+    )
+    rate_limit_burst: int | None = Field(
+        default=None, description="突发请求数（令牌桶容量），为空时使用全局配置"
+    )
     owner: User | None = Relationship(back_populates="api_keys")
 
 
@@ -160,6 +180,8 @@ class APIKeyPublic(APIKeyBase):
     owner_id: uuid.UUID
     created_at: datetime
     last_used_at: datetime | None
+    rate_limit_per_minute: int | None
+    rate_limit_burst: int | None
 
 
 class APIKeysPublic(SQLModel):
@@ -181,12 +203,12 @@ class HumanLoopRequestBase(SQLModel):
         max_length=50,
         description="状态: pending | approved | rejected | error| expired| inprogress | completed | cancelled",
     )
-    context: dict[str, Any] = Field(sa_type=JSON, description="上下文信息")
+    context: dict[str, Any] = Field(sa_type=JSONB, description="上下文信息")
     metadata_: dict[str, Any] | None = Field(
-        sa_type=JSON, description="元数据", alias="metadata"
+        sa_type=JSONB, description="元数据", alias="metadata"
     )
     response: dict[str, Any] | None = Field(
-        default=None, sa_type=JSON, description="响应数据"
+        default=None, sa_type=JSONB, description="响应数据"
     )
     feedback: str | None = Field(default=None, max_length=1000, description="反馈信息")
     responded_by: str | None = Field(default=None, max_length=255, description="响应人")
@@ -205,6 +227,34 @@ class HumanLoopRequestCreate(SQLModel):
     )
 
 
+# 单次批量创建的请求数上限
+HUMANLOOP_BULK_CREATE_MAX_ITEMS = 500
+
+
+class HumanLoopBulkCreateRequest(SQLModel):
+    requests: list[HumanLoopRequestCreate] = Field(
+        min_length=1,
+        max_length=HUMANLOOP_BULK_CREATE_MAX_ITEMS,
+        description="待创建的请求",
+    )
+
+
+class HumanLoopBulkCreateItem(SQLModel):
+    conversation_id: str
+    request_id: str
+    platform: str
+    status: Literal["created", "exists"] = Field(
+        description="created: 新建 | exists: 已存在，未做修改"
+    )
+    id: uuid.UUID | None = Field(default=None, description="新建请求的ID")
+
+
+class HumanLoopBulkCreateResult(SQLModel):
+    created: int = Field(description="新建的请求数")
+    existing: int = Field(description="已存在的请求数")
+    items: list[HumanLoopBulkCreateItem] = Field(description="按提交顺序的逐项结果")
+
+
 class HumanLoopRequestUpdate(SQLModel):
     status: str | None = Field(default=None, max_length=50)
     response: dict[str, Any] | None = Field(default=None, sa_type=JSON)
@@ -213,7 +263,56 @@ class HumanLoopRequestUpdate(SQLModel):
     responded_at: datetime | None = Field(default=None)
 
 
+# 检索文本：问题文本(context.message / context.question)、反馈和响应人，
+# 使用 pg_trgm 三元组索引，不依赖分词，中文等 CJK 文本也能检索
+HUMANLOOP_SEARCH_TEXT_EXPR = (
+    "coalesce(context ->> 'message', '') || ' ' || "
+    "coalesce(context ->> 'question', '') || ' ' || "
+    "coalesce(feedback, '') || ' ' || "
+    "coalesce(responded_by, '')"
+)
+
+
 class HumanLoopRequest(HumanLoopRequestBase, table=True):
+    __table_args__ = (
+        # 请求的业务标识，/humanloop/status 等按它查询，批量创建按它跳过已存在的请求
+        UniqueConstraint(
+            "owner_id",
+            "platform",
+            "conversation_id",
+            "request_id",
+            name="uq_humanlooprequest_owner_platform_conversation_request",
+        ),
+        # JSONB 字段使用 jsonb_path_ops GIN 索引，支持 @> 包含查询
+        Index(
+            "ix_humanlooprequest_context_gin",
+            "context",
+            postgresql_using="gin",
+            postgresql_ops={"context": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_humanlooprequest_metadata_gin",
+            "metadata_",
+            postgresql_using="gin",
+            postgresql_ops={"metadata_": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_humanlooprequest_response_gin",
+            "response",
+            postgresql_using="gin",
+            postgresql_ops={"response": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_humanlooprequest_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
+    # INSERT / UPDATE 通过 RETURNING 取回数据库生成的 search_text，
+    # 写入后不需要再查询一次
+    __mapper_args__ = {"eager_defaults": True}
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="创建时间"
@@ -225,6 +324,15 @@ class HumanLoopRequest(HumanLoopRequestBase, table=True):
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
     )
     owner: User | None = Relationship(back_populates="human_loop_requests")
+    # 创建请求所用的 API Key，用于查找回调地址和签名
+    api_key_id: uuid.UUID | None = Field(
+        default=None, foreign_key="apikey.id", ondelete="SET NULL"
+    )
+    # 数据库生成列，只读
+    search_text: str | None = Field(
+        default=None,
+        sa_column=Column(Text, Computed(HUMANLOOP_SEARCH_TEXT_EXPR, persisted=True)),
+    )
 
 
 class HumanLoopRequestPublic(HumanLoopRequestBase):
@@ -233,6 +341,16 @@ class HumanLoopRequestPublic(HumanLoopRequestBase):
     updated_at: datetime
     owner_id: uuid.UUID
 
+    @model_validator(mode="before")
+    @classmethod
+    def _from_table_model(cls, data: Any) -> Any:
+        # 表模型上的 metadata 属性是 SQLAlchemy MetaData，按字段名取值后再转换
+        if isinstance(data, HumanLoopRequest):
+            values = data.model_dump()
+            values["metadata"] = values.pop("metadata_")
+            return values
+        return data
+
 
 class HumanLoopRequestsPublic(SQLModel):
     data: list[HumanLoopRequestPublic]
@@ -249,6 +367,15 @@ class HumanLoopStatusResponse(SQLModel):
     responded_at: datetime | None = Field(default=None, description="响应时间")
 
 
+class HumanLoopWebhookPayload(HumanLoopStatusResponse):
+    """回调推送内容：状态查询响应加上请求标识"""
+
+    task_id: str
+    conversation_id: str
+    request_id: str
+    platform: str
+
+
 class HumanLoopCancelRequest(SQLModel):
     conversation_id: str = Field(max_length=255)
     request_id: str = Field(max_length=255)
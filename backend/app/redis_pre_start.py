@@ -2,7 +2,7 @@ import logging
 
 from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
 
-from app.core.redis import redis_client
+from app.core.redis import sync_redis_client
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ wait_seconds = 1
 def init() -> None:
     try:
         # 尝试连接Redis并执行ping命令
-        redis_client.redis_client.ping()
+        sync_redis_client.ping()
         logger.info("Redis连接成功")
     except Exception as e:
         logger.error(f"Redis连接失败: {e}")
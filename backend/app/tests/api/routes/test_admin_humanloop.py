@@ -0,0 +1,161 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models.models import HumanLoopRequestCreate, User
+from app.tests.utils.utils import random_lower_string
+
+REQUESTS_URL = f"{settings.API_V1_STR}/admin/humanloop/requests"
+EXPORT_URL = f"{REQUESTS_URL}/export"
+
+
+def create_superuser_requests(
+    db: Session, marker: str, count: int, question: str = ""
+) -> None:
+    user = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert isinstance(user, User)
+    for i in range(count):
+        crud.create_humanloop_request(
+            session=db,
+            request_in=HumanLoopRequestCreate(
+                task_id="task-admin",
+                conversation_id=f"conv-{marker}",
+                request_id=f"req-{i}",
+                loop_type="approval",
+                platform="other",
+                context={
+                    "marker": marker,
+                    "index": i,
+                    "question": f"{question} {marker}-{i}",
+                },
+                metadata={"source": "test"},
+            ),
+            owner_id=user.id,
+        )
+
+
+def test_filter_by_context_containment(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    marker = random_lower_string()
+    create_superuser_requests(db, marker, 2)
+
+    r = client.get(
+        REQUESTS_URL,
+        headers=superuser_token_headers,
+        params={"context": json.dumps({"marker": marker, "index": 1})},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    assert content["count"] == 1
+    assert [item["request_id"] for item in content["data"]] == ["req-1"]
+    assert content["data"][0]["metadata"] == {"source": "test"}
+
+
+def test_filter_with_malformed_json(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        REQUESTS_URL, headers=superuser_token_headers, params={"context": "not-json"}
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid JSON in 'context' filter"
+
+    r = client.get(
+        REQUESTS_URL, headers=superuser_token_headers, params={"metadata": "[1, 2]"}
+    )
+    assert r.status_code == 400
+    assert r.json()["detail"] == "'metadata' filter must be a JSON object"
+
+
+def test_count_ignores_pagination(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    marker = random_lower_string()
+    create_superuser_requests(db, marker, 3)
+
+    r = client.get(
+        REQUESTS_URL,
+        headers=superuser_token_headers,
+        params={"context": json.dumps({"marker": marker}), "limit": 1},
+    )
+    assert r.status_code == 200
+    content = r.json()
+    # 总数来自 count 查询，不受 limit 影响
+    assert content["count"] == 3
+    assert len(content["data"]) == 1
+
+
+def test_search_matches_cjk_substrings(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    marker = random_lower_string()
+    create_superuser_requests(db, marker, 2, question="请审批订单退款申请")
+
+    def search(q: str) -> list[str]:
+        r = client.get(REQUESTS_URL, headers=superuser_token_headers, params={"q": q})
+        assert r.status_code == 200
+        return sorted(item["request_id"] for item in r.json()["data"])
+
+    # 中文没有空格分词，按子串匹配
+    assert search(f"退款 {marker}") == ["req-0", "req-1"]
+    assert search(f"订单退款 {marker}-1") == ["req-1"]
+    # 每个词都需出现
+    assert search(f"发货 {marker}") == []
+    # LIKE 通配符按字面匹配
+    assert search(f"{marker} %") == []
+    assert search(f"{marker}_0") == []
+
+
+def test_export_ndjson(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    marker = random_lower_string()
+    create_superuser_requests(db, marker, 2)
+
+    r = client.get(
+        EXPORT_URL,
+        headers=superuser_token_headers,
+        params={"context": json.dumps({"marker": marker})},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    assert r.headers["content-disposition"].endswith('.ndjson"')
+    records = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(record["request_id"] for record in records) == ["req-0", "req-1"]
+    assert records[0]["metadata"] == {"source": "test"}
+    assert records[0]["context"]["marker"] == marker
+
+
+def test_export_csv(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    marker = random_lower_string()
+    create_superuser_requests(db, marker, 2)
+
+    r = client.get(
+        EXPORT_URL,
+        headers=superuser_token_headers,
+        params={"format": "csv", "context": json.dumps({"marker": marker})},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert r.headers["content-disposition"].endswith('.csv"')
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert sorted(row["request_id"] for row in rows) == ["req-0", "req-1"]
+    assert json.loads(rows[0]["metadata"]) == {"source": "test"}
+    assert "search_text" not in rows[0]
+
+
+def test_export_rejects_unknown_format(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        EXPORT_URL, headers=superuser_token_headers, params={"format": "xml"}
+    )
+    assert r.status_code == 422
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from app.api.routes.admin_tasks import FLAT_TASK_FIELDS, flatten_task
+
+
+def test_flatten_task() -> None:
+    """测试任务展开为每个请求一行"""
+    now = datetime.utcnow()
+    task = {
+        "_id": "60d21b4667d0d8992e610c85",
+        "task_id": "task123",
+        "user_id": "user123",
+        "timestamp": now,
+        "created_at": now,
+        "updated_at": now,
+        "metadata": {"source": "web", "client_ip": "127.0.0.1", "user_agent": "ua"},
+        "conversations": [
+            {
+                "conversation_id": "conv1",
+                "provider_id": "provider1",
+                "requests": [
+                    {"request_id": "req1", "status": "completed", "response": "ok"},
+                    {"request_id": "req2", "status": "approved", "response": {"a": 1}},
+                ],
+            },
+            {"conversation_id": "conv2", "provider_id": "provider1", "requests": []},
+        ],
+    }
+
+    rows = list(flatten_task(task))
+
+    assert len(rows) == 2
+    assert all(list(row) == FLAT_TASK_FIELDS for row in rows)
+    assert rows[0]["conversation_id"] == "conv1"
+    assert rows[0]["source"] == "web"
+    assert rows[1]["request_id"] == "req2"
+    assert rows[1]["response"] == '{"a": 1}'
@@ -1,8 +1,12 @@
+import uuid
 from datetime import datetime, timezone
 
 from fastapi.testclient import TestClient
+from sqlmodel import Session
 
+from app import crud
 from app.core.config import settings
+from app.models.models import APIKeyCreate, User
 
 # 创建任务的测试数据
 task_data = {
@@ -127,3 +131,38 @@ def test_get_sync_logs(
         headers=superuser_token_headers,
     )
     assert response.status_code in [200, 404]  # 404 if endpoint doesn't exist
+
+
+def test_sync_task_idempotent_retry(client: TestClient, db: Session) -> None:
+    """测试携带相同 Idempotency-Key 重试同一个任务时返回第一次的结果"""
+    user = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert isinstance(user, User)
+    api_key = crud.create_api_key(
+        session=db, api_key_in=APIKeyCreate(name="idempotency"), owner_id=user.id
+    )
+    headers = {
+        "Authorization": f"Bearer {api_key.key}",
+        "Idempotency-Key": uuid.uuid4().hex,
+    }
+    body = {**task_data, "task_id": f"task-{uuid.uuid4().hex}"}
+
+    first = client.post(
+        f"{settings.API_V1_STR}/humanloop/tasks/sync", json=body, headers=headers
+    )
+    assert first.status_code == 201
+    assert first.json()["success"] is True
+
+    # 重试时 TaskModel 的 created_at/updated_at 默认值会重新生成，不能被当作不同的请求体
+    retry = client.post(
+        f"{settings.API_V1_STR}/humanloop/tasks/sync", json=body, headers=headers
+    )
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+
+    conflict = client.post(
+        f"{settings.API_V1_STR}/humanloop/tasks/sync",
+        json={**body, "task_id": f"task-{uuid.uuid4().hex}"},
+        headers=headers,
+    )
+    assert conflict.status_code == 422
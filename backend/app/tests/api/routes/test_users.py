@@ -8,7 +8,11 @@ from app import crud
 from app.core.config import settings
 from app.core.security import verify_password
 from app.models.models import User, UserCreate
-from app.tests.utils.utils import random_email, random_lower_string
+from app.tests.utils.utils import (
+    assert_query_budget,
+    random_email,
+    random_lower_string,
+)
 
 
 def test_get_users_superuser_me(
@@ -22,6 +26,7 @@ def test_get_users_superuser_me(
     assert user_data["is_active"] is True
     assert user_data["is_superuser"]
     assert user_data["email"] == settings.FIRST_SUPERUSER
+    assert_query_budget(r, 1)
 
 
 def test_get_users_normal_user_me(
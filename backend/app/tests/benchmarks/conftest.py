@@ -0,0 +1,58 @@
+import os
+import uuid
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, col, delete
+
+from app import crud
+from app.loadtest.seed import seed_humanloop_requests
+from app.models.models import HumanLoopRequest, User, UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+pytest.importorskip("pytest_benchmark")
+
+BENCHMARK_DIR = Path(__file__).parent
+
+SeededOwner = tuple[uuid.UUID, list[tuple[str, str, str]]]
+
+# 数据规模：10000 / 100000 / 1000000，逗号分隔，默认只跑 10k
+SCALES = [
+    int(scale) for scale in os.environ.get("BENCHMARK_SCALES", "10000").split(",")
+]
+
+
+def pytest_collection_modifyitems(
+    config: pytest.Config, items: list[pytest.Item]
+) -> None:
+    """基准测试需要写入大量数据，只在 --benchmark-only 时运行"""
+    if config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark-only")
+    for item in items:
+        if BENCHMARK_DIR in Path(str(item.path)).parents:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda scale: f"{scale}rows")
+def seeded_owner(
+    request: pytest.FixtureRequest, db: Session
+) -> Generator[SeededOwner, None, None]:
+    """为每个数据规模创建独立用户并写入人机循环请求，返回 (owner_id, 主键样本)"""
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    keys = seed_humanloop_requests(
+        db,
+        owner_id=user.id,
+        count=request.param,
+        run_id=f"bench{request.param}",
+    )
+    yield user.id, keys
+    db.execute(
+        delete(HumanLoopRequest).where(col(HumanLoopRequest.owner_id) == user.id)
+    )
+    db.execute(delete(User).where(col(User.id) == user.id))
+    db.commit()
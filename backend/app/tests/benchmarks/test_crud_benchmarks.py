@@ -0,0 +1,66 @@
+import itertools
+import random
+
+from pytest_benchmark.fixture import BenchmarkFixture  # type: ignore
+from sqlmodel import Session
+
+from app import crud
+from app.tests.benchmarks.conftest import SeededOwner
+
+
+def test_get_humanloop_request(
+    benchmark: BenchmarkFixture, db: Session, seeded_owner: SeededOwner
+) -> None:
+    owner_id, keys = seeded_owner
+    sample = random.Random(0).sample(keys, min(len(keys), 1000))
+    key_cycle = itertools.cycle(sample)
+
+    def lookup() -> None:
+        conversation_id, request_id, platform = next(key_cycle)
+        assert crud.get_humanloop_request(
+            session=db,
+            conversation_id=conversation_id,
+            request_id=request_id,
+            platform=platform,
+            owner_id=owner_id,
+        )
+
+    benchmark(lookup)
+
+
+def test_get_humanloop_requests_with_filters(
+    benchmark: BenchmarkFixture, db: Session, seeded_owner: SeededOwner
+) -> None:
+    owner_id, _ = seeded_owner
+    result = benchmark(
+        crud.get_humanloop_requests_with_filters,
+        session=db,
+        owner_id=owner_id,
+        status="pending",
+        skip=0,
+        limit=100,
+    )
+    assert result
+
+
+def test_get_humanloop_requests_with_filters_search(
+    benchmark: BenchmarkFixture, db: Session, seeded_owner: SeededOwner
+) -> None:
+    owner_id, _ = seeded_owner
+    benchmark(
+        crud.get_humanloop_requests_with_filters,
+        session=db,
+        owner_id=owner_id,
+        q="退款 approval",
+        skip=0,
+        limit=100,
+    )
+
+
+def test_get_humanloop_stats(
+    benchmark: BenchmarkFixture, db: Session, seeded_owner: SeededOwner
+) -> None:
+    owner_id, keys = seeded_owner
+    stats = benchmark(crud.get_humanloop_stats, session=db, owner_id=owner_id)
+    # 主键样本最多保留 MAX_SAMPLE_KEYS 条，总数不少于样本数
+    assert stats["total"] >= len(keys)
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture  # type: ignore
+from sqlmodel import Session
+
+from app import crud
+from app.core.security import get_password_hash, verify_password
+from app.loadtest.seed import build_task
+from app.models.models import HumanLoopRequestPublic
+from app.models.mongodb_models import TaskModel
+from app.tests.benchmarks.conftest import SeededOwner
+
+
+@pytest.mark.parametrize("size", [1000, 10000])
+def test_humanloop_request_public_model_validate(
+    benchmark: BenchmarkFixture, db: Session, seeded_owner: SeededOwner, size: int
+) -> None:
+    owner_id, _ = seeded_owner
+    rows = crud.get_humanloop_requests_with_filters(
+        session=db, owner_id=owner_id, skip=0, limit=size
+    )
+
+    def validate() -> list[HumanLoopRequestPublic]:
+        return [HumanLoopRequestPublic.model_validate(row) for row in rows]
+
+    assert len(benchmark(validate)) == len(rows)
+
+
+@pytest.mark.parametrize(
+    "conversations,requests_per_conversation", [(10, 10), (50, 20)]
+)
+def test_task_model_dump(
+    benchmark: BenchmarkFixture, conversations: int, requests_per_conversation: int
+) -> None:
+    task = TaskModel.model_validate(
+        build_task(
+            random.Random(0),
+            task_id="bench-task",
+            user_id="bench-user",
+            conversations=conversations,
+            requests_per_conversation=requests_per_conversation,
+        )
+    )
+    dumped = benchmark(task.model_dump)
+    assert len(dumped["conversations"]) == conversations
+
+
+def test_verify_password(benchmark: BenchmarkFixture) -> None:
+    hashed_password = get_password_hash("benchmark-password")
+    assert benchmark(verify_password, "benchmark-password", hashed_password)
@@ -24,6 +24,8 @@ def db() -> Generator[Session, None, None]:
 
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
+    # 在响应头中返回 SQL 语句数，用于断言接口的查询预算
+    settings.DB_QUERY_STATS_HEADERS = True
     with TestClient(app) as c:
         yield c
 
@@ -0,0 +1,95 @@
+from sqlmodel import Session
+
+from app import crud
+from app.core.db import engine
+from app.models.models import HumanLoopRequestCreate, HumanLoopRequestUpdate, UserCreate
+from app.tests.utils.utils import (
+    assert_max_queries,
+    random_email,
+    random_lower_string,
+)
+
+
+def make_request_in(request_id: str) -> HumanLoopRequestCreate:
+    return HumanLoopRequestCreate(
+        task_id="task-bulk",
+        conversation_id="conv-bulk",
+        request_id=request_id,
+        loop_type="approval",
+        platform="other",
+        context={"question": request_id},
+        metadata={"source": "test"},
+    )
+
+
+def test_bulk_create_skips_existing_requests(db: Session) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    first = crud.bulk_create_humanloop_requests(
+        session=db,
+        requests_in=[make_request_in("r1"), make_request_in("r2")],
+        owner_id=user.id,
+    )
+    assert sorted(request.request_id for request in first) == ["r1", "r2"]
+    assert first[0].metadata_ == {"source": "test"}
+
+    # 已存在的请求和同一批次中重复的请求都不会再次创建
+    second = crud.bulk_create_humanloop_requests(
+        session=db,
+        requests_in=[
+            make_request_in("r2"),
+            make_request_in("r3"),
+            make_request_in("r3"),
+        ],
+        owner_id=user.id,
+    )
+    assert [request.request_id for request in second] == ["r3"]
+    assert (
+        len(
+            crud.get_humanloop_requests_by_conversation(
+                session=db,
+                conversation_id="conv-bulk",
+                platform="other",
+                owner_id=user.id,
+            )
+        )
+        == 3
+    )
+
+
+def test_create_and_update_without_refresh(db: Session) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    # 与 get_db 相同的会话配置：提交后不过期，读取属性不会重新查询
+    with Session(engine, expire_on_commit=False) as session:
+        # INSERT ... RETURNING 取回生成列，不再 SELECT
+        with assert_max_queries(1):
+            created = crud.create_humanloop_request(
+                session=session, request_in=make_request_in("single"), owner_id=user.id
+            )
+            assert created.metadata_ == {"source": "test"}
+            assert "single" in (created.search_text or "")
+
+        with assert_max_queries(1):
+            updated = crud.update_humanloop_request(
+                session=session,
+                db_request=created,
+                request_in=HumanLoopRequestUpdate(status="approved", feedback="ok"),
+            )
+            assert (updated.status, updated.feedback) == ("approved", "ok")
+            assert "ok" in (updated.search_text or "")
+
+    stored = crud.get_humanloop_request(
+        session=db,
+        conversation_id="conv-bulk",
+        request_id="single",
+        platform="other",
+        owner_id=user.id,
+    )
+    assert stored is not None
+    assert (stored.status, stored.feedback) == ("approved", "ok")
+    assert stored.updated_at == updated.updated_at
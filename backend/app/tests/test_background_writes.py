@@ -0,0 +1,37 @@
+import threading
+from collections.abc import Callable
+
+import pytest
+from sqlmodel import Session
+
+from app.core import db
+
+
+def first_write(_session: Session) -> None:
+    pass
+
+
+def second_write(_session: Session) -> None:
+    pass
+
+
+def test_background_writes_survive_shutdown(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试关闭后再次提交时重新创建线程池（如 TestClient 多次进入 lifespan）"""
+    done: list[Callable[[Session], object]] = []
+    finished = threading.Event()
+
+    def run(write: Callable[[Session], object]) -> None:
+        done.append(write)
+        finished.set()
+
+    monkeypatch.setattr(db, "_run_background_write", run)
+
+    db.submit_background_write(first_write)
+    db.shutdown_background_writes()
+    assert done == [first_write]
+
+    finished.clear()
+    db.submit_background_write(second_write)
+    assert finished.wait(timeout=5)
+    db.shutdown_background_writes()
+    assert done == [first_write, second_write]
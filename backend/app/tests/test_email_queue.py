@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from app.core import email_queue
+from app.core.config import settings
+from app.core.email_queue import (
+    DEAD_KEY,
+    PROCESSING_KEY,
+    QUEUE_KEY,
+    RETRY_KEY,
+    EmailQueue,
+    dispatch_email,
+    enqueue_email,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def queue(monkeypatch: pytest.MonkeyPatch) -> EmailQueue:
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(email_queue, "_redis", lambda: client)
+    return EmailQueue(client)
+
+
+def test_enqueue_pop_ack(queue: EmailQueue) -> None:
+    """测试入队、取出与确认"""
+    job_id = enqueue_email(email_to="a@example.com", subject="s", html_content="<p>")
+    raw = queue.pop()
+    assert raw is not None
+    assert json.loads(raw)["id"] == job_id
+    assert queue.client.llen(PROCESSING_KEY) == 1
+
+    queue.ack(raw)
+    assert queue.client.llen(PROCESSING_KEY) == 0
+    assert queue.client.llen(QUEUE_KEY) == 0
+
+
+def test_fail_retries_then_dead_letters(
+    queue: EmailQueue, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """测试失败重试与超过最大次数进入死信队列"""
+    pytest.importorskip("lupa")  # promote_due 使用 Lua 脚本
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BACKOFF_SECONDS", 0)
+    enqueue_email(email_to="a@example.com", subject="s", html_content="<p>")
+
+    raw = queue.pop()
+    assert raw is not None
+    queue.fail(raw, json.loads(raw), "connection refused")
+    assert queue.client.zcard(RETRY_KEY) == 1
+    assert queue.client.llen(PROCESSING_KEY) == 0
+
+    assert queue.promote_due() == 1
+    raw = queue.pop()
+    assert raw is not None
+    job = json.loads(raw)
+    assert job["attempts"] == 1
+    queue.fail(raw, job, "connection refused")
+    assert queue.client.zcard(RETRY_KEY) == 0
+    assert json.loads(str(queue.client.lindex(DEAD_KEY, 0)))["attempts"] == 2
+
+
+def test_dead_letters_are_trimmed_and_expire(
+    queue: EmailQueue, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """测试死信队列只保留最近的任务并设置过期时间"""
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "EMAIL_DEAD_LETTER_MAX_JOBS", 2)
+    for subject in ("s1", "s2", "s3"):
+        enqueue_email(email_to="a@example.com", subject=subject, html_content="<p>")
+        raw = queue.pop()
+        assert raw is not None
+        queue.fail(raw, json.loads(raw), "connection refused")
+
+    assert queue.client.llen(DEAD_KEY) == 2
+    assert json.loads(str(queue.client.lindex(DEAD_KEY, 0)))["subject"] == "s3"
+    assert json.loads(str(queue.client.lindex(DEAD_KEY, 1)))["subject"] == "s2"
+    ttl = queue.client.ttl(DEAD_KEY)
+    assert isinstance(ttl, int)
+    assert 0 < ttl <= settings.EMAIL_DEAD_LETTER_TTL_SECONDS
+
+
+def test_secret_email_is_not_queued(
+    queue: EmailQueue, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """测试含密码的邮件直接发送，不写入 Redis"""
+    from app import utils
+
+    sent = []
+    monkeypatch.setattr(utils, "send_email", lambda **kwargs: sent.append(kwargs))
+    dispatch_email(
+        email_to="a@example.com",
+        subject="s",
+        html_content="<p>password</p>",
+        contains_secret=True,
+    )
+
+    assert [email["html_content"] for email in sent] == ["<p>password</p>"]
+    assert queue.client.llen(QUEUE_KEY) == 0
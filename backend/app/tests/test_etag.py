@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+
+from app.core import etag
+from app.core.config import settings
+from app.models.models import HumanLoopRequest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_request(headers: dict[str, str]) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def make_humanloop_request() -> HumanLoopRequest:
+    return HumanLoopRequest(
+        task_id="t1",
+        conversation_id="c1",
+        request_id="r1",
+        loop_type="approval",
+        platform="other",
+        context={},
+        metadata=None,
+        owner_id=uuid.uuid4(),
+        updated_at=datetime(2026, 10, 19, 8, 0, 0, 123456),
+    )
+
+
+def test_conditional_headers() -> None:
+    """测试 If-None-Match 与 If-Modified-Since 的判断"""
+    stamp = etag.version_stamp(make_humanloop_request())
+    headers = etag.version_headers(stamp)
+    assert headers["Last-Modified"] == "Mon, 19 Oct 2026 08:00:00 GMT"
+
+    assert etag.is_not_modified(make_request({"If-None-Match": headers["ETag"]}), stamp)
+    assert etag.is_not_modified(
+        make_request({"If-None-Match": f'"other", {headers["ETag"][2:]}'}), stamp
+    )
+    assert not etag.is_not_modified(make_request({"If-None-Match": '"other"'}), stamp)
+    # 有 If-None-Match 时忽略 If-Modified-Since
+    assert not etag.is_not_modified(
+        make_request(
+            {"If-None-Match": '"other"', "If-Modified-Since": headers["Last-Modified"]}
+        ),
+        stamp,
+    )
+    assert etag.is_not_modified(
+        make_request({"If-Modified-Since": headers["Last-Modified"]}), stamp
+    )
+    assert not etag.is_not_modified(
+        make_request({"If-Modified-Since": "Mon, 19 Oct 2026 07:59:59 GMT"}), stamp
+    )
+
+
+def test_store_and_read_version(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试详情接口的版本戳按主键写入"""
+    pytest.importorskip("lupa")  # store_version 使用 Lua 脚本
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(etag, "sync_redis_client", redis)
+    humanloop_request = make_humanloop_request()
+    stamp = etag.store_version(humanloop_request)
+
+    assert (
+        etag.cached_version(
+            etag.detail_version_key(
+                owner_id=humanloop_request.owner_id, request_id=humanloop_request.id
+            )
+        )
+        == stamp
+    )
+    # 写入失败时旧版本戳最多保留到状态缓存的有效期
+    key = etag.detail_version_key(
+        owner_id=humanloop_request.owner_id, request_id=humanloop_request.id
+    )
+    assert 0 < redis.ttl(key) <= settings.HUMANLOOP_STATUS_CACHE_TTL_SECONDS
+
+
+def test_store_version_keeps_newer_stamp(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试用旧数据补写版本戳时不覆盖更新的版本戳"""
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(etag, "sync_redis_client", redis)
+    stale = make_humanloop_request()
+    fresh = make_humanloop_request()
+    fresh.id, fresh.owner_id = stale.id, stale.owner_id
+    fresh.updated_at = datetime(2026, 10, 19, 8, 5, 0)
+    key = etag.detail_version_key(owner_id=stale.owner_id, request_id=stale.id)
+
+    etag.store_version(fresh)
+    etag.store_version(stale)
+    assert etag.cached_version(key) == etag.version_stamp(fresh)
+
+    redis.delete(key)
+    etag.store_version(stale)
+    etag.store_version(fresh)
+    assert etag.cached_version(key) == etag.version_stamp(fresh)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core import idempotency
+from app.core.redis import redis_client
+from app.models.models import APIResponse
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # 释放键使用 Lua 脚本
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        redis_client, "redis_client", fakeredis.FakeAsyncRedis(decode_responses=True)
+    )
+
+
+class CountingHandler:
+    def __init__(self, result: APIResponse, delay: float = 0) -> None:
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self) -> APIResponse:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+OWNER_ID = uuid.uuid4()
+PAYLOAD = APIResponse(success=True, error="payload")
+
+
+async def call(handler: CountingHandler, payload: APIResponse = PAYLOAD) -> object:
+    return await idempotency.run_idempotent(
+        handler,
+        key="k1",
+        scope="test",
+        owner_id=OWNER_ID,
+        payload=payload,
+        status_code=201,
+    )
+
+
+@pytest.mark.anyio
+async def test_replays_saved_result() -> None:
+    """测试相同键的重试返回第一次的结果，不再执行"""
+    handler = CountingHandler(APIResponse(success=True))
+    first = await call(handler)
+    second = await call(handler)
+
+    assert first == APIResponse(success=True)
+    assert isinstance(second, Response)
+    assert second.status_code == 201
+    assert second.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert json.loads(bytes(second.body)) == {"success": True, "error": None}
+    assert handler.calls == 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_wait_for_first() -> None:
+    """测试并发的同键请求等待第一个请求完成后返回其结果"""
+    handler = CountingHandler(APIResponse(success=True), delay=0.2)
+    results = await asyncio.gather(*(call(handler) for _ in range(3)))
+
+    assert handler.calls == 1
+    assert sum(isinstance(result, Response) for result in results) == 2
+
+
+@pytest.mark.anyio
+async def test_failure_releases_key_and_body_mismatch_rejected() -> None:
+    """测试执行失败后重试会重新执行，同一个键携带不同请求体时返回 422"""
+    failing = CountingHandler(APIResponse(success=False, error="db down"))
+    await call(failing)
+    await call(failing)
+    assert failing.calls == 2
+
+    await call(CountingHandler(APIResponse(success=True)))
+    with pytest.raises(HTTPException) as exc_info:
+        await call(
+            CountingHandler(APIResponse(success=True)),
+            payload=APIResponse(success=True, error="other"),
+        )
+    assert exc_info.value.status_code == 422
+
+
+def test_fingerprint_ignores_server_defaults() -> None:
+    """测试服务端默认值不影响摘要，相同请求体的两次解析摘要一致"""
+    from app.models.mongodb_models import TaskModel
+
+    body = {
+        "task_id": "t1",
+        "timestamp": "2026-10-19T08:00:00",
+        "conversations": [],
+        "metadata": {"source": "web", "client_ip": "127.0.0.1", "user_agent": "ua"},
+    }
+    first = TaskModel.model_validate(body)
+    second = TaskModel.model_validate(body)
+    assert idempotency.fingerprint(first) == idempotency.fingerprint(second)
+    assert idempotency.fingerprint(first) != idempotency.fingerprint(
+        TaskModel.model_validate({**body, "task_id": "t2"})
+    )
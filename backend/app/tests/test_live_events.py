@@ -0,0 +1,80 @@
+import json
+import uuid
+from typing import Any
+
+import pytest
+from fastapi import FastAPI, WebSocketDisconnect, status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.api.routes import admin_humanloop
+from app.core.live_events import live_feed_hub, request_event
+from app.models.models import HumanLoopRequest, User
+
+
+def make_request(owner_id: uuid.UUID, status: str) -> HumanLoopRequest:
+    return HumanLoopRequest(
+        task_id="t1",
+        conversation_id="c1",
+        request_id="r1",
+        loop_type="approval",
+        platform="other",
+        status=status,
+        context={},
+        metadata=None,
+        owner_id=owner_id,
+    )
+
+
+def test_request_event_stats_delta() -> None:
+    """测试新建与状态变更事件的统计增量"""
+    owner_id = uuid.uuid4()
+    channel, message = request_event("created", make_request(owner_id, "pending"))
+    assert channel.endswith(str(owner_id))
+    assert json.loads(message)["stats_delta"]["total"] == 1
+
+    _, message = request_event("updated", make_request(owner_id, "approved"), "pending")
+    event = json.loads(message)
+    assert event["request"]["status"] == "approved"
+    assert event["stats_delta"] == {"by_status": {"pending": -1, "approved": 1}}
+
+
+def test_live_feed_websocket(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试连接后收到快照和本用户的事件"""
+    user = User(email="ops@example.com", hashed_password="x")
+
+    def fake_get_current_user(_session: Session, token: str) -> User:
+        assert token == "token"
+        return user
+
+    def fake_stats(**_kwargs: Any) -> dict[str, Any]:
+        return {"total": 3}
+
+    monkeypatch.setattr(admin_humanloop, "get_current_user", fake_get_current_user)
+    monkeypatch.setattr(crud, "get_humanloop_stats", fake_stats)
+    app = FastAPI()
+    app.include_router(admin_humanloop.router)
+
+    with TestClient(app).websocket_connect("/admin/humanloop/ws") as ws:
+        ws.send_json({"type": "auth", "token": "token"})
+        assert ws.receive_json() == {"type": "snapshot", "stats": {"total": 3}}
+        _, message = request_event("created", make_request(user.id, "pending"))
+        live_feed_hub.dispatch(str(uuid.uuid4()), "other user")
+        live_feed_hub.dispatch(str(user.id), message)
+        assert json.loads(ws.receive_text())["type"] == "created"
+        ws.send_text("ping")
+        assert ws.receive_text() == "pong"
+    assert str(user.id) not in live_feed_hub.subscribers
+
+
+def test_live_feed_websocket_requires_auth_message() -> None:
+    """测试第一条消息不是认证消息时关闭连接"""
+    app = FastAPI()
+    app.include_router(admin_humanloop.router)
+
+    with TestClient(app).websocket_connect("/admin/humanloop/ws?token=token") as ws:
+        ws.send_text("ping")
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+    assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.requests import Request
+
+from app.api.main import custom_generate_unique_id
+from app.api.middleware import MetricsMiddleware
+from app.core import metrics
+from app.core.config import settings
+
+
+def make_request(headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/metrics",
+            "headers": [
+                (key.lower().encode(), value.encode())
+                for key, value in (headers or {}).items()
+            ],
+        }
+    )
+
+
+def duration_count(route: str, status: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count",
+        {"route": route, "method": "GET", "status": status},
+    )
+    return value or 0.0
+
+
+def test_metrics_middleware_labels_by_route() -> None:
+    """测试按路由 unique_id 记录耗时，未匹配的路径不产生新标签"""
+    router = APIRouter(tags=["probe"])
+
+    @router.get("/items/{item_id}")
+    def read_item(item_id: str) -> dict[str, str]:
+        return {"id": item_id}
+
+    app = FastAPI(generate_unique_id_function=custom_generate_unique_id)
+    app.include_router(router)
+    app.add_middleware(MetricsMiddleware)
+    route_label = "probe-read_item"
+
+    before = duration_count(route_label, "200")
+    unmatched_before = duration_count("unmatched", "404")
+    with TestClient(app) as client:
+        assert client.get("/items/1").status_code == 200
+        assert client.get("/items/2").status_code == 200
+        assert client.get("/missing").status_code == 404
+
+    assert duration_count(route_label, "200") == before + 2
+    assert duration_count("unmatched", "404") == unmatched_before + 1
+    assert REGISTRY.get_sample_value("http_requests_in_flight") == 0
+
+
+def test_status_collector_caches_counts() -> None:
+    """测试状态计数在 TTL 内复用缓存，查询失败时返回上次结果"""
+    collector = metrics.HumanLoopStatusCollector(ttl_seconds=60)
+    collector._cached = {"pending": 3, "approved": 1}
+    collector._cached_at = time.monotonic()
+
+    family = next(collector.collect())
+    assert {sample.labels["status"]: sample.value for sample in family.samples} == {
+        "pending": 3,
+        "approved": 1,
+    }
+
+    def fail() -> dict[str, int]:
+        raise RuntimeError("database unavailable")
+
+    collector._counts = fail  # type: ignore[method-assign]
+    family = next(collector.collect())
+    assert [sample.value for sample in family.samples] == [3, 1]
+
+
+def test_scrape_requires_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试配置令牌后抓取需携带 Bearer 令牌"""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+    assert metrics.metrics_endpoint(make_request()).status_code == 401
+    assert (
+        metrics.metrics_endpoint(
+            make_request({"Authorization": "Bearer wrong"})
+        ).status_code
+        == 401
+    )
+    assert metrics.is_scrape_authorized(
+        make_request({"Authorization": "Bearer scrape-secret"})
+    )
+
+
+def test_scrape_without_token_only_local(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试未配置令牌时只在 local 环境开放"""
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+    monkeypatch.setattr(settings, "ENVIRONMENT", "local")
+    assert metrics.is_scrape_authorized(make_request())
+
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    assert not metrics.is_scrape_authorized(make_request())
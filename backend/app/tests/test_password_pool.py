@@ -0,0 +1,22 @@
+import pytest
+
+from app.core import password_pool
+from app.core.config import settings
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_hash_and_verify(monkeypatch: pytest.MonkeyPatch, workers: int) -> None:
+    """测试进程池与线程池两种模式下的哈希与校验"""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", workers)
+    try:
+        hashed = await password_pool.get_password_hash_async("secret")
+        assert await password_pool.verify_password_async("secret", hashed)
+        assert not await password_pool.verify_password_async("wrong", hashed)
+    finally:
+        password_pool.shutdown_password_pool()
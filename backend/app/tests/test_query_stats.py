@@ -0,0 +1,33 @@
+from sqlalchemy import create_engine, text
+
+from app.core.query_stats import instrument_engine_query_stats, parameter_shape
+from app.tests.utils.utils import assert_max_queries
+
+
+def test_track_queries_counts_and_flags_repeated_statements() -> None:
+    """测试语句计数与重复语句检测"""
+    engine = create_engine("sqlite://")
+    instrument_engine_query_stats(engine)
+
+    with engine.connect() as conn, assert_max_queries(4) as stats:
+        for i in range(3):
+            conn.execute(text("SELECT :value"), {"value": i})
+        conn.execute(text("SELECT 1"))
+
+    assert stats.count == 4
+    assert stats.total_time > 0
+    assert stats.repeated(3) == [("SELECT ?", 3)]
+    assert stats.repeated(4) == []
+
+
+def test_parameter_shape() -> None:
+    """测试慢查询日志只记录参数类型"""
+    assert parameter_shape({"email_1": "a@b.com", "id_1": 1}) == {
+        "email_1": "str",
+        "id_1": "int",
+    }
+    assert parameter_shape(("a", 1)) == ["str", "int"]
+    assert parameter_shape([{"id": 1}, {"id": 2}]) == {
+        "rows": 2,
+        "row": {"id": "int"},
+    }
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.redis import redis_client
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # 令牌桶使用 Lua 脚本
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        redis_client, "redis_client", fakeredis.FakeAsyncRedis(decode_responses=True)
+    )
+
+
+@pytest.mark.anyio
+async def test_token_bucket_allows_burst_then_rejects() -> None:
+    """测试突发请求用完令牌后被拒绝，并给出等待时间"""
+    results = [
+        await rate_limit.acquire_token("bucket", per_minute=60, burst=3)
+        for _ in range(4)
+    ]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert 0 < results[3].retry_after <= 1
+    assert results[3].retry_after_seconds == 1
+
+
+@pytest.mark.anyio
+async def test_api_key_rate_limit_uses_per_key_override(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """测试 API Key 的限流配置覆盖全局配置，关闭限流时直接放行"""
+    monkeypatch.setattr(settings, "API_KEY_RATE_LIMIT_BURST", 100)
+    first = await rate_limit.check_api_key_rate_limit(
+        api_key_id="key", per_minute=60, burst=1
+    )
+    second = await rate_limit.check_api_key_rate_limit(
+        api_key_id="key", per_minute=60, burst=1
+    )
+    assert first is not None and first.allowed
+    assert second is not None and not second.allowed
+
+    monkeypatch.setattr(settings, "API_KEY_RATE_LIMIT_ENABLED", False)
+    assert (
+        await rate_limit.check_api_key_rate_limit(
+            api_key_id="key", per_minute=60, burst=1
+        )
+        is None
+    )
@@ -0,0 +1,48 @@
+from sqlalchemy import Engine
+from sqlmodel import create_engine
+
+from app.core.db import ReplicaRouter
+
+
+class FakeLagRouter(ReplicaRouter):
+    def __init__(self, lags: dict[Engine, float | Exception], **kwargs: float) -> None:
+        self.primary_engine = create_engine("sqlite://")
+        super().__init__(self.primary_engine, list(lags), **kwargs)
+        self.lags = lags
+        self.checks = 0
+
+    def lag_seconds(self, replica: Engine) -> float:
+        self.checks += 1
+        lag = self.lags[replica]
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+
+def test_routes_to_replicas_within_lag() -> None:
+    """测试轮询延迟在阈值内的副本，跳过延迟过大或连接失败的副本"""
+    fresh, lagging, broken = (create_engine("sqlite://") for _ in range(3))
+    router = FakeLagRouter(
+        {fresh: 0.5, lagging: 30.0, broken: ConnectionError("down")},
+        max_lag=5,
+        check_interval=60,
+    )
+
+    assert [router.read_engine() for _ in range(3)] == [fresh, fresh, fresh]
+    # 检查结果在 check_interval 内复用
+    assert router.checks == 3
+    router.read_engine()
+    assert router.checks == 3
+
+
+def test_falls_back_to_primary() -> None:
+    """测试没有副本或副本全部不可用时使用主库"""
+    lagging = create_engine("sqlite://")
+    router = FakeLagRouter({lagging: 30.0}, max_lag=5, check_interval=0)
+    assert router.read_engine() is router.primary_engine
+
+    router.lags[lagging] = 1.0
+    assert router.read_engine() is lagging
+
+    router = FakeLagRouter({}, max_lag=5, check_interval=0)
+    assert router.read_engine() is router.primary_engine
@@ -0,0 +1,155 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+from app.core import etag, status_cache
+from app.core.config import settings
+from app.models.models import HumanLoopRequest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_humanloop_request() -> HumanLoopRequest:
+    return HumanLoopRequest(
+        task_id="t1",
+        conversation_id="c1",
+        request_id="r1",
+        loop_type="approval",
+        platform="other",
+        context={},
+        metadata=None,
+        owner_id=uuid.uuid4(),
+        updated_at=datetime(2026, 10, 19, 8, 0, 0, 123456),
+    )
+
+
+def test_write_through_status_record(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试状态记录随请求变化覆盖写入，并同时写入详情版本戳"""
+    pytest.importorskip("lupa")  # cache_request 使用 Lua 脚本
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(status_cache, "sync_redis_client", redis)
+    monkeypatch.setattr(etag, "sync_redis_client", redis)
+    humanloop_request = make_humanloop_request()
+    key = status_cache.status_key(
+        owner_id=humanloop_request.owner_id,
+        platform="other",
+        conversation_id="c1",
+        request_id="r1",
+    )
+
+    assert status_cache.cached_status(key) is None
+    status_cache.cache_request(humanloop_request)
+    cached = status_cache.cached_status(key)
+    assert cached is not None
+    stamp, status = cached
+    assert stamp == etag.version_stamp(humanloop_request)
+    assert status.success and status.status == "pending"
+    assert 0 < redis.ttl(key) <= settings.HUMANLOOP_STATUS_CACHE_TTL_SECONDS
+
+    humanloop_request.status = "approved"
+    humanloop_request.response = {"approved": True}
+    humanloop_request.responded_by = "admin@example.com"
+    humanloop_request.responded_at = datetime(2026, 10, 19, 8, 5, 0)
+    humanloop_request.updated_at = datetime(2026, 10, 19, 8, 5, 0)
+    status_cache.store_entries(status_cache.cache_entries(humanloop_request))
+
+    cached = status_cache.cached_status(key)
+    assert cached is not None
+    stamp, status = cached
+    assert stamp == etag.version_stamp(humanloop_request)
+    assert status.status == "approved"
+    assert status.response == {"approved": True}
+    assert status.responded_at == humanloop_request.responded_at
+    assert (
+        etag.cached_version(
+            etag.detail_version_key(
+                owner_id=humanloop_request.owner_id, request_id=humanloop_request.id
+            )
+        )
+        == stamp
+    )
+
+
+def test_redis_unavailable(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试 Redis 不可用时读取返回 None、写入不抛出异常"""
+
+    class BrokenRedis:
+        def get(self, key: str) -> None:
+            raise ConnectionError("down")
+
+        def evalsha(self, *args: Any) -> None:
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(status_cache, "sync_redis_client", BrokenRedis())
+    monkeypatch.setattr(etag, "sync_redis_client", BrokenRedis())
+    humanloop_request = make_humanloop_request()
+    status_cache.cache_request(humanloop_request)
+    status_cache.store_entries(status_cache.cache_entries(humanloop_request))
+    assert status_cache.cached_status("humanloop:status:missing") is None
+
+
+def test_refill_does_not_overwrite_newer_record(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """测试未命中回填与写入交错时，回填的旧数据不覆盖已写入的新记录"""
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(status_cache, "sync_redis_client", redis)
+    monkeypatch.setattr(etag, "sync_redis_client", redis)
+    # 状态接口未命中并从数据库读到了 pending
+    stale = make_humanloop_request()
+    key = status_cache.status_key(
+        owner_id=stale.owner_id, platform="other", conversation_id="c1", request_id="r1"
+    )
+    detail_key = etag.detail_version_key(owner_id=stale.owner_id, request_id=stale.id)
+    # 回填之前，管理员审批并写入了新的记录
+    fresh = make_humanloop_request()
+    fresh.id, fresh.owner_id = stale.id, stale.owner_id
+    fresh.status = "approved"
+    fresh.updated_at = datetime(2026, 10, 19, 8, 5, 0)
+    status_cache.store_entries(status_cache.cache_entries(fresh))
+
+    status_cache.cache_request(stale)
+
+    cached = status_cache.cached_status(key)
+    assert cached is not None
+    assert cached[0] == etag.version_stamp(fresh)
+    assert cached[1].status == "approved"
+    assert etag.cached_version(detail_key) == etag.version_stamp(fresh)
+
+    # 键过期后回填正常写入，更新的版本也可以覆盖旧记录
+    redis.delete(key, detail_key)
+    status_cache.cache_request(stale)
+    assert etag.cached_version(detail_key) == etag.version_stamp(stale)
+    status_cache.cache_request(fresh)
+    cached = status_cache.cached_status(key)
+    assert cached is not None and cached[1].status == "approved"
+
+
+def test_write_through_out_of_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试并发更新提交后写入顺序颠倒时，先提交的旧记录不覆盖新记录"""
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(status_cache, "sync_redis_client", redis)
+    monkeypatch.setattr(etag, "sync_redis_client", redis)
+    older = make_humanloop_request()
+    older.status = "inprogress"
+    newer = make_humanloop_request()
+    newer.id, newer.owner_id = older.id, older.owner_id
+    newer.status = "approved"
+    newer.updated_at = datetime(2026, 10, 19, 8, 5, 0)
+    key = status_cache.status_key(
+        owner_id=older.owner_id, platform="other", conversation_id="c1", request_id="r1"
+    )
+    detail_key = etag.detail_version_key(owner_id=older.owner_id, request_id=older.id)
+
+    status_cache.store_entries(status_cache.cache_entries(newer))
+    status_cache.store_entries(status_cache.cache_entries(older))
+
+    cached = status_cache.cached_status(key)
+    assert cached is not None
+    assert cached[0] == etag.version_stamp(newer)
+    assert cached[1].status == "approved"
+    assert etag.cached_version(detail_key) == etag.version_stamp(newer)
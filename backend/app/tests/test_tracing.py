@@ -0,0 +1,90 @@
+from collections.abc import Generator, Iterator
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app.core import tracing
+from app.core.config import settings
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+def exporter(monkeypatch: pytest.MonkeyPatch) -> InMemorySpanExporter:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(settings, "OTEL_EXPORTER_OTLP_ENDPOINT", "http://otel:4318")
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    return exporter
+
+
+def current_span_name() -> str:
+    return getattr(trace.get_current_span(), "name", "")
+
+
+def test_traced_sync(exporter: InMemorySpanExporter) -> None:
+    """测试同步函数在调用期间处于 span 内"""
+
+    @tracing.traced("sync")
+    def work() -> str:
+        return current_span_name()
+
+    assert work() == "sync"
+    assert [span.name for span in exporter.get_finished_spans()] == ["sync"]
+
+
+@pytest.mark.anyio
+async def test_traced_async(exporter: InMemorySpanExporter) -> None:
+    """测试协程函数在 await 期间处于 span 内"""
+
+    @tracing.traced("async")
+    async def work() -> str:
+        return current_span_name()
+
+    assert await work() == "async"
+    assert [span.name for span in exporter.get_finished_spans()] == ["async"]
+
+
+def test_traced_generator_spans_iteration(exporter: InMemorySpanExporter) -> None:
+    """测试生成器的 span 覆盖整个迭代过程，迭代结束后才关闭"""
+
+    @tracing.traced("generator")
+    def rows() -> Iterator[str]:
+        yield current_span_name()
+        yield current_span_name()
+
+    iterator = rows()
+    assert exporter.get_finished_spans() == ()
+    assert next(iterator) == "generator"
+    # 两次恢复之间不泄漏当前 span
+    assert current_span_name() != "generator"
+    assert exporter.get_finished_spans() == ()
+    assert list(iterator) == ["generator"]
+    assert [span.name for span in exporter.get_finished_spans()] == ["generator"]
+
+
+def test_traced_generator_closed_early(exporter: InMemorySpanExporter) -> None:
+    """测试提前关闭生成器时 span 同样结束"""
+    closed = []
+
+    @tracing.traced("generator")
+    def rows() -> Generator[int, None, None]:
+        try:
+            yield from range(10)
+        finally:
+            closed.append(True)
+
+    iterator = rows()
+    assert next(iterator) == 0
+    iterator.close()
+    assert closed == [True]
+    assert [span.name for span in exporter.get_finished_spans()] == ["generator"]
@@ -0,0 +1,53 @@
+from collections.abc import Generator
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session
+
+from app.core import user_cache as user_cache_module
+from app.core.user_cache import UserCache, invalidate_user, user_cache
+from app.models.models import User
+from app.tests.utils.utils import random_email
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def session(monkeypatch: pytest.MonkeyPatch) -> Generator[Session, None, None]:
+    monkeypatch.setattr(user_cache_module, "sync_redis_client", fakeredis.FakeRedis())
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)  # type: ignore[attr-defined]
+    with Session(engine) as session:
+        yield session
+    user_cache.clear()
+
+
+def test_cached_user_is_merged_into_session(session: Session) -> None:
+    """测试命中缓存时不查询数据库，修改后仍然能写回"""
+    user = User(email=random_email(), hashed_password="hashed", full_name="old")
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    subject = str(user.id)
+    session.expunge_all()
+
+    cache = UserCache()
+    assert cache.get(session, subject) is None
+    cache.set(subject, user)
+
+    cached = cache.get(session, subject)
+    assert cached is not None
+    assert cached.email == user.email
+    cached.full_name = "new"
+    session.commit()
+    session.expunge_all()
+    db_user = session.get(User, user.id)
+    assert db_user is not None and db_user.full_name == "new"
+
+
+def test_invalidate_user_evicts_entry(session: Session) -> None:
+    """测试失效后重新从数据库读取"""
+    user = User(email=random_email(), hashed_password="hashed")
+    user_cache.set(str(user.id), user)
+    invalidate_user(user.id)
+    assert user_cache.get(session, str(user.id)) is None
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import socket
+import uuid
+from typing import Any
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.webhooks import (
+    DEAD_KEY,
+    PROCESSING_KEY,
+    RETRY_KEY,
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    WebhookQueue,
+    build_delivery,
+    callback_url_error,
+    resolve_callback_address,
+    resolve_callback_url,
+    sign_payload,
+)
+from app.models.models import APIKey, HumanLoopRequest
+from app.webhook_worker import WebhookDispatcher
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+# 测试不访问真实 DNS：主机名按此表解析，IP 字面量原样返回
+DNS = {
+    "agent.example.com": ["93.184.216.34"],
+    "a.example.com": ["93.184.216.34"],
+    "localhost": ["127.0.0.1"],
+    "other.example.com": ["93.184.216.35"],
+    "internal.example.com": ["10.0.0.5"],
+    "mixed.example.com": ["93.184.216.34", "127.0.0.1"],
+}
+
+
+def fake_getaddrinfo(host: str, *_args: Any, **_kwargs: Any) -> list[Any]:
+    addresses = DNS.get(host, [host])
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (a, 0)) for a in addresses]
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch: pytest.MonkeyPatch) -> None:
+    # 事件循环的 getaddrinfo 也在线程池中调用 socket.getaddrinfo
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", [])
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+def make_request(metadata: dict[str, str] | None = None) -> HumanLoopRequest:
+    return HumanLoopRequest(
+        task_id="t1",
+        conversation_id="c1",
+        request_id="r1",
+        loop_type="approval",
+        platform="other",
+        status="approved",
+        context={},
+        metadata=metadata,
+        response={"ok": True},
+        owner_id=uuid.uuid4(),
+    )
+
+
+def make_api_key(webhook_url: str | None = "https://agent.example.com/hook") -> APIKey:
+    return APIKey(
+        name="agent", key="secret-key", owner_id=uuid.uuid4(), webhook_url=webhook_url
+    )
+
+
+def test_callback_url_and_signature() -> None:
+    """测试回调地址优先级和签名"""
+    api_key = make_api_key()
+    assert resolve_callback_url(make_request(), api_key) == api_key.webhook_url
+    per_request = make_request({"callback_url": "https://other.example.com/cb"})
+    assert resolve_callback_url(per_request, api_key) == "https://other.example.com/cb"
+    assert resolve_callback_url(make_request(), make_api_key(None)) is None
+
+    delivery = build_delivery(make_request(), api_key, "https://a.example.com")
+    headers = delivery["headers"]
+    assert headers[SIGNATURE_HEADER] == sign_payload(
+        "secret-key", headers[TIMESTAMP_HEADER], delivery["body"]
+    )
+    body = json.loads(delivery["body"])
+    assert body["status"] == "approved"
+    assert body["request_id"] == "r1"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "status_code,processing,retry,dead",
+    [(200, 0, 0, 0), (503, 0, 1, 0), (400, 0, 0, 1)],
+)
+async def test_dispatcher_outcomes(
+    status_code: int, processing: int, retry: int, dead: int
+) -> None:
+    """测试投递成功确认、5xx 重试和 4xx 进入死信队列"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = WebhookQueue(client)
+    delivery = build_delivery(make_request(), make_api_key(), "https://a.example.com")
+    raw = json.dumps(delivery)
+    await client.lpush(PROCESSING_KEY, raw)
+
+    dispatcher = WebhookDispatcher(queue)
+    destination = dispatcher.destination(delivery["url"])
+    destination.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda _request: httpx.Response(status_code))
+    )
+    await dispatcher.submit(raw)
+    await dispatcher.close()
+
+    assert await client.llen(PROCESSING_KEY) == processing
+    assert await client.zcard(RETRY_KEY) == retry
+    assert await client.llen(DEAD_KEY) == dead
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1/hook",
+        "http://localhost:8000/hook",
+        "http://[::1]/hook",
+        "http://10.1.2.3/hook",
+        "http://192.168.0.10:8080/hook",
+        "http://169.254.169.254/latest/meta-data",
+        "http://0.0.0.0/hook",
+        "http://240.0.0.1/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "https://internal.example.com/hook",
+        "https://mixed.example.com/hook",
+        "ftp://agent.example.com/hook",
+        "https:///hook",
+    ],
+)
+@pytest.mark.anyio
+async def test_callback_url_rejects_non_public_targets(url: str) -> None:
+    """测试拒绝回环、内网、链路本地、保留地址和非 http(s) 地址"""
+    address, error = await resolve_callback_address(url)
+    assert address is None
+    assert error is not None
+
+
+@pytest.mark.anyio
+async def test_callback_url_allows_public_and_allowlisted_hosts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """测试公网地址放行；配置白名单后只允许名单内主机（可为内网）"""
+    assert await resolve_callback_address("https://agent.example.com/hook") == (
+        "93.184.216.34",
+        None,
+    )
+
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["internal.example.com"])
+    assert await resolve_callback_address("https://internal.example.com/hook") == (
+        "10.0.0.5",
+        None,
+    )
+    _, error = await resolve_callback_address("https://agent.example.com/hook")
+    assert error is not None
+
+
+def test_callback_url_error_does_not_resolve(monkeypatch: pytest.MonkeyPatch) -> None:
+    """测试请求路径中的校验只检查格式和白名单，不阻塞在 DNS 解析上"""
+
+    def fail_getaddrinfo(*_args: Any, **_kwargs: Any) -> list[Any]:
+        raise AssertionError("callback_url_error must not resolve DNS")
+
+    monkeypatch.setattr(socket, "getaddrinfo", fail_getaddrinfo)
+    assert callback_url_error("https://internal.example.com/hook") is None
+    assert callback_url_error("ftp://agent.example.com/hook") is not None
+
+    monkeypatch.setattr(settings, "WEBHOOK_ALLOWED_HOSTS", ["agent.example.com"])
+    assert callback_url_error("https://other.example.com/hook") is not None
+
+
+@pytest.mark.anyio
+async def test_dispatcher_dead_letters_rejected_url() -> None:
+    """测试投递前解析到内网地址的回调不发送请求，直接进入死信队列"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = WebhookQueue(client)
+    delivery = build_delivery(
+        make_request(), make_api_key(), "https://internal.example.com/hook"
+    )
+    raw = json.dumps(delivery)
+    await client.lpush(PROCESSING_KEY, raw)
+
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200)
+
+    dispatcher = WebhookDispatcher(queue)
+    dispatcher.destination(delivery["url"]).client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+    await dispatcher.submit(raw)
+    await dispatcher.close()
+
+    assert sent == []
+    assert await client.llen(PROCESSING_KEY) == 0
+    assert await client.llen(DEAD_KEY) == 1
+
+
+@pytest.mark.anyio
+async def test_dispatcher_connects_to_validated_address() -> None:
+    """测试请求发往校验过的 IP，Host 头和 SNI 保持原主机名"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = WebhookQueue(client)
+    delivery = build_delivery(
+        make_request(), make_api_key(), "https://agent.example.com:8443/hook"
+    )
+    raw = json.dumps(delivery)
+    await client.lpush(PROCESSING_KEY, raw)
+
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request)
+        return httpx.Response(200)
+
+    dispatcher = WebhookDispatcher(queue)
+    dispatcher.destination(delivery["url"]).client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
+    )
+    await dispatcher.submit(raw)
+    await dispatcher.close()
+
+    [request] = sent
+    assert str(request.url) == "https://93.184.216.34:8443/hook"
+    assert request.headers["Host"] == "agent.example.com:8443"
+    assert request.extensions["sni_hostname"] == "agent.example.com"
+    assert request.headers[SIGNATURE_HEADER] == delivery["headers"][SIGNATURE_HEADER]
+
+
+@pytest.mark.anyio
+async def test_dispatcher_defers_saturated_destination(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """测试目标主机并发已满时任务延后，不占用全局槽位"""
+    monkeypatch.setattr(settings, "WEBHOOK_PER_DESTINATION_CONCURRENCY", 1)
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = WebhookQueue(client)
+    dispatcher = WebhookDispatcher(queue)
+    release = asyncio.Event()
+
+    async def slow_handler(_request: httpx.Request) -> httpx.Response:
+        await release.wait()
+        return httpx.Response(200)
+
+    slow = [
+        json.dumps(build_delivery(make_request(), make_api_key(), url))
+        for url in ("https://a.example.com/1", "https://a.example.com/2")
+    ]
+    fast = json.dumps(
+        build_delivery(make_request(), make_api_key(), "https://other.example.com/")
+    )
+    for raw in [*slow, fast]:
+        await client.lpush(PROCESSING_KEY, raw)
+    dispatcher.destination("https://a.example.com").client = httpx.AsyncClient(
+        transport=httpx.MockTransport(slow_handler)
+    )
+    dispatcher.destination("https://other.example.com").client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda _request: httpx.Response(200))
+    )
+
+    for raw in [*slow, fast]:
+        await dispatcher.submit(raw)
+    # 第二个慢主机任务被延后，快主机的任务照常投递
+    assert await client.zrange(RETRY_KEY, 0, -1) == [slow[1]]
+    while len(dispatcher.tasks) > 1:
+        await asyncio.sleep(0)
+    assert await client.lrange(PROCESSING_KEY, 0, -1) == [slow[0]]
+
+    release.set()
+    await dispatcher.close()
+    assert await client.llen(PROCESSING_KEY) == 0
+    retried = await client.zrange(RETRY_KEY, 0, -1)
+    assert [json.loads(raw).get("attempts") for raw in retried] == [0]
+
+
+@pytest.mark.anyio
+async def test_dispatcher_records_unexpected_failures() -> None:
+    """测试无法解析的任务进入死信队列，投递中出现异常时按失败处理"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    queue = WebhookQueue(client)
+    dispatcher = WebhookDispatcher(queue)
+
+    await client.lpush(PROCESSING_KEY, "not-json")
+    await dispatcher.submit("not-json")
+    assert json.loads(str(await client.lindex(DEAD_KEY, 0)))["raw"] == "not-json"
+
+    delivery = build_delivery(make_request(), make_api_key(), "https://a.example.com")
+    raw = json.dumps(delivery)
+    await client.lpush(PROCESSING_KEY, raw)
+
+    def broken_handler(_request: httpx.Request) -> httpx.Response:
+        raise RuntimeError("boom")
+
+    dispatcher.destination(delivery["url"]).client = httpx.AsyncClient(
+        transport=httpx.MockTransport(broken_handler)
+    )
+    await dispatcher.submit(raw)
+    await dispatcher.close()
+
+    assert await client.llen(PROCESSING_KEY) == 0
+    [retried] = await client.zrange(RETRY_KEY, 0, -1)
+    assert json.loads(retried)["last_error"] == "RuntimeError: boom"
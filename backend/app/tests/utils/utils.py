@@ -1,9 +1,13 @@
 import random
 import string
+from collections.abc import Iterator
+from contextlib import contextmanager
 
+import httpx
 from fastapi.testclient import TestClient
 
 from app.core.config import settings
+from app.core.query_stats import QueryStats, track_queries
 
 
 def random_lower_string() -> str:
@@ -24,3 +28,23 @@ def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     a_token = tokens["data"]["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+def assert_query_budget(response: httpx.Response, max_queries: int) -> None:
+    """断言接口执行的 SQL 语句数不超过预算（需开启 DB_QUERY_STATS_HEADERS）"""
+    count = int(response.headers["x-db-query-count"])
+    assert count <= max_queries, (
+        f"{response.request.method} {response.request.url.path} executed "
+        f"{count} queries, budget is {max_queries}"
+    )
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """断言代码块内执行的 SQL 语句数不超过预算"""
+    with track_queries() as stats:
+        yield stats
+    assert stats.count <= max_queries, (
+        f"executed {stats.count} queries, budget is {max_queries}: "
+        f"{list(stats.statements)}"
+    )
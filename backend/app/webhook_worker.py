@@ -0,0 +1,216 @@
+"""人机循环状态回调 worker
+
+从 Redis 队列中取出管理后台入队的回调并投递给 Agent：
+
+- 每个目标主机一个 httpx.AsyncClient，连接池大小即该主机的最大并发数
+- 总并发数不超过 WEBHOOK_WORKER_CONCURRENCY；目标主机并发已满时任务延后，
+  不占用全局槽位，慢主机不会拖住其他主机的投递
+- 网络错误、408、429 和 5xx 按指数退避重试，其他 4xx 直接进入死信队列
+- 投递前解析目标主机，解析到非公网地址时直接进入死信队列；请求直接连接
+  校验过的地址，Host 头和 TLS SNI 仍使用原主机名
+- 在 WEBHOOK_WORKER_METRICS_PORT 端口提供 Prometheus 指标
+
+运行：python app/webhook_worker.py
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import signal
+import time
+from collections.abc import Awaitable
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from prometheus_client import start_http_server
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.log import setup_logging
+from app.core.redis import redis_client
+from app.core.webhooks import WebhookQueue, resolve_callback_address
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 429}
+# 目标主机并发已满时，任务延后多久再取出
+DEFER_SECONDS = 1.0
+
+
+class Destination:
+    """同一目标主机共享的连接池和并发限制"""
+
+    def __init__(self) -> None:
+        limit = settings.WEBHOOK_PER_DESTINATION_CONCURRENCY
+        self.semaphore = asyncio.Semaphore(limit)
+        self.client = httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+            follow_redirects=False,
+        )
+
+
+class WebhookDispatcher:
+    def __init__(self, queue: WebhookQueue) -> None:
+        self.queue = queue
+        self.destinations: dict[str, Destination] = {}
+        self.slots = asyncio.Semaphore(settings.WEBHOOK_WORKER_CONCURRENCY)
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def destination(self, url: str) -> Destination:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        if key not in self.destinations:
+            self.destinations[key] = Destination()
+        return self.destinations[key]
+
+    async def submit(self, raw: str) -> None:
+        """取得目标主机和全局槽位后在后台投递，保证同时处理的任务数有上限
+
+        先占目标主机的并发再占全局槽位；目标主机已满时任务延后，
+        避免一个慢主机的任务占满全局槽位。
+        """
+        try:
+            delivery = json.loads(raw)
+            destination = self.destination(delivery["url"])
+        except (ValueError, TypeError, KeyError) as e:
+            logger.error(f"Invalid webhook delivery {raw[:200]!r}: {e}")
+            await self._record(self.queue.bury(raw, f"invalid delivery: {e}"))
+            return
+        if destination.semaphore.locked():
+            await self._record(self.queue.defer(raw, DEFER_SECONDS))
+            return
+
+        await destination.semaphore.acquire()
+        await self.slots.acquire()
+        task = asyncio.create_task(self.deliver(raw, delivery, destination))
+        self.tasks.add(task)
+        task.add_done_callback(functools.partial(self._done, destination))
+
+    def _done(self, destination: Destination, task: asyncio.Task[None]) -> None:
+        self.tasks.discard(task)
+        self.slots.release()
+        destination.semaphore.release()
+
+    async def _record(self, operation: Awaitable[None]) -> None:
+        """队列写入失败时任务留在投递中列表，worker 重启时重新入队"""
+        try:
+            await operation
+        except Exception as e:
+            logger.error(f"Failed to update webhook queue: {e}")
+
+    async def deliver(
+        self, raw: str, delivery: dict[str, Any], destination: Destination
+    ) -> None:
+        try:
+            await self._deliver(raw, delivery, destination)
+        except Exception as e:
+            logger.exception(f"Webhook {delivery.get('id')} delivery failed")
+            await self._record(
+                self.queue.fail(raw, delivery, f"{type(e).__name__}: {e}")
+            )
+
+    async def _deliver(
+        self, raw: str, delivery: dict[str, Any], destination: Destination
+    ) -> None:
+        # 入队后 DNS 记录可能已变化，投递前再次校验
+        address, rejected = await resolve_callback_address(delivery["url"])
+        if rejected:
+            logger.warning(f"Webhook {delivery['id']} rejected: {rejected}")
+            metrics.WEBHOOK_DELIVERIES.labels("rejected").inc()
+            await self.queue.fail(raw, delivery, rejected, retry=False)
+            return
+
+        url = httpx.URL(delivery["url"])
+        retry = True
+        start = time.perf_counter()
+        try:
+            # 连接校验过的地址，不让 httpx 再次解析
+            response = await destination.client.post(
+                url.copy_with(host=address),
+                content=delivery["body"],
+                headers={**delivery["headers"], "Host": url.netloc.decode("ascii")},
+                extensions={"sni_hostname": url.raw_host.decode("ascii")},
+            )
+            error = None if response.is_success else f"HTTP {response.status_code}"
+            retry = (
+                response.status_code in RETRY_STATUS_CODES
+                or response.status_code >= 500
+            )
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+        metrics.WEBHOOK_DELIVERY_DURATION.observe(time.perf_counter() - start)
+
+        if error is None:
+            await self.queue.ack(raw)
+            metrics.WEBHOOK_DELIVERIES.labels("delivered").inc()
+            return
+
+        logger.warning(
+            f"Webhook {delivery['id']} to {delivery['url']} failed "
+            f"(attempt {int(delivery.get('attempts', 0)) + 1}): {error}"
+        )
+        await self.queue.fail(raw, delivery, error, retry=retry)
+
+    async def close(self) -> None:
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+        for destination in self.destinations.values():
+            await destination.client.aclose()
+
+
+async def maintain(queue: WebhookQueue, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            await queue.promote_due()
+        except Exception as e:
+            logger.error(f"Webhook queue maintenance failed: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run() -> None:
+    queue = WebhookQueue(redis_client.redis_client)
+    requeued = await queue.requeue_processing()
+    if requeued:
+        logger.info(f"Requeued {requeued} unfinished webhook deliveries")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stop.set)
+    loop.add_signal_handler(signal.SIGINT, stop.set)
+
+    dispatcher = WebhookDispatcher(queue)
+    maintenance = asyncio.create_task(maintain(queue, stop))
+    logger.info("Webhook worker started")
+
+    while not stop.is_set():
+        try:
+            raw = await queue.pop(timeout=1)
+        except Exception as e:
+            logger.error(f"Failed to pop webhook delivery: {e}")
+            await asyncio.sleep(1)
+            continue
+        if raw is not None:
+            await dispatcher.submit(raw)
+
+    await maintenance
+    await dispatcher.close()
+    await redis_client.close()
+    logger.info("Webhook worker stopped")
+
+
+def main() -> None:
+    setup_logging()
+    start_http_server(
+        settings.WEBHOOK_WORKER_METRICS_PORT, registry=metrics.collector_registry()
+    )
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
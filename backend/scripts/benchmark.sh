@@ -0,0 +1,13 @@
+#!/usr/bin/env bash
+
+set -e
+set -x
+
+# 数据规模通过 BENCHMARK_SCALES 指定，如 BENCHMARK_SCALES=10000,100000,1000000
+# 结果保存在 .benchmarks/ 下，并与上一次保存的结果对比，平均耗时退化超过 10% 时失败
+python -m pytest app/tests/benchmarks \
+    --benchmark-only \
+    --benchmark-autosave \
+    --benchmark-compare \
+    --benchmark-compare-fail=mean:10% \
+    "$@"